@@ -0,0 +1,82 @@
+# alembic/env.py
+import os
+import sys
+from logging.config import fileConfig
+
+from sqlalchemy import engine_from_config
+from sqlalchemy import pool
+
+from alembic import context
+
+# Make the `app` package importable when alembic is run from backend/
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+from app.core.config import settings
+from app.db.base import Base
+import app.models # noqa: F401 - registers every model on Base.metadata
+from app.models.story_search_document import SEARCH_INDEX_OBJECTS
+
+# this is the Alembic Config object, which provides
+# access to the values within the .ini file in use.
+config = context.config
+
+# Interpret the config file for Python logging.
+# This line sets up loggers basically.
+if config.config_file_name is not None:
+    fileConfig(config.config_file_name)
+
+# Metadata for 'autogenerate' support
+target_metadata = Base.metadata
+
+# Use the application's database URL instead of the placeholder in alembic.ini
+config.set_main_option("sqlalchemy.url", settings.SQLALCHEMY_DATABASE_URL)
+
+
+def include_object(object, name, type_, reflected, compare_to):
+    """Leaves the full-text search index (created by raw DDL, not in the metadata) out of autogenerate."""
+    return not (reflected and compare_to is None and name in SEARCH_INDEX_OBJECTS)
+
+
+def run_migrations_offline() -> None:
+    """Run migrations in 'offline' mode (emit SQL without a DB connection)."""
+    url = config.get_main_option("sqlalchemy.url")
+    context.configure(
+        url=url,
+        target_metadata=target_metadata,
+        literal_binds=True,
+        dialect_opts={"paramstyle": "named"},
+        render_as_batch=url.startswith("sqlite"),
+        include_object=include_object,
+    )
+
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online() -> None:
+    """Run migrations in 'online' mode."""
+    connectable = engine_from_config(
+        config.get_section(config.config_ini_section, {}),
+        prefix="sqlalchemy.",
+        poolclass=pool.NullPool,
+    )
+
+    with connectable.connect() as connection:
+        context.configure(
+            connection=connection,
+            target_metadata=target_metadata,
+            # SQLite cannot ALTER most things in place; batch mode recreates the table
+            render_as_batch=connection.dialect.name == "sqlite",
+            include_object=include_object,
+        )
+
+        with context.begin_transaction():
+            context.run_migrations()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
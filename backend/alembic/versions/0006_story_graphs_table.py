@@ -0,0 +1,45 @@
+"""move story graphs to their own table
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-19 13:40:12.518204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0006'
+down_revision: Union[str, None] = '0005'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('story_graphs',
+    sa.Column('story_id', sa.String(), nullable=False),
+    sa.Column('graph_json', sa.JSON(), nullable=False),
+    sa.ForeignKeyConstraint(['story_id'], ['stories.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('story_id')
+    )
+    op.execute("INSERT INTO story_graphs (story_id, graph_json) SELECT id, graph_json FROM stories")
+
+    with op.batch_alter_table('stories', schema=None) as batch_op:
+        batch_op.drop_column('graph_json')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('stories', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('graph_json', sa.JSON(), nullable=True))
+
+    op.execute("UPDATE stories SET graph_json = (SELECT graph_json FROM story_graphs WHERE story_graphs.story_id = stories.id)")
+
+    with op.batch_alter_table('stories', schema=None) as batch_op:
+        batch_op.alter_column('graph_json', existing_type=sa.JSON(), nullable=False)
+
+    op.drop_table('story_graphs')
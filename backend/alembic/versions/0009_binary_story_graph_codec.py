@@ -0,0 +1,81 @@
+"""binary story graph codec
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-19 14:05:12.418266
+
+"""
+import json
+import zlib
+from typing import Sequence, Union
+
+from alembic import op
+import msgpack
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0009'
+down_revision: Union[str, None] = '0008'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Existing graphs keep their JSON text, as bytes ("legacy" rows, still readable);
+    # the app's background re-encoder (app.services.graph_reencoder) converts them.
+    if op.get_bind().dialect.name == "postgresql":
+        op.alter_column(
+            'story_graphs', 'graph_json', type_=sa.LargeBinary(), existing_nullable=False,
+            postgresql_using="convert_to(graph_json::text, 'UTF8')",
+        )
+    else:
+        with op.batch_alter_table('story_graphs', schema=None) as batch_op:
+            batch_op.alter_column('graph_json', existing_type=sa.JSON(), type_=sa.LargeBinary(), existing_nullable=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Binary rows cannot be cast back to JSON: decode every graph first
+    bind = op.get_bind()
+    graphs = bind.execute(sa.text("SELECT story_id, graph_json FROM story_graphs")).all()
+    documents = [{"story_id": story_id, "graph": json.dumps(_decode_graph(data))} for story_id, data in graphs]
+
+    if bind.dialect.name == "postgresql":
+        op.alter_column(
+            'story_graphs', 'graph_json', type_=sa.JSON(), existing_nullable=False,
+            postgresql_using="'{}'::json",
+        )
+        cast = "CAST(:graph AS JSON)"
+    else:
+        with op.batch_alter_table('story_graphs', schema=None) as batch_op:
+            batch_op.alter_column('graph_json', existing_type=sa.LargeBinary(), type_=sa.JSON(), existing_nullable=False)
+        cast = ":graph"
+    if documents:
+        bind.execute(sa.text(f"UPDATE story_graphs SET graph_json = {cast} WHERE story_id = :story_id"), documents)
+
+
+# Graph codec version 1 (app/db/graph_codec.py) as of this revision, so the migration
+# does not depend on the live app code: FORMAT_MARKER + version byte + zlib-compressed
+# msgpack with interned keys. Rows written before 0009 hold JSON text.
+_CODEC_KEYS = (
+    "nodes", "edges", "id", "type", "data", "position", "x", "y",
+    "label", "text_content", "characterName", "imageUrl", "initial_stats", "inputPrompt",
+    "llm_processing_prompt", "ending_type", "ending_message_prompt",
+    "source", "target", "markerEnd", "stat_effects",
+)
+
+
+def _decode_graph(data):
+    if isinstance(data, str):
+        return json.loads(data)
+    data = bytes(data)
+    if data[:1] != b"\x00":
+        return json.loads(data)
+    if data[1] != 1:
+        raise ValueError(f"Unknown graph codec version {data[1]}")
+    return msgpack.unpackb(
+        zlib.decompress(data[2:]), raw=False, strict_map_key=False,
+        object_pairs_hook=lambda pairs: {(_CODEC_KEYS[k] if type(k) is int else k): v for k, v in pairs},
+    )
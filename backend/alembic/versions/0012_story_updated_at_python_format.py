@@ -0,0 +1,34 @@
+"""story updated_at in python datetime format
+
+Revision ID: 0012
+Revises: 0011
+Create Date: 2026-10-19 15:02:18.731904
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0012'
+down_revision: Union[str, None] = '0011'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Stories.updated_at is now written from Python. On SQLite, values written by
+    # CURRENT_TIMESTAMP ("YYYY-MM-DD HH:MM:SS") get the fractional seconds Python
+    # datetimes are stored with, so they compare correctly with keyset cursors.
+    # PostgreSQL stores timestamps natively and needs nothing.
+    if op.get_bind().dialect.name == "sqlite":
+        op.execute("UPDATE stories SET updated_at = updated_at || '.000000' WHERE length(updated_at) = 19")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # The longer format is still read correctly by earlier versions
+    pass
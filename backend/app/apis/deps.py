@@ -1,15 +1,18 @@
-from typing import Generator, Annotated
+from typing import AsyncIterator, Generator, Annotated, Optional
 
-from fastapi import Depends, HTTPException, status
+from fastapi import Cookie, Depends, Header, HTTPException, Response, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import jwt, JWTError
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from app.core.config import settings
-from app.db.session import SessionLocal
+from app.core.etags import parse_story_etag
+from app.db.routing import READ_YOUR_WRITES_COOKIE, mark_writer, parse_primary_until, read_router
+from app.db.session import SessionLocal, get_async_db
 from app.models import user as user_model # Renamed to avoid conflict
 from app.schemas import token as token_schema # Renamed for clarity
-from app.crud import crud_user
+from app.crud import async_crud_user
 
 reusable_oauth2 = OAuth2PasswordBearer(
     tokenUrl="/api/auth/login" 
@@ -23,7 +26,7 @@ def get_db() -> Generator:
         db.close()
 
 async def get_current_user(
-    db: Annotated[Session, Depends(get_db)], token: Annotated[str, Depends(reusable_oauth2)]
+    db: Annotated[AsyncSession, Depends(get_async_db)], token: Annotated[str, Depends(reusable_oauth2)]
 ) -> user_model.User:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -41,7 +44,10 @@ async def get_current_user(
     except JWTError:
         raise credentials_exception
     
-    db_user = crud_user.get_user_by_email(db, email=token_data.email)
+    db_user = await async_crud_user.get_user_by_email(db, email=token_data.email)
+    # End the read transaction: the connection goes back to the pool instead of staying
+    # checked out until the response is sent (expire_on_commit=False keeps db_user loaded)
+    await db.commit()
     if db_user is None:
         raise credentials_exception
     return db_user
@@ -51,4 +57,53 @@ async def get_current_active_user(
 ) -> user_model.User:
     # if not current_user.is_active: # Add is_active field to User model if needed
     #     raise HTTPException(status_code=400, detail="Inactive user")
-    return current_user 
\ No newline at end of file
+    return current_user 
+
+# Read/write routing (app.db.routing): commits of a write session set a cookie that keeps
+# the client's next reads on the primary; read-only routes may be served by a replica.
+ReadYourWritesCookie = Annotated[Optional[str], Cookie(alias=READ_YOUR_WRITES_COOKIE, include_in_schema=False)]
+
+def get_write_db(
+    db: Annotated[Session, Depends(get_db)],
+    response: Response,
+    current_user: Annotated[user_model.User, Depends(get_current_active_user)],
+) -> Session:
+    mark_writer(db, response)
+    return db
+
+async def get_async_write_db(
+    db: Annotated[AsyncSession, Depends(get_async_db)],
+    response: Response,
+    current_user: Annotated[user_model.User, Depends(get_current_active_user)],
+) -> AsyncSession:
+    mark_writer(db, response)
+    return db
+
+def get_read_db(
+    current_user: Annotated[user_model.User, Depends(get_current_active_user)],
+    primary_until: ReadYourWritesCookie = None,
+) -> Generator:
+    db = read_router.read_session(parse_primary_until(primary_until))
+    try:
+        yield db
+    finally:
+        db.close()
+
+async def get_async_read_db(
+    current_user: Annotated[user_model.User, Depends(get_current_active_user)],
+    primary_until: ReadYourWritesCookie = None,
+) -> AsyncIterator[AsyncSession]:
+    async with read_router.async_read_session(parse_primary_until(primary_until)) as db:
+        yield db
+
+def get_if_match_version(if_match: Annotated[Optional[str], Header()] = None) -> int:
+    """Story version the client based its write on. Writes without one are refused."""
+    if if_match is None:
+        raise HTTPException(
+            status_code=status.HTTP_428_PRECONDITION_REQUIRED,
+            detail="If-Match header with the story's ETag is required.",
+        )
+    version = parse_story_etag(if_match)
+    if version is None:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Malformed If-Match header.")
+    return version
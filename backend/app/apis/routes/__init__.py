@@ -3,4 +3,5 @@
 from . import auth
 from . import stories
 from . import files
-from . import game 
\ No newline at end of file
+from . import game
+from . import llm
\ No newline at end of file
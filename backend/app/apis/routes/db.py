@@ -0,0 +1,20 @@
+from typing import Annotated
+
+from fastapi import APIRouter, Depends
+
+from app.apis import deps
+from app.db.routing import read_router
+from app.db.session import pool_metrics
+from app.models import user as user_model
+from app.schemas import db as db_schema
+
+router = APIRouter()
+
+@router.get("/metrics", response_model=db_schema.DBMetrics)
+def read_db_metrics(
+    current_user: Annotated[user_model.User, Depends(deps.get_current_active_user)]
+):
+    return {
+        "engines": [metrics.snapshot() for metrics in pool_metrics],
+        "read_routing": read_router.stats(),
+    }
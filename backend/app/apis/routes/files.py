@@ -1,6 +1,6 @@
 from typing import Annotated
 from fastapi import APIRouter, Depends, UploadFile, File, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.apis import deps
 from app.services import file_service
@@ -11,7 +11,7 @@ router = APIRouter()
 
 @router.post("/upload/image", response_model=file_schema.FileResponse, status_code=status.HTTP_201_CREATED)
 async def upload_image(
-    db: Annotated[Session, Depends(deps.get_db)], 
+    db: Annotated[AsyncSession, Depends(deps.get_async_db)], 
     current_user: Annotated[user_model.User, Depends(deps.get_current_active_user)],
     image: UploadFile = File(...)
 ):
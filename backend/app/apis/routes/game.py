@@ -1,8 +1,8 @@
 # backend/app/apis/routes/game.py
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db.session import get_db
+from app.db.session import get_async_db
 from app.models.user import User
 from app.schemas.game import GameProgressRequest, GameProgressResponse
 # from app.services.game_service import process_game_choice # This service might not exist yet
@@ -14,7 +14,7 @@ router = APIRouter()
 async def progress_story(
     story_id: int,
     progress_request: GameProgressRequest,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(get_current_active_user),
 ):
     """
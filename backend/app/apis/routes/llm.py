@@ -0,0 +1,33 @@
+from typing import Annotated, List, Literal
+
+from fastapi import APIRouter, Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.apis import deps
+from app.llm import llm_client, llm_scheduler
+from app.models import user as user_model
+from app.schemas import llm as llm_schema
+from app.services import llm_usage_service
+
+router = APIRouter()
+
+@router.get("/metrics", response_model=llm_schema.LLMMetrics)
+def read_llm_metrics(
+    current_user: Annotated[user_model.User, Depends(deps.get_current_active_user)]
+):
+    return {
+        "scheduler": llm_scheduler.snapshot(),
+        "backends": llm_client.pool.snapshot(),
+        "hedges_launched": llm_client.pool.hedges_launched,
+    }
+
+
+@router.get("/usage", response_model=List[llm_schema.LLMUsageRollup])
+async def read_llm_usage(
+    db: Annotated[AsyncSession, Depends(deps.get_async_read_db)],
+    current_user: Annotated[user_model.User, Depends(deps.get_current_active_user)],
+    group_by: Literal["story", "user", "prompt_type"] = "story",
+    limit: int = 100
+):
+    """Token, latency and cost rollups for LLM calls made on the current user's stories."""
+    return await llm_usage_service.get_usage_rollups(db=db, owner_id=current_user.id, group_by=group_by, limit=limit)
\ No newline at end of file
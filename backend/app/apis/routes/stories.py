@@ -1,11 +1,15 @@
-from typing import Any, List, Annotated
+from typing import Any, List, Annotated, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from app.apis import deps
+from app.db.routing import parse_primary_until, read_router
+from app.core.etags import etag_matches, story_etag, story_list_etag
 from app.schemas import story as story_schema # Renamed for clarity
-from app.services import story_service # game_service removed temporarily
+from app.services import story_service, publish_service, snapshot_service, revision_service, story_search, story_transfer # game_service removed temporarily
 from app.services.game_service import GameService # Import GameService class
 from app.models import user as user_model
 
@@ -16,50 +20,209 @@ router = APIRouter()
 # a factory function provided via Depends would be better.
 game_service_instance = GameService()
 
+# Story responses may be kept by the browser but must be revalidated (If-None-Match) before reuse
+REVALIDATE_CACHE_CONTROL = "private, no-cache"
+
 @router.post("/stories", response_model=story_schema.Story, status_code=status.HTTP_201_CREATED)
 def create_story(
     *, 
-    db: Annotated[Session, Depends(deps.get_db)], 
+    db: Annotated[Session, Depends(deps.get_write_db)], 
     story_in: story_schema.StoryCreate, 
+    response: Response,
     current_user: Annotated[user_model.User, Depends(deps.get_current_active_user)]
 ):
-    return story_service.create_story(db=db, story_create=story_in, user_id=current_user.id)
+    story = story_service.create_story(db=db, story_create=story_in, user_id=current_user.id)
+    response.headers["ETag"] = story_etag(story.version)
+    return story
 
-@router.get("/stories/my", response_model=List[story_schema.Story])
+@router.get("/stories/my", response_model=story_schema.StorySummaryPage)
 def read_my_stories(
-    db: Annotated[Session, Depends(deps.get_db)], 
+    db: Annotated[Session, Depends(deps.get_read_db)], 
     current_user: Annotated[user_model.User, Depends(deps.get_current_active_user)],
-    skip: int = 0, # Added skip parameter
-    limit: int = 100 # Added limit parameter
+    response: Response,
+    limit: Annotated[int, Query(ge=1, le=100)] = 100,
+    cursor: Optional[str] = None, # next_cursor of the previous page
+    if_none_match: Annotated[Optional[str], Header()] = None
 ):
-    return story_service.get_my_stories(db=db, user_id=current_user.id, skip=skip, limit=limit)
+    # Revalidation is answered from (id, version) alone; stories are only loaded on a miss
+    etag = story_service.get_my_stories_etag(db=db, user_id=current_user.id, limit=limit, cursor=cursor)
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag, "Cache-Control": REVALIDATE_CACHE_CONTROL})
+    page = story_service.get_my_stories(db=db, user_id=current_user.id, limit=limit, cursor=cursor)
+    response.headers["ETag"] = story_list_etag([(story.id, story.version) for story in page.items], page.next_cursor)
+    response.headers["Cache-Control"] = REVALIDATE_CACHE_CONTROL
+    return page
+
+# Declared before /stories/{story_id}, which would match "export" and "search"
+@router.get("/stories/export", response_class=StreamingResponse)
+def export_my_stories(
+    current_user: Annotated[user_model.User, Depends(deps.get_current_active_user)],
+    primary_until: deps.ReadYourWritesCookie = None,
+):
+    # The user's stories as NDJSON, one story per line, streamed in batches (see story_transfer)
+    def chunks():
+        # Its own session: the response is streamed after the route (and its dependencies) returned
+        db = read_router.read_session(parse_primary_until(primary_until))
+        try:
+            yield from story_transfer.export_chunks(db, user_id=current_user.id)
+        finally:
+            db.close()
+    return StreamingResponse(
+        chunks(),
+        media_type=story_transfer.NDJSON_MEDIA_TYPE,
+        headers={"Content-Disposition": 'attachment; filename="stories.ndjson"'},
+    )
+
+@router.post("/stories/import", response_model=story_schema.StoryImportResult)
+async def import_stories(
+    *,
+    db: Annotated[Session, Depends(deps.get_write_db)],
+    request: Request,
+    current_user: Annotated[user_model.User, Depends(deps.get_current_active_user)]
+):
+    # Imported as the body arrives. Stories whose id already exists are skipped, so a
+    # failed import can be sent again; batches imported before the failure are kept.
+    try:
+        return await story_transfer.import_stream(request.stream(), db=db, owner_id=current_user.id)
+    except story_transfer.LineTooLongError as e:
+        raise HTTPException(status_code=status.HTTP_413_CONTENT_TOO_LARGE, detail=str(e))
+
+@router.get("/stories/search", response_model=story_schema.StorySearchPage)
+def search_my_stories(
+    db: Annotated[Session, Depends(deps.get_read_db)],
+    current_user: Annotated[user_model.User, Depends(deps.get_current_active_user)],
+    q: Annotated[str, Query(min_length=1, max_length=500)],
+    limit: Annotated[int, Query(ge=1, le=100)] = 20,
+    offset: Annotated[int, Query(ge=0, le=10000)] = 0, # next_offset of the previous page
+):
+    # Ranked hits in the user's story titles, descriptions and node texts (see story_search)
+    return story_search.search(db, user_id=current_user.id, query=q, limit=limit, offset=offset)
 
 @router.get("/stories/{story_id}", response_model=story_schema.Story)
 def read_story(
     *, 
-    db: Annotated[Session, Depends(deps.get_db)], 
+    db: Annotated[Session, Depends(deps.get_read_db)], 
     story_id: str,  # Changed back from int to str
-    current_user: Annotated[user_model.User, Depends(deps.get_current_active_user)]
+    current_user: Annotated[user_model.User, Depends(deps.get_current_active_user)],
+    if_none_match: Annotated[Optional[str], Header()] = None
 ):
-    story = story_service.get_story(db=db, story_id=story_id, user_id=current_user.id)
-    if not story:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Story not found or not authorized")
-    return story
+    version = story_service.get_story_version(db=db, story_id=story_id, user_id=current_user.id)
+    if etag_matches(if_none_match, story_etag(version)):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": story_etag(version), "Cache-Control": REVALIDATE_CACHE_CONTROL})
+    # Already-encoded JSON (cached per version): no response model validation or re-encoding
+    version, body = story_service.get_story_body(db=db, story_id=story_id, user_id=current_user.id, version=version)
+    return Response(
+        content=body,
+        media_type="application/json",
+        headers={"ETag": story_etag(version), "Cache-Control": REVALIDATE_CACHE_CONTROL},
+    )
 
 @router.put("/stories/{story_id}", response_model=story_schema.Story)
 def update_story(
     *, 
-    db: Annotated[Session, Depends(deps.get_db)], 
+    db: Annotated[Session, Depends(deps.get_write_db)], 
     story_id: str, # Changed back from int to str
     story_in: story_schema.StoryUpdate, 
+    response: Response,
+    expected_version: Annotated[int, Depends(deps.get_if_match_version)],
+    current_user: Annotated[user_model.User, Depends(deps.get_current_active_user)]
+):
+    story = story_service.update_story(
+        db=db, story_id=story_id, story_update=story_in, user_id=current_user.id, expected_version=expected_version
+    )
+    response.headers["ETag"] = story_etag(story.version)
+    return story
+
+@router.patch("/stories/{story_id}/graph", response_model=story_schema.StoryGraphPatchResult)
+def patch_story_graph(
+    *,
+    db: Annotated[Session, Depends(deps.get_write_db)],
+    story_id: str,
+    graph_patch: story_schema.StoryGraphPatch,
+    response: Response,
+    expected_version: Annotated[int, Depends(deps.get_if_match_version)],
+    current_user: Annotated[user_model.User, Depends(deps.get_current_active_user)]
+):
+    result = story_service.patch_story_graph(
+        db=db, story_id=story_id, graph_patch=graph_patch, user_id=current_user.id, expected_version=expected_version
+    )
+    response.headers["ETag"] = story_etag(result.version)
+    return result
+
+# Graph fragments are sent compact (see story_schema.compact_dump), like graph_json in story responses
+@router.get("/stories/{story_id}/nodes/{node_id}", response_model=story_schema.NodeWithEdges, response_model_exclude_defaults=True)
+def read_story_node(
+    *,
+    db: Annotated[Session, Depends(deps.get_read_db)],
+    story_id: str,
+    node_id: str,
+    current_user: Annotated[user_model.User, Depends(deps.get_current_active_user)]
+):
+    return story_service.get_story_node(db=db, story_id=story_id, node_id=node_id, user_id=current_user.id)
+
+@router.get("/stories/{story_id}/subgraph", response_model=story_schema.StoryGraph, response_model_exclude_defaults=True)
+def read_story_subgraph(
+    *,
+    db: Annotated[Session, Depends(deps.get_read_db)],
+    story_id: str,
+    node_ids: Annotated[List[str], Query(min_length=1, max_length=500)],
     current_user: Annotated[user_model.User, Depends(deps.get_current_active_user)]
 ):
-    return story_service.update_story(db=db, story_id=story_id, story_update=story_in, user_id=current_user.id)
+    return story_service.get_story_subgraph(db=db, story_id=story_id, node_ids=node_ids, user_id=current_user.id)
+
+@router.get("/stories/{story_id}/revisions", response_model=List[story_schema.StoryRevisionSummary])
+def read_story_revisions(
+    *,
+    db: Annotated[Session, Depends(deps.get_read_db)],
+    story_id: str,
+    current_user: Annotated[user_model.User, Depends(deps.get_current_active_user)],
+    limit: Annotated[int, Query(ge=1, le=200)] = 50,
+    before: Optional[int] = None # Last revision of the previous page
+):
+    return revision_service.list_revisions(db=db, story_id=story_id, user_id=current_user.id, limit=limit, before=before)
+
+@router.get("/stories/{story_id}/revisions/diff", response_model=story_schema.StoryRevisionDiff, response_model_exclude_defaults=True)
+def diff_story_revisions(
+    *,
+    db: Annotated[Session, Depends(deps.get_read_db)],
+    story_id: str,
+    from_revision: Annotated[int, Query(alias="from")],
+    to_revision: Annotated[int, Query(alias="to")],
+    current_user: Annotated[user_model.User, Depends(deps.get_current_active_user)]
+):
+    return revision_service.diff_revisions(
+        db=db, story_id=story_id, user_id=current_user.id, from_revision=from_revision, to_revision=to_revision
+    )
+
+@router.post("/stories/{story_id}/revisions/{revision}/restore", response_model=story_schema.Story)
+def restore_story_revision(
+    *,
+    db: Annotated[Session, Depends(deps.get_write_db)],
+    story_id: str,
+    revision: int,
+    response: Response,
+    expected_version: Annotated[int, Depends(deps.get_if_match_version)],
+    current_user: Annotated[user_model.User, Depends(deps.get_current_active_user)]
+):
+    story = story_service.restore_story_revision(
+        db=db, story_id=story_id, revision=revision, user_id=current_user.id, expected_version=expected_version
+    )
+    response.headers["ETag"] = story_etag(story.version)
+    return story
+
+@router.get("/stories/{story_id}/validation", response_model=story_schema.StoryValidationReport, response_model_exclude_none=True)
+def read_story_validation(
+    *,
+    db: Annotated[Session, Depends(deps.get_read_db)],
+    story_id: str,
+    current_user: Annotated[user_model.User, Depends(deps.get_current_active_user)]
+):
+    return story_service.get_story_validation(db=db, story_id=story_id, user_id=current_user.id)
 
 @router.delete("/stories/{story_id}", response_model=story_schema.Story)
 def delete_story(
     *, 
-    db: Annotated[Session, Depends(deps.get_db)], 
+    db: Annotated[Session, Depends(deps.get_write_db)], 
     story_id: str, # Changed back from int to str
     current_user: Annotated[user_model.User, Depends(deps.get_current_active_user)]
 ):
@@ -71,33 +234,90 @@ def delete_story(
 @router.post("/play/{story_id}/proceed", response_model=story_schema.GamePlayResponse)
 async def game_proceed(
     *, 
-    db: Annotated[Session, Depends(deps.get_db)], 
+    db: Annotated[AsyncSession, Depends(deps.get_async_read_db)], 
     story_id: str, # Changed back from int to str
     play_data: story_schema.GamePlayRequest, 
     current_user: Annotated[user_model.User, Depends(deps.get_current_active_user)]
 ):
-    story = story_service.get_story(db=db, story_id=story_id, user_id=current_user.id)
-    if not story:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Story not found")
-    
-    if not story.graph_json:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Story graph is not available.")
+    # The owner plays the draft; other players get the published snapshot
+    story = await snapshot_service.get_playable_story(db=db, story_id=story_id, user_id=current_user.id)
+    return await game_service_instance.process_turn(
+        story_graph=story.graph,
+        play_data=play_data,
+        prerendered_text=publish_service.prerendered_text_resolver(db, story),
+        story=story,
+        user_id=current_user.id,
+    )
 
-    return await game_service_instance.process_turn(story_graph=story.graph_json, play_data=play_data)
+@router.post("/play/snapshots/{snapshot_id}/proceed", response_model=story_schema.GamePlayResponse)
+async def game_proceed_snapshot(
+    *,
+    db: Annotated[AsyncSession, Depends(deps.get_async_read_db)],
+    snapshot_id: str,
+    play_data: story_schema.GamePlayRequest,
+    current_user: Annotated[user_model.User, Depends(deps.get_current_active_user)]
+):
+    story = await snapshot_service.get_compiled_snapshot(db=db, snapshot_id=snapshot_id)
+    return await game_service_instance.process_turn(
+        story_graph=story.graph,
+        play_data=play_data,
+        prerendered_text=publish_service.prerendered_text_resolver(db, story),
+        story=story,
+        user_id=current_user.id,
+    )
+
+@router.get("/stories/{story_id}/published", response_model=story_schema.PublishedStoryRef)
+def read_published_story(
+    *,
+    db: Annotated[Session, Depends(deps.get_read_db)],
+    story_id: str,
+    response: Response,
+    current_user: Annotated[user_model.User, Depends(deps.get_current_active_user)]
+):
+    # The pointer moves on every publish, so it must be revalidated; the snapshot it names never changes
+    response.headers["Cache-Control"] = "no-cache"
+    snapshot_id = snapshot_service.get_published_snapshot_id(db=db, story_id=story_id)
+    return story_schema.PublishedStoryRef(story_id=story_id, snapshot_id=snapshot_id)
+
+@router.get("/snapshots/{snapshot_id}", response_model=story_schema.StorySnapshot)
+async def read_story_snapshot(
+    *,
+    db: Annotated[AsyncSession, Depends(deps.get_async_read_db)],
+    snapshot_id: str,
+    current_user: Annotated[user_model.User, Depends(deps.get_current_active_user)],
+    if_none_match: Annotated[Optional[str], Header()] = None
+):
+    etag = f'"{snapshot_id}"'
+    headers = {"ETag": etag, "Cache-Control": snapshot_service.IMMUTABLE_CACHE_CONTROL}
+    # The ETag is the snapshot id and a snapshot never changes, so a client holding it is answered
+    # without loading or compiling the snapshot, once it is known to still exist (its story may be deleted)
+    if etag_matches(if_none_match, etag):
+        if not await snapshot_service.snapshot_exists(db=db, snapshot_id=snapshot_id):
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Story snapshot not found.")
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    story = await snapshot_service.get_compiled_snapshot(db=db, snapshot_id=snapshot_id)
+    return Response(content=story.payload, media_type="application/json", headers=headers)
+
+@router.post("/stories/{story_id}/publish", response_model=story_schema.PublishResult)
+async def publish_story(
+    *,
+    db: Annotated[AsyncSession, Depends(deps.get_async_write_db)],
+    story_id: str,
+    current_user: Annotated[user_model.User, Depends(deps.get_current_active_user)]
+):
+    return await publish_service.publish_story(db=db, story_id=story_id, user_id=current_user.id)
 
 @router.post("/stories/{story_id}/ai/generate-elements", response_model=story_schema.StoryGraph)
-def generate_ai_elements(
+async def generate_ai_elements(
     *, 
-    db: Annotated[Session, Depends(deps.get_db)],
+    db: Annotated[AsyncSession, Depends(deps.get_async_read_db)],
     story_id: str, # Changed back from int to str
     ai_params: story_schema.AIGenerationRequest, 
     current_user: Annotated[user_model.User, Depends(deps.get_current_active_user)]
 ):
-    story = story_service.get_story(db=db, story_id=story_id, user_id=current_user.id)
-    if not story:
-      raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Story not found")
-
     if not ai_params.current_graph_json:
         raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail="Current story graph is required for AI generation.")
 
-    return story_service.generate_ai_elements(current_graph_json=ai_params.current_graph_json, ai_params=ai_params) 
\ No newline at end of file
+    return await story_service.generate_ai_elements(
+        db=db, story_id=story_id, user_id=current_user.id, ai_params=ai_params
+    ) 
\ No newline at end of file
@@ -0,0 +1,31 @@
+import hashlib
+from typing import Iterable, Optional, Tuple
+
+def story_etag(version: int) -> str:
+    """Strong ETag for a story at a given version."""
+    return f'"v{version}"'
+
+def parse_story_etag(value: Optional[str]) -> Optional[int]:
+    """The version named by an If-Match value such as '"v3"', or None if it names none."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.startswith("W/"): # Weak validators are not valid for If-Match; treat as absent
+        return None
+    value = value.strip('"')
+    if value.startswith("v") and value[1:].isdigit():
+        return int(value[1:])
+    return None
+
+def story_list_etag(rows: Iterable[Tuple[str, int]], next_cursor: Optional[str] = None) -> str:
+    """Strong ETag for a page of stories, from each story's (id, version) in page order."""
+    key = ",".join(f"{story_id}:{version}" for story_id, version in rows) + f"|{next_cursor or ''}"
+    digest = hashlib.sha256(key.encode("utf-8"))
+    return f'"l{digest.hexdigest()[:32]}"'
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match check (weak comparison, so W/ prefixes are ignored; "*" matches anything)."""
+    if not if_none_match:
+        return False
+    candidates = [c.strip() for c in if_none_match.split(",")]
+    return any(c == "*" or c.removeprefix("W/") == etag for c in candidates)
@@ -1,5 +1,9 @@
 # backend/app/crud/__init__.py
 # This will make it easier to import crud instances and their methods
-from .crud_user import crud_user
-from .crud_story import crud_story
+from .crud_user import async_crud_user, crud_user
+from .crud_story import async_crud_story, crud_story
+from .crud_llm_usage import async_crud_llm_usage, crud_llm_usage
+from .crud_prerendered_content import async_crud_prerendered_content, crud_prerendered_content
+from .crud_story_snapshot import async_crud_story_snapshot, crud_story_snapshot
+from .crud_story_revision import crud_story_revision
 # Add crud_file if you implement it (e.g., from .crud_file import crud_file) 
\ No newline at end of file
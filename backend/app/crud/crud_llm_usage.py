@@ -0,0 +1,63 @@
+from typing import Any, Dict, List
+
+from sqlalchemy import Select, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.crud.base import AsyncCRUDBase, CRUDBase
+from app.models.llm_usage import LLMUsage
+from app.models.story import Story
+
+class CRUDLLMUsage(CRUDBase[LLMUsage, Any, Any]):
+    def create_many(self, db: Session, *, rows: List[Dict[str, Any]]) -> None:
+        """Inserts a flush batch in one transaction."""
+        if not rows:
+            return
+        db.add_all([LLMUsage(**row) for row in rows])
+        db.commit()
+
+    def get_rollups_for_owner(
+        self, db: Session, *, owner_id: int, group_by: str
+    ) -> List[Dict[str, Any]]:
+        """
+        Sums usage on stories owned by `owner_id`, grouped by `group_by`
+        ("story", "user" or "prompt_type") and prompt type.
+        """
+        return [dict(row._mapping) for row in db.execute(_rollups_query(owner_id, group_by))]
+
+def _rollups_query(owner_id: int, group_by: str) -> Select:
+    key_column = {
+        "story": LLMUsage.story_id,
+        "user": LLMUsage.user_id,
+        "prompt_type": LLMUsage.prompt_type,
+    }[group_by]
+    return (
+        select(
+            key_column.label("key"),
+            LLMUsage.prompt_type,
+            func.sum(LLMUsage.calls).label("calls"),
+            func.sum(LLMUsage.failures).label("failures"),
+            func.sum(LLMUsage.prompt_tokens).label("prompt_tokens"),
+            func.sum(LLMUsage.completion_tokens).label("completion_tokens"),
+            func.sum(LLMUsage.cacheable_prefix_tokens).label("cacheable_prefix_tokens"),
+            func.sum(LLMUsage.cached_prompt_tokens).label("cached_prompt_tokens"),
+            func.sum(LLMUsage.queue_wait_ms).label("queue_wait_ms"),
+            func.sum(LLMUsage.ttft_ms).label("ttft_ms"),
+            func.sum(LLMUsage.latency_ms).label("latency_ms"),
+            func.max(LLMUsage.latency_ms_max).label("latency_ms_max"),
+        )
+        .join(Story, Story.id == LLMUsage.story_id)
+        .where(Story.user_id == owner_id)
+        .group_by(key_column, LLMUsage.prompt_type)
+    )
+
+crud_llm_usage = CRUDLLMUsage(LLMUsage)
+
+class AsyncCRUDLLMUsage(AsyncCRUDBase[LLMUsage, Any, Any]):
+    async def get_rollups_for_owner(
+        self, db: AsyncSession, *, owner_id: int, group_by: str
+    ) -> List[Dict[str, Any]]:
+        """CRUDLLMUsage.get_rollups_for_owner, awaited."""
+        return [dict(row._mapping) for row in await db.execute(_rollups_query(owner_id, group_by))]
+
+async_crud_llm_usage = AsyncCRUDLLMUsage(LLMUsage)
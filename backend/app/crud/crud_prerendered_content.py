@@ -0,0 +1,93 @@
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.crud.base import AsyncCRUDBase, CRUDBase
+from app.models.prerendered_content import PrerenderedContent
+
+class CRUDPrerenderedContent(CRUDBase[PrerenderedContent, Any, Any]):
+    def get_by_story(self, db: Session, *, story_id: str) -> Dict[Tuple[str, str], PrerenderedContent]:
+        rows = db.query(PrerenderedContent).filter(PrerenderedContent.story_id == story_id).all()
+        return {(row.node_id, row.field): row for row in rows}
+
+    def get_for_node(self, db: Session, *, story_id: str, node_id: str, field: str) -> Optional[PrerenderedContent]:
+        return (
+            db.query(PrerenderedContent)
+            .filter(
+                PrerenderedContent.story_id == story_id,
+                PrerenderedContent.node_id == node_id,
+                PrerenderedContent.field == field,
+            )
+            .first()
+        )
+
+    def apply_changes(
+        self,
+        db: Session,
+        *,
+        story_id: str,
+        upserts: List[Dict[str, Any]],
+        stale: List[PrerenderedContent],
+        existing: Dict[Tuple[str, str], PrerenderedContent],
+    ) -> None:
+        """Writes newly rendered content and drops rows for prompts that no longer exist, in one transaction."""
+        for row in stale:
+            db.delete(row)
+        for item in upserts:
+            row = existing.get((item["node_id"], item["field"]))
+            if row is None:
+                db.add(PrerenderedContent(story_id=story_id, **item))
+            else:
+                row.prompt_hash = item["prompt_hash"]
+                row.content = item["content"]
+        db.commit()
+
+crud_prerendered_content = CRUDPrerenderedContent(PrerenderedContent)
+
+class AsyncCRUDPrerenderedContent(AsyncCRUDBase[PrerenderedContent, Any, Any]):
+    async def get_by_story(self, db: AsyncSession, *, story_id: str) -> Dict[Tuple[str, str], PrerenderedContent]:
+        rows = await db.scalars(select(PrerenderedContent).where(PrerenderedContent.story_id == story_id))
+        return {(row.node_id, row.field): row for row in rows}
+
+    async def get_for_node(
+        self, db: AsyncSession, *, story_id: str, node_id: str, field: str
+    ) -> Optional[PrerenderedContent]:
+        return await db.scalar(
+            select(PrerenderedContent)
+            .where(
+                PrerenderedContent.story_id == story_id,
+                PrerenderedContent.node_id == node_id,
+                PrerenderedContent.field == field,
+            )
+            .limit(1)
+        )
+
+    async def apply_changes(
+        self,
+        db: AsyncSession,
+        *,
+        story_id: str,
+        upserts: List[Dict[str, Any]],
+        stale: List[Tuple[str, str]],
+    ) -> None:
+        """
+        Writes newly rendered content and drops the rows of the `stale` (node_id, field)
+        keys, in one transaction. The story's rows are read again in it, so the
+        caller does not keep a transaction open between its read and this write.
+        """
+        current = await self.get_by_story(db, story_id=story_id)
+        for key in stale:
+            if key in current:
+                await db.delete(current[key])
+        for item in upserts:
+            row = current.get((item["node_id"], item["field"]))
+            if row is None:
+                db.add(PrerenderedContent(story_id=story_id, **item))
+            else:
+                row.prompt_hash = item["prompt_hash"]
+                row.content = item["content"]
+        await db.commit()
+
+async_crud_prerendered_content = AsyncCRUDPrerenderedContent(PrerenderedContent)
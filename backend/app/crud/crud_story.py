@@ -1,18 +1,38 @@
-from typing import List, Optional
-from sqlalchemy.orm import Session
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+from sqlalchemy import Row, insert, inspect, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Query, Session, joinedload, selectinload
 from fastapi.encoders import jsonable_encoder # For updating graph_json
 import uuid # For story ID
 
-from app.crud.base import CRUDBase
-from app.models.story import Story
+from app.crud.base import AsyncCRUDBase, CRUDBase
+from app.models.story import GRAPH_STORAGE_JSON, Story
+from app.models.story_revision import StoryRevision
+from app.models.story_search_document import StorySearchDocument
 from app.schemas.story import StoryCreate, StoryUpdate, StoryInDBBase
 
 class CRUDStory(CRUDBase[Story, StoryInDBBase, StoryUpdate]): # Use StoryInDBBase for creation internally
-    def create_story(self, db: Session, *, story_create: StoryInDBBase) -> Story:
+    def create_story(
+        self,
+        db: Session,
+        *,
+        story_create: StoryInDBBase,
+        graph_storage: str = GRAPH_STORAGE_JSON,
+        first_revision: Optional[StoryRevision] = None,
+        search_documents: Optional[List[Dict[str, Any]]] = None,
+    ) -> Story:
         # ID is already part of story_create (populated in service)
-        # graph_json is also part of story_create
-        db_obj = Story(**story_create.model_dump())
+        # graph_json is also part of story_create; it is stored according to graph_storage
+        story_data = story_create.model_dump()
+        graph_json = story_data.pop("graph_json")
+        db_obj = Story(**story_data, graph_storage=graph_storage)
+        db_obj.graph_json = graph_json
+        if first_revision is not None:
+            db_obj.revisions.append(first_revision)
         db.add(db_obj)
+        if search_documents:
+            self._insert_search_documents(db, search_documents)
         db.commit()
         db.refresh(db_obj)
         return db_obj
@@ -23,28 +43,141 @@ class CRUDStory(CRUDBase[Story, StoryInDBBase, StoryUpdate]): # Use StoryInDBBas
     def get_story_by_id_and_owner(
         self, db: Session, *, story_id: str, owner_id: int
     ) -> Optional[Story]:
+        # Every caller reads the graph and most build a response with author_username:
+        # load both with the story in one query instead of two lazy loads
         return (
             db.query(self.model)
+            .options(joinedload(Story.author), joinedload(Story.graph))
             .filter(self.model.id == story_id, self.model.user_id == owner_id)
             .first()
         )
 
-    def get_stories_by_user(self, db: Session, *, user_id: int, skip: int = 0, limit: int = 100) -> List[Story]:
-        return (
-            db.query(Story)
-            .filter(Story.user_id == user_id)
-            .order_by(Story.updated_at.desc()) # Example: order by last updated
-            .offset(skip)
-            .limit(limit)
-            .all()
-        )
+    def _user_page(self, query: Query, *, user_id: int, limit: int, after: Optional[Tuple[datetime, str]]) -> Query:
+        """
+        Keyset page of a user's stories, newest first, on (user_id, updated_at, id)
+        (index ix_stories_user_updated_id). `after` is the (updated_at, id) of the
+        previous page's last story; the cost of a page does not depend on its depth.
+        """
+        query = query.filter(Story.user_id == user_id)
+        if after is not None:
+            # The cursor's own values: the story it came from may have been saved (moved
+            # to the top) since, which must not move this page's position
+            after_updated_at, after_id = after
+            query = query.filter(tuple_(Story.updated_at, Story.id) < tuple_(after_updated_at, after_id))
+        return query.order_by(Story.updated_at.desc(), Story.id.desc()).limit(limit)
+
+    def get_stories_by_user(
+        self, db: Session, *, user_id: int, limit: int = 100, after: Optional[Tuple[datetime, str]] = None
+    ) -> List[Story]:
+        # Authors are joined in the same query; lazy loading them was one query per story (N+1)
+        query = db.query(Story).options(joinedload(Story.author))
+        return self._user_page(query, user_id=user_id, limit=limit, after=after).all()
+
+    def get_version_by_id_and_owner(self, db: Session, *, story_id: str, owner_id: int) -> Optional[int]:
+        """Metadata-only: does not load graph_json."""
+        row = db.query(Story.version).filter(Story.id == story_id, Story.user_id == owner_id).first()
+        return row[0] if row else None
+
+    def get_graph_storage_by_id_and_owner(self, db: Session, *, story_id: str, owner_id: int) -> Optional[str]:
+        """Metadata-only: how the story's graph is stored, or None if not found."""
+        row = db.query(Story.graph_storage).filter(Story.id == story_id, Story.user_id == owner_id).first()
+        return row[0] if row else None
+
+    def get_story_versions_by_user(
+        self, db: Session, *, user_id: int, limit: int = 100, after: Optional[Tuple[datetime, str]] = None
+    ) -> List[Row]:
+        """(id, version, updated_at) rows of the same page get_stories_by_user returns, without loading graphs."""
+        query = db.query(Story.id, Story.version, Story.updated_at)
+        return self._user_page(query, user_id=user_id, limit=limit, after=after).all()
+
+    def get_story_ids_by_user(self, db: Session, *, user_id: int) -> List[str]:
+        return [story_id for (story_id,) in db.query(Story.id).filter(Story.user_id == user_id).all()]
 
     def update_story(
         self, db: Session, *, db_obj: Story, obj_in: StoryUpdate
     ) -> Story:
-        # If obj_in contains graph_json, it will be updated by CRUDBase.update
-        # CRUDBase.update handles partial updates using exclude_unset=True for Pydantic models
-        return super().update(db, db_obj=db_obj, obj_in=obj_in)
+        # Sets only the fields sent (exclude_unset), without CRUDBase.update's
+        # jsonable_encoder pass over the stored row and its loaded graph.
+        # graph_json is written through Story.graph_json to the story_graphs row.
+        for field, value in obj_in.model_dump(exclude_unset=True).items():
+            setattr(db_obj, field, value)
+        db.add(db_obj)
+        db.commit()
+        db.refresh(db_obj)
+        return db_obj
+
+    def claim_version(self, db: Session, *, story_id: str, expected_version: int) -> bool:
+        """
+        Compare-and-swap on the version column, in the caller's transaction: bumps the
+        version only if it is still `expected_version`. False means another write won;
+        the caller must roll back.
+        """
+        claimed = (
+            db.query(Story)
+            .filter(Story.id == story_id, Story.version == expected_version)
+            .update({Story.version: Story.version + 1}, synchronize_session=False)
+        )
+        return claimed == 1
+
+    def get_version(self, db: Session, *, story_id: str) -> Optional[int]:
+        row = db.query(Story.version).filter(Story.id == story_id).first()
+        return row[0] if row else None
+
+    def save(self, db: Session, *, db_obj: Story) -> Story:
+        """Commits changes already made to the story and its graph (e.g. by graph_store.apply_graph_ops)."""
+        db.add(db_obj)
+        db.commit()
+        db.refresh(db_obj)
+        return db_obj
+
+    def get_export_batch(
+        self, db: Session, *, user_id: Optional[int], after_id: Optional[str], limit: int
+    ) -> List[Story]:
+        """
+        Up to `limit` stories (of one user, or all) after `after_id` in id order, with
+        their authors and graphs, in three queries whatever the storage modes.
+        """
+        query = db.query(Story).options(
+            joinedload(Story.author),
+            joinedload(Story.graph),
+            selectinload(Story.node_rows),
+            selectinload(Story.edge_rows),
+        )
+        if user_id is not None:
+            query = query.filter(Story.user_id == user_id)
+        if after_id is not None:
+            query = query.filter(Story.id > after_id)
+        return query.order_by(Story.id).limit(limit).all()
+
+    def get_existing_ids(self, db: Session, *, story_ids: List[str]) -> List[str]:
+        return [story_id for (story_id,) in db.query(Story.id).filter(Story.id.in_(story_ids)).all()]
+
+    def insert_stories(self, db: Session, *, stories: List[Dict[str, Any]], graph_storage: str) -> None:
+        """
+        Adds stories in one transaction: each dict holds column values, graph_json
+        (as stored), first_revision and search_documents, like create_story's arguments.
+        """
+        search_documents: List[Dict[str, Any]] = []
+        for data in stories:
+            data = dict(data)
+            graph_json, first_revision = data.pop("graph_json"), data.pop("first_revision")
+            search_documents.extend(data.pop("search_documents"))
+            db_obj = Story(**data, graph_storage=graph_storage)
+            db_obj.graph_json = graph_json
+            db_obj.revisions.append(first_revision)
+            db.add(db_obj)
+        if search_documents:
+            self._insert_search_documents(db, search_documents)
+        db.commit()
+
+    def _insert_search_documents(self, db: Session, rows: List[Dict[str, Any]]) -> None:
+        """
+        Inserts story_search_documents rows (app.services.story_search) in one
+        executemany, after the stories they belong to. Added as ORM objects, they
+        would be inserted one statement per row.
+        """
+        db.flush()
+        db.execute(insert(StorySearchDocument.__table__), rows)
 
     def remove_story(self, db: Session, *, story_id: str) -> Optional[Story]:
         # CRUDBase.remove expects integer ID by default if model.id is int.
@@ -55,4 +188,42 @@ class CRUDStory(CRUDBase[Story, StoryInDBBase, StoryUpdate]): # Use StoryInDBBas
             db.commit()
         return obj # Returns the deleted object or None if not found
 
-crud_story = CRUDStory(Story) 
\ No newline at end of file
+crud_story = CRUDStory(Story)
+
+class AsyncCRUDStory(AsyncCRUDBase[Story, StoryInDBBase, StoryUpdate]):
+    async def get_story(self, db: AsyncSession, story_id: str) -> Optional[Story]:
+        """The story row only; call load_graph before reading graph_json."""
+        return await db.get(Story, story_id)
+
+    async def get_version_by_id_and_owner(self, db: AsyncSession, *, story_id: str, owner_id: int) -> Optional[int]:
+        """Metadata-only: does not load graph_json."""
+        return await db.scalar(select(Story.version).where(Story.id == story_id, Story.user_id == owner_id))
+
+    async def get_story_ids_by_user(self, db: AsyncSession, *, user_id: int) -> List[str]:
+        return list(await db.scalars(select(Story.id).where(Story.user_id == user_id)))
+
+    async def load_graph(self, db: AsyncSession, story: Story) -> Story:
+        """
+        Loads what Story.graph_json reads for the story's storage mode: an
+        AsyncSession cannot lazy load it on first access like a Session does.
+        """
+        attribute_names = ["node_rows", "edge_rows"] if story.is_normalized else ["graph"]
+        unloaded = inspect(story).unloaded
+        if any(name in unloaded for name in attribute_names):
+            await db.refresh(story, attribute_names)
+        return story
+
+    async def get_story_by_id_and_owner(
+        self, db: AsyncSession, *, story_id: str, owner_id: int
+    ) -> Optional[Story]:
+        """The story with its graph loaded (in the same query for JSON-stored graphs)."""
+        story = await db.scalar(
+            select(Story)
+            .options(joinedload(Story.graph))
+            .where(Story.id == story_id, Story.user_id == owner_id)
+        )
+        if story is not None:
+            await self.load_graph(db, story)
+        return story
+
+async_crud_story = AsyncCRUDStory(Story)
@@ -0,0 +1,47 @@
+from typing import Any, List, Optional
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session, defer
+
+from app.crud.base import CRUDBase
+from app.models.story_revision import REVISION_KEYFRAME, StoryRevision
+
+class CRUDStoryRevision(CRUDBase[StoryRevision, Any, Any]):
+    def get_latest(self, db: Session, *, story_id: str) -> Optional[StoryRevision]:
+        return (
+            db.query(StoryRevision)
+            .filter(StoryRevision.story_id == story_id)
+            .order_by(StoryRevision.revision.desc())
+            .first()
+        )
+
+    def get_chain(self, db: Session, *, story_id: str, revision: int) -> List[StoryRevision]:
+        """The latest keyframe at or before `revision`, then every delta up to `revision`, in order."""
+        keyframe = (
+            db.query(func.max(StoryRevision.revision))
+            .filter(
+                StoryRevision.story_id == story_id,
+                StoryRevision.kind == REVISION_KEYFRAME,
+                StoryRevision.revision <= revision,
+            )
+            .scalar_subquery()
+        )
+        return (
+            db.query(StoryRevision)
+            .filter(
+                StoryRevision.story_id == story_id,
+                StoryRevision.revision >= keyframe,
+                StoryRevision.revision <= revision,
+            )
+            .order_by(StoryRevision.revision)
+            .all()
+        )
+
+    def get_page(self, db: Session, *, story_id: str, limit: int, before: Optional[int] = None) -> List[StoryRevision]:
+        """Newest first; `before` is the last revision number of the previous page. Payloads are not loaded."""
+        query = db.query(StoryRevision).options(defer(StoryRevision.payload)).filter(StoryRevision.story_id == story_id)
+        if before is not None:
+            query = query.filter(StoryRevision.revision < before)
+        return query.order_by(StoryRevision.revision.desc()).limit(limit).all()
+
+crud_story_revision = CRUDStoryRevision(StoryRevision)
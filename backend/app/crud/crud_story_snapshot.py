@@ -0,0 +1,49 @@
+from typing import Any, Dict, Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import func
+
+from app.crud.base import AsyncCRUDBase, CRUDBase
+from app.models.story import Story
+from app.models.story_snapshot import StorySnapshot
+
+class CRUDStorySnapshot(CRUDBase[StorySnapshot, Any, Any]):
+    def get_snapshot(self, db: Session, snapshot_id: str) -> Optional[StorySnapshot]:
+        return db.query(StorySnapshot).filter(StorySnapshot.id == snapshot_id).first()
+
+    def publish(self, db: Session, *, story: Story, snapshot_id: str, content: Dict[str, Any]) -> StorySnapshot:
+        """Stores the snapshot unless identical content was published before, then points the story at it."""
+        snapshot = self.get_snapshot(db, snapshot_id)
+        if snapshot is None:
+            snapshot = StorySnapshot(id=snapshot_id, story_id=story.id, **content)
+            db.add(snapshot)
+        story.published_snapshot_id = snapshot_id
+        story.published_at = func.now()
+        db.commit()
+        db.refresh(snapshot)
+        return snapshot
+
+crud_story_snapshot = CRUDStorySnapshot(StorySnapshot)
+
+class AsyncCRUDStorySnapshot(AsyncCRUDBase[StorySnapshot, Any, Any]):
+    async def get_snapshot(self, db: AsyncSession, snapshot_id: str) -> Optional[StorySnapshot]:
+        return await db.get(StorySnapshot, snapshot_id)
+
+    async def exists(self, db: AsyncSession, snapshot_id: str) -> bool:
+        return await db.scalar(select(StorySnapshot.id).where(StorySnapshot.id == snapshot_id)) is not None
+
+    async def publish(self, db: AsyncSession, *, story: Story, snapshot_id: str, content: Dict[str, Any]) -> StorySnapshot:
+        """Stores the snapshot unless identical content was published before, then points the story at it."""
+        snapshot = await self.get_snapshot(db, snapshot_id)
+        if snapshot is None:
+            snapshot = StorySnapshot(id=snapshot_id, story_id=story.id, **content)
+            db.add(snapshot)
+        story.published_snapshot_id = snapshot_id
+        story.published_at = func.now()
+        await db.commit()
+        await db.refresh(snapshot)
+        return snapshot
+
+async_crud_story_snapshot = AsyncCRUDStorySnapshot(StorySnapshot)
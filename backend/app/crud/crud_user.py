@@ -1,9 +1,11 @@
 from typing import Optional
 
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from app.core.security import get_password_hash, verify_password
-from app.crud.base import CRUDBase
+from app.crud.base import AsyncCRUDBase, CRUDBase
 from app.models.user import User
 from app.schemas.user import UserCreate, UserUpdate
 
@@ -36,4 +38,34 @@ class CRUDUser(CRUDBase[User, UserCreate, UserUpdate]):
             return None
         return user
 
-crud_user = CRUDUser(User) 
\ No newline at end of file
+crud_user = CRUDUser(User)
+
+class AsyncCRUDUser(AsyncCRUDBase[User, UserCreate, UserUpdate]):
+    async def get_user_by_email(self, db: AsyncSession, *, email: str) -> Optional[User]:
+        return await db.scalar(select(User).where(User.email == email).limit(1))
+
+    async def get_user_by_username(self, db: AsyncSession, *, username: str) -> Optional[User]:
+        return await db.scalar(select(User).where(User.username == username).limit(1))
+
+    async def create(self, db: AsyncSession, *, obj_in: UserCreate) -> User:
+        db_obj = User(
+            email=obj_in.email,
+            username=obj_in.username,
+            hashed_password=get_password_hash(obj_in.password),
+        )
+        db.add(db_obj)
+        await db.commit()
+        await db.refresh(db_obj)
+        return db_obj
+
+    async def authenticate_user(
+        self, db: AsyncSession, *, email: str, password: str
+    ) -> Optional[User]:
+        user = await self.get_user_by_email(db, email=email)
+        if not user:
+            return None
+        if not verify_password(password, user.hashed_password):
+            return None
+        return user
+
+async_crud_user = AsyncCRUDUser(User)
@@ -0,0 +1,98 @@
+"""
+Compact binary storage format for story graphs (story_graphs.graph_json).
+
+Encoded documents are FORMAT_MARKER + codec version byte + zlib-compressed
+msgpack, with the graph's well-known keys interned as small integers. Rows
+written before the codec existed hold JSON text; they are decoded transparently
+and rewritten by the background re-encoder (app.services.graph_reencoder).
+"""
+import json
+import time
+import zlib
+from dataclasses import dataclass
+from typing import Any, Dict, List, Tuple
+
+import msgpack
+from sqlalchemy.types import LargeBinary, TypeDecorator
+
+# JSON text never starts with a NUL byte, so this tells the two formats apart
+FORMAT_MARKER = b"\x00"
+CODEC_VERSION = 1
+ZLIB_LEVEL = 6
+
+# Interned keys of codec version 1. Append-only: a key's position is its stored id.
+_KEYS: Tuple[str, ...] = (
+    "nodes", "edges", "id", "type", "data", "position", "x", "y",
+    "label", "text_content", "characterName", "imageUrl", "initial_stats", "inputPrompt",
+    "llm_processing_prompt", "ending_type", "ending_message_prompt",
+    "source", "target", "markerEnd", "stat_effects",
+)
+_KEY_IDS: Dict[str, int] = {key: i for i, key in enumerate(_KEYS)}
+
+def _intern(value: Any) -> Any:
+    if isinstance(value, dict):
+        return {_KEY_IDS.get(k, k): _intern(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_intern(v) for v in value]
+    return value
+
+def _restored_map(pairs: List[Tuple[Any, Any]]) -> Dict[str, Any]:
+    # Graph JSON only has string keys, so any integer key is an interned one
+    return {(_KEYS[k] if type(k) is int else k): v for k, v in pairs}
+
+def encode_graph(graph: Dict[str, Any]) -> bytes:
+    packed = msgpack.packb(_intern(graph), use_bin_type=True)
+    return FORMAT_MARKER + bytes([CODEC_VERSION]) + zlib.compress(packed, ZLIB_LEVEL)
+
+def is_legacy(data: bytes) -> bool:
+    """True for JSON text stored before the codec existed."""
+    return bytes(data[:1]) != FORMAT_MARKER
+
+def decode_graph(data: Any) -> Dict[str, Any]:
+    if isinstance(data, str):
+        return json.loads(data)
+    data = bytes(data)
+    if is_legacy(data):
+        return json.loads(data)
+    if data[1] != CODEC_VERSION:
+        raise ValueError(f"Unknown graph codec version {data[1]}")
+    return msgpack.unpackb(
+        zlib.decompress(data[2:]), raw=False, strict_map_key=False, object_pairs_hook=_restored_map
+    )
+
+@dataclass
+class CodecMeasurement:
+    json_bytes: int
+    encoded_bytes: int
+    encode_ms: float
+    decode_ms: float
+
+    @property
+    def saved_bytes(self) -> int:
+        return self.json_bytes - self.encoded_bytes
+
+def measure(graph: Dict[str, Any]) -> Tuple[bytes, CodecMeasurement]:
+    """Encodes `graph`, measuring size and encode/decode time against its compact JSON text."""
+    json_bytes = len(json.dumps(graph, separators=(",", ":"), ensure_ascii=False).encode("utf-8"))
+    started = time.perf_counter()
+    encoded = encode_graph(graph)
+    encoded_at = time.perf_counter()
+    decode_graph(encoded)
+    decoded_at = time.perf_counter()
+    return encoded, CodecMeasurement(
+        json_bytes=json_bytes,
+        encoded_bytes=len(encoded),
+        encode_ms=(encoded_at - started) * 1000,
+        decode_ms=(decoded_at - encoded_at) * 1000,
+    )
+
+class GraphDocument(TypeDecorator):
+    """A graph dict stored with encode_graph; reads legacy JSON rows as well."""
+    impl = LargeBinary
+    cache_ok = True
+
+    def process_bind_param(self, value: Any, dialect: Any) -> Any:
+        return encode_graph(value) if value is not None else None
+
+    def process_result_value(self, value: Any, dialect: Any) -> Any:
+        return decode_graph(value) if value is not None else None
@@ -0,0 +1,85 @@
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.llm.stats import percentile
+
+class PoolMetrics:
+    """
+    Connection pool counters of one engine, from its pool events: connections
+    opened and invalidated, checkouts, and how long checked-out connections are
+    held (recent samples). A pool that is often fully checked out with long
+    hold times needs more connections, or shorter transactions.
+    """
+    def __init__(self, name: str, engine: Engine, sample_size: int = 1000):
+        self.name = name
+        self.engine = engine
+        self._lock = threading.Lock()
+        self.connects = 0
+        self.checkouts = 0
+        self.checkins = 0
+        self.invalidations = 0
+        self.peak_checked_out = 0
+        self._checked_out = 0
+        self.hold_total = 0.0
+        self.hold_max = 0.0
+        self.recent_holds: Deque[float] = deque(maxlen=sample_size)
+        event.listen(engine, "connect", self._on_connect)
+        event.listen(engine, "checkout", self._on_checkout)
+        event.listen(engine, "checkin", self._on_checkin)
+        event.listen(engine, "invalidate", self._on_invalidate)
+
+    def _on_connect(self, dbapi_connection: Any, connection_record: Any) -> None:
+        with self._lock:
+            self.connects += 1
+
+    def _on_checkout(self, dbapi_connection: Any, connection_record: Any, connection_proxy: Any) -> None:
+        connection_record.info["checked_out_at"] = time.perf_counter()
+        with self._lock:
+            self.checkouts += 1
+            self._checked_out += 1
+            self.peak_checked_out = max(self.peak_checked_out, self._checked_out)
+
+    def _on_checkin(self, dbapi_connection: Any, connection_record: Any) -> None:
+        checked_out_at = connection_record.info.pop("checked_out_at", None)
+        if checked_out_at is None:
+            return # Invalidated while checked out (counted there)
+        held = time.perf_counter() - checked_out_at
+        with self._lock:
+            self._checked_out -= 1
+            self.checkins += 1
+            self.hold_total += held
+            self.hold_max = max(self.hold_max, held)
+            self.recent_holds.append(held)
+
+    def _on_invalidate(self, dbapi_connection: Any, connection_record: Any, exception: Any) -> None:
+        # The record's info is cleared with the connection: stop tracking its checkout here
+        was_checked_out = connection_record.info.pop("checked_out_at", None) is not None
+        with self._lock:
+            self.invalidations += 1
+            if was_checked_out:
+                self._checked_out -= 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        pool = self.engine.pool
+        with self._lock:
+            return {
+                "name": self.name,
+                "pool": type(pool).__name__,
+                # QueuePool sizing; None for pools without a fixed size (e.g. SQLite :memory:)
+                "size": pool.size() if hasattr(pool, "size") else None,
+                "max_overflow": getattr(pool, "_max_overflow", None),
+                "checked_out": pool.checkedout() if hasattr(pool, "checkedout") else self._checked_out,
+                "peak_checked_out": self.peak_checked_out,
+                "connects": self.connects,
+                "checkouts": self.checkouts,
+                "invalidations": self.invalidations,
+                "hold_ms_avg": (self.hold_total / self.checkins * 1000) if self.checkins else 0.0,
+                "hold_ms_p50": percentile(self.recent_holds, 50) * 1000,
+                "hold_ms_p95": percentile(self.recent_holds, 95) * 1000,
+                "hold_ms_max": self.hold_max * 1000,
+            }
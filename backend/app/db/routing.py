@@ -0,0 +1,141 @@
+"""
+Read/write routing between the primary database and its read replicas
+(SQLALCHEMY_REPLICA_URLS). Writes always use the primary. Read-only requests
+get a replica session, round-robin, unless the client wrote within
+DB_READ_YOUR_WRITES_SECONDS: replicas may not have that write yet, so the
+client's reads stay on the primary until the window has passed.
+
+A write is a commit of a session a write route marked with mark_writer
+(deps.get_write_db / get_async_write_db). The commit sets a short-lived cookie
+on the route's response holding when the window ends (epoch seconds), and read
+routes route on the cookie the client sends back. The window travels with the
+client, so it holds whichever worker or instance serves the next read.
+"""
+import itertools
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, TypeVar
+
+from fastapi import Response
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.session import AsyncReplicaSessionLocals, AsyncSessionLocal, ReplicaSessionLocals, SessionLocal
+
+# Cookie holding when the client's last write stops keeping its reads on the primary
+READ_YOUR_WRITES_COOKIE = "read_primary_until"
+# Session.info key of the response a write session's commits set the cookie on
+WRITER_RESPONSE_KEY = "writer_response"
+# Clock difference tolerated between the instance that set the cookie and the one reading it
+CLOCK_SKEW_SECONDS = 1.0
+
+SessionType = TypeVar("SessionType")
+
+def parse_primary_until(value: Optional[str]) -> Optional[float]:
+    """The deadline of a read-your-writes cookie, or None if it is missing or malformed."""
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        return None
+
+class ReadRouter:
+    """Picks the database of each read session from the client's last-write deadline."""
+
+    def __init__(
+        self,
+        primary: Callable[[], Session],
+        replicas: List[Callable[[], Session]],
+        async_primary: Callable[[], AsyncSession],
+        async_replicas: List[Callable[[], AsyncSession]],
+        sticky_seconds: float,
+    ):
+        self.primary = primary
+        self.replicas = replicas
+        self.async_primary = async_primary
+        self.async_replicas = async_replicas
+        self.sticky_seconds = sticky_seconds
+        self._lock = threading.Lock()
+        self._turn = itertools.count()
+        self.primary_reads = 0
+        self.replica_reads = 0
+        self.sticky_reads = 0
+
+    def write_deadline(self) -> float:
+        """Until when reads must see the primary after a write committed now (epoch seconds)."""
+        return time.time() + self.sticky_seconds
+
+    def reads_primary(self, primary_until: Optional[float]) -> bool:
+        """
+        Whether a client whose last write keeps its reads on the primary until
+        `primary_until` must read the primary now. Deadlines further out than one
+        window (a tampered cookie) are ignored, so a client cannot pin its reads there.
+        """
+        if primary_until is None:
+            return False
+        now = time.time()
+        return now < primary_until <= now + self.sticky_seconds + CLOCK_SKEW_SECONDS
+
+    def _pick(self, primary_until: Optional[float], primary: Callable[[], SessionType], replicas: List[Callable[[], SessionType]]) -> SessionType:
+        if not replicas:
+            with self._lock:
+                self.primary_reads += 1
+            return primary()
+        if self.reads_primary(primary_until):
+            with self._lock:
+                self.primary_reads += 1
+                self.sticky_reads += 1
+            return primary()
+        with self._lock:
+            self.replica_reads += 1
+            return replicas[next(self._turn) % len(replicas)]()
+
+    def read_session(self, primary_until: Optional[float]) -> Session:
+        return self._pick(primary_until, self.primary, self.replicas)
+
+    def async_read_session(self, primary_until: Optional[float]) -> AsyncSession:
+        return self._pick(primary_until, self.async_primary, self.async_replicas)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "replicas": len(self.replicas),
+                "primary_reads": self.primary_reads,
+                "replica_reads": self.replica_reads,
+                "sticky_reads": self.sticky_reads,
+            }
+
+read_router = ReadRouter(
+    primary=SessionLocal,
+    replicas=ReplicaSessionLocals,
+    async_primary=AsyncSessionLocal,
+    async_replicas=AsyncReplicaSessionLocals,
+    sticky_seconds=settings.DB_READ_YOUR_WRITES_SECONDS,
+)
+
+def mark_writer(db: Any, response: Response) -> None:
+    """Commits of `db` (a Session or AsyncSession) from now on keep the client's reads on the primary."""
+    db.info[WRITER_RESPONSE_KEY] = response
+
+@event.listens_for(Session, "after_commit")
+def _record_write(session: Session) -> None:
+    # AsyncSession.info is its sync session's info, so this covers both. The cookie
+    # reaches the client with the route's response (routes commit before returning).
+    response = session.info.get(WRITER_RESPONSE_KEY)
+    if response is None or not read_router.replicas:
+        return
+    # A route may commit more than once (e.g. import batches): the last commit's deadline replaces earlier ones
+    prefix = f"{READ_YOUR_WRITES_COOKIE}=".encode()
+    response.raw_headers[:] = [
+        (name, value) for name, value in response.raw_headers if not (name == b"set-cookie" and value.startswith(prefix))
+    ]
+    response.set_cookie(
+        READ_YOUR_WRITES_COOKIE,
+        f"{read_router.write_deadline():.3f}",
+        max_age=max(1, round(read_router.sticky_seconds)),
+        httponly=True,
+        samesite="lax",
+    )
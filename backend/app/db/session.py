@@ -1,23 +1,109 @@
-from sqlalchemy import create_engine
+from typing import Any, AsyncIterator, Dict
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, Session
 
 from app.core.config import settings
+from app.db.pool_metrics import PoolMetrics
 
-engine = create_engine(
-    settings.SQLALCHEMY_DATABASE_URL,
-    # connect_args={"check_same_thread": False} # Needed only for SQLite
-)
-if "sqlite" in settings.SQLALCHEMY_DATABASE_URL:
-    engine = create_engine(
-        settings.SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
-    )
+# Async drivers of the databases SQLALCHEMY_DATABASE_URL can name
+ASYNC_DRIVERS = {"sqlite": "aiosqlite", "postgresql": "asyncpg"}
+
+def async_database_url(url: str) -> str:
+    """The same database as `url`, through its async driver (sqlite -> aiosqlite, postgresql -> asyncpg)."""
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"No async driver configured for {backend} databases")
+    return parsed.set(drivername=f"{backend}+{ASYNC_DRIVERS[backend]}").render_as_string(hide_password=False)
+
+def engine_options(url: str) -> Dict[str, Any]:
+    """create_engine arguments of the engine profile for `url`'s database (DB_* settings)."""
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if backend == "sqlite":
+        # Sessions are used from FastAPI's threadpool, not only the thread that opened the connection
+        return {"connect_args": {"check_same_thread": False}} if parsed.get_driver_name() == "pysqlite" else {}
+    options: Dict[str, Any] = {
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT_SECONDS,
+        "pool_recycle": settings.DB_POOL_RECYCLE_SECONDS,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+    if backend == "postgresql" and settings.DB_STATEMENT_TIMEOUT_MS:
+        # A connection parameter rather than a SET on connect, which a rolled back first transaction would undo
+        timeout = str(settings.DB_STATEMENT_TIMEOUT_MS)
+        if parsed.get_driver_name() == "asyncpg":
+            options["connect_args"] = {"server_settings": {"statement_timeout": timeout}}
+        else:
+            options["connect_args"] = {"options": f"-c statement_timeout={timeout}"}
+    return options
+
+def _set_sqlite_pragmas(dbapi_connection: Any, connection_record: Any) -> None:
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute(f"PRAGMA journal_mode={settings.DB_SQLITE_JOURNAL_MODE}")
+        cursor.execute(f"PRAGMA synchronous={settings.DB_SQLITE_SYNCHRONOUS}")
+        cursor.execute(f"PRAGMA mmap_size={int(settings.DB_SQLITE_MMAP_SIZE_BYTES)}")
+        cursor.execute(f"PRAGMA cache_size=-{int(settings.DB_SQLITE_CACHE_SIZE_KIB)}") # Negative: in KiB
+        cursor.execute(f"PRAGMA busy_timeout={int(settings.DB_SQLITE_BUSY_TIMEOUT_MS)}")
+    finally:
+        cursor.close()
 
+def configure_engine(engine: Engine) -> Engine:
+    """Applies the per-connection part of the engine profile (a sync Engine, or an AsyncEngine's sync_engine)."""
+    if engine.dialect.name == "sqlite":
+        event.listen(engine, "connect", _set_sqlite_pragmas)
+    return engine
+
+engine = configure_engine(
+    create_engine(settings.SQLALCHEMY_DATABASE_URL, **engine_options(settings.SQLALCHEMY_DATABASE_URL))
+)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# For async routes and services: the sync session blocks the event loop on every query.
+# Objects stay usable after commit (expire_on_commit=False): an expired attribute
+# would need a lazy load, which an AsyncSession cannot do implicitly.
+_async_url = async_database_url(settings.SQLALCHEMY_DATABASE_URL)
+async_engine = create_async_engine(_async_url, **engine_options(_async_url))
+configure_engine(async_engine.sync_engine)
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+# Read replicas (SQLALCHEMY_REPLICA_URLS), with the same engine profiles; app.db.routing picks one per request
+replica_engines = [
+    configure_engine(create_engine(url, **engine_options(url))) for url in settings.SQLALCHEMY_REPLICA_URLS
+]
+ReplicaSessionLocals = [
+    sessionmaker(autocommit=False, autoflush=False, bind=replica_engine) for replica_engine in replica_engines
+]
+async_replica_engines = [
+    create_async_engine(async_database_url(url), **engine_options(async_database_url(url)))
+    for url in settings.SQLALCHEMY_REPLICA_URLS
+]
+for _async_replica_engine in async_replica_engines:
+    configure_engine(_async_replica_engine.sync_engine)
+AsyncReplicaSessionLocals = [
+    async_sessionmaker(replica_engine, autoflush=False, expire_on_commit=False)
+    for replica_engine in async_replica_engines
+]
+
+# Pool checkout counters of every engine (GET /api/db/metrics)
+pool_metrics = [PoolMetrics("sync", engine), PoolMetrics("async", async_engine.sync_engine)]
+for _index, (_replica_engine, _async_replica_engine) in enumerate(zip(replica_engines, async_replica_engines)):
+    pool_metrics.append(PoolMetrics(f"replica{_index} sync", _replica_engine))
+    pool_metrics.append(PoolMetrics(f"replica{_index} async", _async_replica_engine.sync_engine))
+
 # Dependency to get DB session
 def get_db() -> Session:
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close() 
\ No newline at end of file
+        db.close()
+
+async def get_async_db() -> AsyncIterator[AsyncSession]:
+    async with AsyncSessionLocal() as db:
+        yield db
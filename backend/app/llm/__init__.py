@@ -0,0 +1,6 @@
+# backend/app/llm/__init__.py
+# LLM infrastructure: work scheduling, backend hedging/failover and the client used by the services layer.
+from .errors import LLMError, LLMOverloadedError, LLMUnavailableError
+from .scheduler import LLMPriority, llm_scheduler
+from .accounting import llm_usage_accountant
+from .client import llm_client
@@ -0,0 +1,197 @@
+import asyncio
+import threading
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+from app.models.llm_usage import PromptType
+
+UsageKey = Tuple[Optional[str], Optional[int], PromptType] # (story_id, user_id, prompt_type)
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count for backends that do not report usage (~4 chars per token)."""
+    return max(1, len(text) // 4) if text else 0
+
+class _UsageBucket:
+    __slots__ = ("calls", "failures", "prompt_tokens", "completion_tokens",
+                 "cacheable_prefix_tokens", "cached_prompt_tokens",
+                 "queue_wait_ms", "ttft_ms", "latency_ms", "latency_ms_max")
+
+    def __init__(self):
+        self.calls = 0
+        self.failures = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.cacheable_prefix_tokens = 0
+        self.cached_prompt_tokens = 0
+        self.queue_wait_ms = 0.0
+        self.ttft_ms = 0.0
+        self.latency_ms = 0.0
+        self.latency_ms_max = 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def merge(self, other: "_UsageBucket") -> None:
+        for name in self.__slots__:
+            if name != "latency_ms_max":
+                setattr(self, name, getattr(self, name) + getattr(other, name))
+        self.latency_ms_max = max(self.latency_ms_max, other.latency_ms_max)
+
+class LLMUsageAccountant:
+    """
+    Aggregates per-call LLM usage in memory by (story, user, prompt type) and
+    writes one row per key to `llm_usage` every LLM_USAGE_FLUSH_SECONDS, or
+    sooner once LLM_USAGE_FLUSH_BATCH calls are pending.
+    Recording is a dict update under a lock, so it is cheap on the request path.
+    A batch that fails to write is merged back and retried with the next flush;
+    after max_retries failed flushes in a row, the pending usage is dropped.
+    """
+    def __init__(self, flush_seconds: float, flush_batch: int, max_retries: int):
+        self.flush_seconds = flush_seconds
+        self.flush_batch = flush_batch
+        self.max_retries = max_retries
+        self._failed_flushes = 0 # In a row
+        self._lock = threading.Lock()
+        self._buckets: Dict[UsageKey, _UsageBucket] = {}
+        self._pending_calls = 0
+        self._window_start = datetime.now(timezone.utc)
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def record(
+        self,
+        *,
+        story_id: Optional[str],
+        user_id: Optional[int],
+        prompt_type: PromptType,
+        prompt_tokens: int,
+        completion_tokens: int,
+        queue_wait_seconds: float,
+        ttft_seconds: float,
+        latency_seconds: float,
+        cacheable_prefix_tokens: int = 0,
+        cached_prompt_tokens: int = 0,
+        failed: bool = False,
+    ) -> None:
+        with self._lock:
+            bucket = self._buckets.get((story_id, user_id, prompt_type))
+            if bucket is None:
+                bucket = self._buckets[(story_id, user_id, prompt_type)] = _UsageBucket()
+            bucket.calls += 1
+            bucket.failures += int(failed)
+            bucket.prompt_tokens += prompt_tokens
+            bucket.completion_tokens += completion_tokens
+            bucket.cacheable_prefix_tokens += cacheable_prefix_tokens
+            bucket.cached_prompt_tokens += cached_prompt_tokens
+            bucket.queue_wait_ms += queue_wait_seconds * 1000
+            bucket.ttft_ms += ttft_seconds * 1000
+            bucket.latency_ms += latency_seconds * 1000
+            bucket.latency_ms_max = max(bucket.latency_ms_max, latency_seconds * 1000)
+            self._pending_calls += 1
+            full = self._pending_calls >= self.flush_batch
+        if full and self._wakeup is not None:
+            self._wakeup.set()
+
+    def pending(self) -> List[Dict[str, Any]]:
+        """Not-yet-flushed usage, in the same shape as stored rows (for reports)."""
+        with self._lock:
+            return [
+                {"story_id": story_id, "user_id": user_id, "prompt_type": prompt_type, **bucket.as_dict()}
+                for (story_id, user_id, prompt_type), bucket in self._buckets.items()
+            ]
+
+    def _swap(self) -> Tuple[Dict[UsageKey, _UsageBucket], datetime, datetime]:
+        now = datetime.now(timezone.utc)
+        with self._lock:
+            buckets, self._buckets = self._buckets, {}
+            window_start, self._window_start = self._window_start, now
+            self._pending_calls = 0
+        return buckets, window_start, now
+
+    def _restore(self, buckets: Dict[UsageKey, _UsageBucket], window_start: datetime) -> None:
+        # Merges a batch that failed to write back into the usage recorded since, unless it failed too often
+        with self._lock:
+            self._failed_flushes += 1
+            if self._failed_flushes > self.max_retries:
+                self._failed_flushes = 0
+                dropped = sum(bucket.calls for bucket in buckets.values())
+                print(f"LLMUsageAccountant: dropping usage of {dropped} calls after {self.max_retries} failed retries")
+                return
+            for key, bucket in buckets.items():
+                current = self._buckets.get(key)
+                if current is None:
+                    self._buckets[key] = bucket
+                else:
+                    current.merge(bucket)
+                self._pending_calls += bucket.calls
+            self._window_start = window_start
+
+    def flush_sync(self) -> int:
+        """
+        Writes all pending usage in one transaction. Returns the number of rows written.
+        If the write fails, the usage stays pending (see max_retries) and the error is raised.
+        """
+        # Imported here: app.db.session pulls in the engine, which the LLM layer should not need at import time.
+        from app.crud import crud_llm_usage
+        from app.db.session import SessionLocal
+
+        buckets, window_start, window_end = self._swap()
+        if not buckets:
+            return 0
+        rows = [
+            {
+                "story_id": story_id,
+                "user_id": user_id,
+                "prompt_type": prompt_type,
+                "window_start": window_start,
+                "window_end": window_end,
+                **bucket.as_dict(),
+            }
+            for (story_id, user_id, prompt_type), bucket in buckets.items()
+        ]
+        db = SessionLocal()
+        try:
+            crud_llm_usage.create_many(db, rows=rows)
+        except Exception:
+            self._restore(buckets, window_start)
+            raise
+        finally:
+            db.close()
+        with self._lock:
+            self._failed_flushes = 0
+        return len(rows)
+
+    async def flush(self) -> int:
+        return await asyncio.to_thread(self.flush_sync)
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_seconds)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                # Keep the flusher alive; the failed batch is pending again (flush_sync)
+                print(f"LLMUsageAccountant: failed to flush usage batch: {e}")
+
+    def start(self) -> None:
+        if self._task is None:
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        await self.flush()
+
+llm_usage_accountant = LLMUsageAccountant(
+    flush_seconds=settings.LLM_USAGE_FLUSH_SECONDS,
+    flush_batch=settings.LLM_USAGE_FLUSH_BATCH,
+    max_retries=settings.LLM_USAGE_FLUSH_MAX_RETRIES,
+)
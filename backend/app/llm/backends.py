@@ -0,0 +1,104 @@
+import asyncio
+from dataclasses import dataclass
+from typing import List, Optional, Union
+
+import httpx
+
+from app.core.config import settings
+
+@dataclass
+class LLMCompletion:
+    text: str
+    backend: str # Name of the backend that produced the answer
+    prompt_tokens: Optional[int] = None # As reported by the provider, if it reports usage
+    completion_tokens: Optional[int] = None
+    cached_prompt_tokens: Optional[int] = None # Prompt tokens served from the provider's prefix cache
+    # Seconds from request to first token, for streaming backends. Non-streaming
+    # backends leave it unset and the full response time is used instead.
+    first_token_seconds: Optional[float] = None
+
+class LLMBackend:
+    """A single place LLM completions can be requested from."""
+    def __init__(self, name: str):
+        self.name = name
+
+    async def complete(self, prompt: str) -> LLMCompletion:
+        raise NotImplementedError
+
+    async def complete_batch(self, prompts: List[str]) -> List[LLMCompletion]:
+        """One request for many prompts. Only batch-capable backends implement this."""
+        raise NotImplementedError
+
+    async def aclose(self) -> None:
+        pass
+
+class SimulatedBackend(LLMBackend):
+    """Placeholder backend used when no LLM endpoint is configured."""
+    def __init__(self, name: str = "simulated", latency_seconds: float = 0.0):
+        super().__init__(name)
+        self.latency_seconds = latency_seconds
+
+    async def complete(self, prompt: str) -> LLMCompletion:
+        log_message = f"""--- LLM PROMPT ({self.name}) ---
+{prompt}
+--------------------------------"""
+        print(log_message)
+        if self.latency_seconds:
+            await asyncio.sleep(self.latency_seconds)
+        return LLMCompletion(text=f"LLM simulated response to: {prompt[:50]}...", backend=self.name)
+
+class HTTPBackend(LLMBackend):
+    """
+    Backend speaking the OpenAI-compatible `/v1/completions` protocol, which
+    self-hosted servers (vLLM, llama.cpp server, TGI) and `app.llm.stub_server` expose.
+    """
+    def __init__(
+        self,
+        name: str,
+        base_url: str,
+        *,
+        api_key: Optional[str] = None,
+        model: str = "default",
+        timeout_seconds: float = 60.0,
+        transport: Optional[httpx.AsyncBaseTransport] = None, # e.g. httpx.ASGITransport for an in-process stub
+    ):
+        super().__init__(name)
+        self.model = model
+        headers = {"Authorization": f"Bearer {api_key}"} if api_key else {}
+        self._client = httpx.AsyncClient(
+            base_url=base_url.rstrip("/"), headers=headers, timeout=timeout_seconds, transport=transport
+        )
+
+    async def _post_completions(self, prompt: Union[str, List[str]]) -> dict:
+        response = await self._client.post(
+            "/v1/completions",
+            json={"model": self.model, "prompt": prompt, "max_tokens": settings.LLM_MAX_TOKENS},
+        )
+        response.raise_for_status()
+        return response.json()
+
+    async def complete(self, prompt: str) -> LLMCompletion:
+        body = await self._post_completions(prompt)
+        usage = body.get("usage") or {}
+        return LLMCompletion(
+            text=body["choices"][0]["text"].strip(),
+            backend=self.name,
+            prompt_tokens=usage.get("prompt_tokens"),
+            completion_tokens=usage.get("completion_tokens"),
+            cached_prompt_tokens=(usage.get("prompt_tokens_details") or {}).get("cached_tokens"),
+        )
+
+    async def complete_batch(self, prompts: List[str]) -> List[LLMCompletion]:
+        # The completions protocol accepts a list of prompts; choices carry the prompt index.
+        # Usage is only reported for the whole batch, so per-prompt token counts are left
+        # unset and estimated by the accounting layer.
+        body = await self._post_completions(prompts)
+        texts: List[Optional[str]] = [None] * len(prompts)
+        for choice in body["choices"]:
+            texts[choice["index"]] = choice["text"].strip()
+        if any(text is None for text in texts):
+            raise ValueError(f"Backend {self.name} returned {len(body['choices'])} choices for {len(prompts)} prompts.")
+        return [LLMCompletion(text=text, backend=self.name) for text in texts]
+
+    async def aclose(self) -> None:
+        await self._client.aclose()
@@ -0,0 +1,84 @@
+import asyncio
+from typing import List, Optional, Tuple
+
+from app.llm.backends import LLMBackend, LLMCompletion
+
+class MicroBatcher:
+    """
+    Collects concurrent prompts for up to `max_wait_ms`, or until `max_batch_size`
+    are waiting, and sends them to a batch-capable backend as one request.
+    Each caller gets back only its own completion (or the batch's exception).
+
+    Must be used from the event loop thread only.
+    """
+    def __init__(self, backend: LLMBackend, max_batch_size: int, max_wait_ms: float):
+        self.backend = backend
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self._pending: List[Tuple[str, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._inflight: set = set()
+        self.batches_sent = 0
+        self.prompts_sent = 0
+
+    async def submit(self, prompt: str) -> LLMCompletion:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((prompt, future))
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._flush)
+        return await future
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        # Callers that gave up while waiting (e.g. hedging losers) are not sent
+        batch = [(prompt, future) for prompt, future in self._pending if not future.done()]
+        self._pending = []
+        if not batch:
+            return
+        task = asyncio.get_running_loop().create_task(self._send(batch))
+        self._inflight.add(task) # Keep a reference until the batch completes
+        task.add_done_callback(self._inflight.discard)
+
+    async def _send(self, batch: List[Tuple[str, asyncio.Future]]) -> None:
+        self.batches_sent += 1
+        self.prompts_sent += len(batch)
+        try:
+            completions = await self.backend.complete_batch([prompt for prompt, _ in batch])
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, future), completion in zip(batch, completions):
+            if not future.done():
+                future.set_result(completion)
+
+    async def aclose(self) -> None:
+        self._flush()
+        if self._inflight:
+            await asyncio.gather(*self._inflight, return_exceptions=True)
+
+class BatchingBackend(LLMBackend):
+    """
+    Single-prompt view of a batch-capable backend, so micro-batching slots in
+    under the hedged pool without the rest of the client knowing about it.
+    """
+    def __init__(self, backend: LLMBackend, max_batch_size: int, max_wait_ms: float):
+        super().__init__(backend.name)
+        self.backend = backend
+        self.batcher = MicroBatcher(backend, max_batch_size, max_wait_ms)
+
+    async def complete(self, prompt: str) -> LLMCompletion:
+        return await self.batcher.submit(prompt)
+
+    async def complete_batch(self, prompts: List[str]) -> List[LLMCompletion]:
+        return await self.backend.complete_batch(prompts)
+
+    async def aclose(self) -> None:
+        await self.batcher.aclose()
+        await self.backend.aclose()
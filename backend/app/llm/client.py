@@ -0,0 +1,101 @@
+import time
+from typing import List, Optional, Union
+
+from app.llm.accounting import LLMUsageAccountant, estimate_tokens, llm_usage_accountant
+from app.core.config import settings
+from app.llm.backends import HTTPBackend, LLMBackend, SimulatedBackend
+from app.llm.batching import BatchingBackend
+from app.llm.hedging import HedgedBackendPool
+from app.llm.prompts import AssembledPrompt
+from app.llm.scheduler import LLMPriority, LLMScheduler, llm_scheduler
+from app.models.llm_usage import PromptType
+
+class LLMClient:
+    """
+    Entry point for every LLM call made by the services layer.
+    Calls are admitted through the LLMScheduler so live play turns are not
+    starved by editor or background generation, then served by a hedged,
+    circuit-broken pool of backends. Every call is accounted to its story,
+    user and prompt type.
+    """
+    def __init__(self, scheduler: LLMScheduler, pool: HedgedBackendPool, accountant: LLMUsageAccountant):
+        self.scheduler = scheduler
+        self.pool = pool
+        self.accountant = accountant
+
+    async def complete(
+        self,
+        prompt: Union[str, AssembledPrompt],
+        *,
+        prompt_type: PromptType,
+        priority: LLMPriority = LLMPriority.INTERACTIVE,
+        user_id: Optional[int] = None,
+        story_id: Optional[str] = None,
+    ) -> str:
+        if isinstance(prompt, AssembledPrompt):
+            prefix_tokens = prompt.cacheable_prefix_tokens
+            prompt = prompt.text
+        else:
+            prefix_tokens = 0
+        started = time.monotonic()
+        # Shed requests never reach a backend and are counted by the scheduler, not here.
+        queue_wait = await self.scheduler.acquire(priority, user_id)
+        dispatched = time.monotonic()
+        try:
+            # A hedged attempt runs inside the slot of the request it hedges.
+            completion = await self.pool.complete(prompt)
+        except Exception:
+            finished = time.monotonic()
+            self.accountant.record(
+                story_id=story_id, user_id=user_id, prompt_type=prompt_type,
+                prompt_tokens=estimate_tokens(prompt), completion_tokens=0,
+                queue_wait_seconds=queue_wait, ttft_seconds=finished - dispatched,
+                latency_seconds=finished - started, cacheable_prefix_tokens=prefix_tokens, failed=True,
+            )
+            raise
+        finally:
+            self.scheduler.release()
+
+        finished = time.monotonic()
+        self.accountant.record(
+            story_id=story_id,
+            user_id=user_id,
+            prompt_type=prompt_type,
+            prompt_tokens=completion.prompt_tokens if completion.prompt_tokens is not None else estimate_tokens(prompt),
+            completion_tokens=(
+                completion.completion_tokens if completion.completion_tokens is not None
+                else estimate_tokens(completion.text)
+            ),
+            queue_wait_seconds=queue_wait,
+            ttft_seconds=(
+                completion.first_token_seconds if completion.first_token_seconds is not None
+                else finished - dispatched
+            ),
+            latency_seconds=finished - started,
+            cacheable_prefix_tokens=prefix_tokens,
+            cached_prompt_tokens=completion.cached_prompt_tokens or 0,
+        )
+        return completion.text
+
+    async def aclose(self) -> None:
+        await self.pool.aclose()
+
+def build_backends() -> List[LLMBackend]:
+    """Creates the configured backends in preference order (first is the primary)."""
+    if not settings.LLM_BACKEND_URLS:
+        return [SimulatedBackend()]
+    backends: List[LLMBackend] = []
+    for index, url in enumerate(settings.LLM_BACKEND_URLS):
+        backend: LLMBackend = HTTPBackend(
+            f"backend-{index}",
+            url,
+            api_key=settings.OPENAI_API_KEY,
+            model=settings.LLM_MODEL,
+            timeout_seconds=settings.LLM_REQUEST_TIMEOUT_SECONDS,
+        )
+        if settings.LLM_BATCHING_ENABLED:
+            backend = BatchingBackend(backend, settings.LLM_BATCH_MAX_SIZE, settings.LLM_BATCH_MAX_WAIT_MS)
+        backends.append(backend)
+    return backends
+
+llm_client = LLMClient(llm_scheduler, HedgedBackendPool(build_backends()), llm_usage_accountant)
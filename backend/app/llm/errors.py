@@ -0,0 +1,14 @@
+class LLMError(Exception):
+    """Base class for LLM failures that should surface to clients as 503 Service Unavailable."""
+
+class LLMOverloadedError(LLMError):
+    """Raised when a request is shed because its priority class queue is full."""
+    def __init__(self, priority, queue_depth: int):
+        self.priority = priority
+        self.queue_depth = queue_depth
+        super().__init__(
+            f"LLM capacity exhausted: {queue_depth} requests already queued at or above {priority.name} priority."
+        )
+
+class LLMUnavailableError(LLMError):
+    """Raised when no backend could produce a completion (all failed or circuits open)."""
@@ -0,0 +1,177 @@
+import asyncio
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Iterator, List, Optional
+
+from app.core.config import settings
+from app.llm.backends import LLMBackend, LLMCompletion
+from app.llm.errors import LLMUnavailableError
+from app.llm.stats import percentile
+
+class CircuitBreaker:
+    """
+    Classic three-state breaker. After `failure_threshold` consecutive failures
+    the backend is skipped for `reset_timeout` seconds, then a single trial
+    request is let through (half-open); its outcome closes or re-opens the circuit.
+    """
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+
+    def allow_request(self) -> bool:
+        if self.state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+            self.state = self.HALF_OPEN
+            self._trial_in_flight = False
+        if self.state == self.HALF_OPEN:
+            if self._trial_in_flight:
+                return False
+            self._trial_in_flight = True
+            return True
+        return self.state == self.CLOSED
+
+    def record_success(self) -> None:
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        self.consecutive_failures += 1
+        if self.state == self.HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+            self.state = self.OPEN
+            self._opened_at = time.monotonic()
+        self._trial_in_flight = False
+
+    def record_cancelled(self) -> None:
+        # A hedging loser says nothing about backend health; free the trial slot.
+        self._trial_in_flight = False
+
+class _BackendState:
+    def __init__(self, backend: LLMBackend, sample_size: int):
+        self.backend = backend
+        self.breaker = CircuitBreaker(settings.LLM_CIRCUIT_FAILURE_THRESHOLD, settings.LLM_CIRCUIT_RESET_SECONDS)
+        self.latencies: Deque[float] = deque(maxlen=sample_size)
+        self.requests = 0
+        self.failures = 0
+        self.wins = 0
+        self.cancelled = 0
+
+class HedgedBackendPool:
+    """
+    Sends each prompt to the first healthy backend. If it has not answered by
+    the hedge deadline (the configured latency percentile of that backend's
+    recent successes), the same prompt is also sent to the next healthy backend;
+    the first successful answer wins and the other attempts are cancelled.
+    A backend that fails outright triggers an immediate failover instead of
+    waiting for the deadline.
+    """
+    def __init__(self, backends: List[LLMBackend]):
+        if not backends:
+            raise ValueError("HedgedBackendPool needs at least one backend.")
+        self._states = [_BackendState(b, settings.LLM_HEDGE_SAMPLE_SIZE) for b in backends]
+        self.hedges_launched = 0
+
+    def hedge_delay(self, state: _BackendState) -> float:
+        if len(state.latencies) < settings.LLM_HEDGE_MIN_SAMPLES:
+            return settings.LLM_HEDGE_DEFAULT_DELAY_MS / 1000
+        return max(
+            settings.LLM_HEDGE_MIN_DELAY_MS / 1000,
+            percentile(state.latencies, settings.LLM_HEDGE_PERCENTILE),
+        )
+
+    def _healthy(self) -> Iterator[_BackendState]:
+        # Breakers are consulted lazily, only when an attempt is actually launched,
+        # so a half-open trial slot is never claimed by a backend we then skip.
+        for state in self._states:
+            if state.breaker.allow_request():
+                yield state
+
+    async def _attempt(self, state: _BackendState, prompt: str) -> LLMCompletion:
+        state.requests += 1
+        started = time.monotonic()
+        try:
+            completion = await state.backend.complete(prompt)
+        except asyncio.CancelledError:
+            state.cancelled += 1
+            state.breaker.record_cancelled()
+            raise
+        except Exception:
+            state.failures += 1
+            state.breaker.record_failure()
+            raise
+        state.latencies.append(time.monotonic() - started)
+        state.breaker.record_success()
+        return completion
+
+    async def complete(self, prompt: str) -> LLMCompletion:
+        candidates = self._healthy()
+        attempts_left = settings.LLM_HEDGE_MAX_ATTEMPTS
+        tasks: Dict[asyncio.Task, _BackendState] = {}
+        errors: List[str] = []
+
+        def launch() -> Optional[_BackendState]:
+            nonlocal attempts_left
+            if attempts_left <= 0:
+                return None
+            state = next(candidates, None)
+            if state is None:
+                return None
+            attempts_left -= 1
+            tasks[asyncio.create_task(self._attempt(state, prompt))] = state
+            return state
+
+        primary = launch()
+        if primary is None:
+            raise LLMUnavailableError("All LLM backends are unavailable (circuits open).")
+        deadline: Optional[float] = self.hedge_delay(primary)
+        try:
+            while tasks:
+                done, _ = await asyncio.wait(tasks, timeout=deadline, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    # Hedge deadline passed with nothing back: race a second backend.
+                    hedged = launch()
+                    if hedged is not None:
+                        self.hedges_launched += 1
+                    deadline = self.hedge_delay(hedged) if hedged is not None else None
+                    continue
+                for task in done:
+                    state = tasks.pop(task)
+                    if task.exception() is None:
+                        state.wins += 1
+                        return task.result()
+                    errors.append(f"{state.backend.name}: {task.exception()!r}")
+                    launch() # Fail over right away
+            raise LLMUnavailableError("All LLM backend attempts failed: " + "; ".join(errors))
+        finally:
+            for task in tasks:
+                task.cancel()
+            if tasks:
+                await asyncio.gather(*tasks, return_exceptions=True)
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        return [
+            {
+                "name": state.backend.name,
+                "circuit_state": state.breaker.state,
+                "consecutive_failures": state.breaker.consecutive_failures,
+                "requests": state.requests,
+                "failures": state.failures,
+                "wins": state.wins,
+                "cancelled": state.cancelled,
+                "latency_ms_p50": percentile(state.latencies, 50) * 1000,
+                "latency_ms_p95": percentile(state.latencies, 95) * 1000,
+                "hedge_delay_ms": self.hedge_delay(state) * 1000,
+            }
+            for state in self._states
+        ]
+
+    async def aclose(self) -> None:
+        for state in self._states:
+            await state.backend.aclose()
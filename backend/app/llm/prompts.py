@@ -0,0 +1,114 @@
+import hashlib
+import json
+import unicodedata
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from app.llm.accounting import estimate_tokens
+
+def canonical_json(value: Any) -> str:
+    """Byte-stable JSON: sorted keys, no insignificant whitespace, unescaped unicode."""
+    return json.dumps(value, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+
+def normalize_text(text: Optional[str]) -> str:
+    """
+    Normalizes free text so that visually identical prompts are byte-identical:
+    NFC unicode, LF line endings, no trailing whitespace.
+    """
+    if not text:
+        return ""
+    text = unicodedata.normalize("NFC", text).replace("\r\n", "\n").replace("\r", "\n")
+    return "\n".join(line.rstrip() for line in text.strip().split("\n"))
+
+@dataclass
+class StoryPromptContext:
+    """Story-level inputs; identical for every player of the story."""
+    title: str
+    description: Optional[str] = None
+    system_prompt: Optional[str] = None
+    initial_stats: Optional[Dict[str, Any]] = None
+
+@dataclass
+class NodePromptContext:
+    """Node-level inputs; identical for every player reaching the node."""
+    node_type: str
+    label: str
+    text_content: str
+    character_name: Optional[str] = None
+    instruction: Optional[str] = None # The node's own LLM prompt (llm_processing_prompt, ending_message_prompt, ...)
+    choices: List[str] = field(default_factory=list) # Outgoing edge labels, in edge id order
+
+@dataclass
+class AssembledPrompt:
+    text: str
+    cacheable_prefix: str # Story + node sections; shared by every request for the same node. Always a prefix of text.
+
+    @property
+    def cacheable_prefix_chars(self) -> int:
+        return len(self.cacheable_prefix)
+
+    @property
+    def cacheable_prefix_tokens(self) -> int:
+        return estimate_tokens(self.cacheable_prefix)
+
+    @property
+    def prefix_hash(self) -> str:
+        return hashlib.sha256(self.cacheable_prefix.encode("utf-8")).hexdigest()[:16]
+
+    @property
+    def text_hash(self) -> str:
+        return hashlib.sha256(self.text.encode("utf-8")).hexdigest()
+
+def _section(title: str, lines: List[str]) -> str:
+    return f"### {title}\n" + "\n".join(line for line in lines if line) + "\n\n"
+
+def render_story_section(story: StoryPromptContext) -> str:
+    return _section("Story", [
+        normalize_text(story.system_prompt),
+        f"Title: {normalize_text(story.title)}",
+        f"Description: {normalize_text(story.description)}" if story.description else "",
+        f"Initial stats: {canonical_json(story.initial_stats)}" if story.initial_stats else "",
+    ])
+
+def render_node_section(node: NodePromptContext) -> str:
+    return _section("Scene", [
+        f"Type: {node.node_type}",
+        f"Label: {normalize_text(node.label)}",
+        f"Character: {normalize_text(node.character_name)}" if node.character_name else "",
+        f"Text: {normalize_text(node.text_content)}",
+        f"Choices: {canonical_json([normalize_text(c) for c in node.choices])}" if node.choices else "",
+        f"Instruction: {normalize_text(node.instruction)}" if node.instruction else "",
+    ])
+
+def render_session_section(stats: Optional[Dict[str, Any]], user_input: Optional[str], task: Optional[str]) -> str:
+    return _section("Player", [
+        f"Current stats: {canonical_json(stats or {})}",
+        f"Player input: {normalize_text(user_input)}" if user_input is not None else "",
+        normalize_text(task),
+    ])
+
+def assemble_prompt(
+    story: StoryPromptContext,
+    node: Optional[NodePromptContext] = None,
+    *,
+    stats: Optional[Dict[str, Any]] = None,
+    user_input: Optional[str] = None,
+    task: Optional[str] = None,
+) -> AssembledPrompt:
+    """
+    Builds a prompt ordered from most to least shared: story, then node, then
+    session. Provider prompt caches match on an exact byte prefix, so nothing
+    per-player (stats, input, timestamps, request ids) may appear before the
+    session section, and every story/node field is rendered deterministically.
+    """
+    prefix = render_story_section(story)
+    if node is not None:
+        prefix += render_node_section(node)
+    if stats is None and user_input is None and task is None:
+        # Player-independent prompt (e.g. publish-time rendering): the whole text is shared
+        text = prefix.rstrip("\n")
+        return AssembledPrompt(text=text, cacheable_prefix=text)
+    return AssembledPrompt(
+        text=prefix + render_session_section(stats, user_input, task).rstrip("\n"),
+        cacheable_prefix=prefix,
+    )
@@ -0,0 +1,202 @@
+import asyncio
+import enum
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, TypeVar
+
+from app.core.config import settings
+from app.llm.errors import LLMOverloadedError
+from app.llm.stats import percentile
+
+T = TypeVar("T")
+
+class LLMPriority(enum.IntEnum):
+    """Priority classes for LLM work. Lower value is dispatched first."""
+    INTERACTIVE = 0 # Live play turns - a player is waiting on the response
+    EDITOR = 1 # Author-triggered generation in the story editor
+    BACKGROUND = 2 # Speculative prefetches, publish-time rendering, bulk jobs
+
+class _Waiter:
+    __slots__ = ("future", "enqueued_at")
+
+    def __init__(self, future: asyncio.Future):
+        self.future = future
+        self.enqueued_at = time.monotonic()
+
+class _FairQueue:
+    """
+    Per-priority-class queue with round-robin fairness across users.
+    Each user has their own FIFO; dispatch rotates over users so one user
+    with a deep backlog (e.g. bulk subtree generation) only gets every n-th slot.
+    """
+    def __init__(self):
+        self.per_user: Dict[Any, Deque[_Waiter]] = {}
+        self.rotation: Deque[Any] = deque()
+        self.depth = 0
+
+    def push(self, user_key: Any, waiter: _Waiter) -> None:
+        user_queue = self.per_user.get(user_key)
+        if user_queue is None:
+            user_queue = self.per_user[user_key] = deque()
+            self.rotation.append(user_key)
+        user_queue.append(waiter)
+        self.depth += 1
+
+    def pop(self) -> Optional[_Waiter]:
+        while self.rotation:
+            user_key = self.rotation.popleft()
+            user_queue = self.per_user[user_key]
+            waiter = user_queue.popleft()
+            self.depth -= 1
+            if user_queue:
+                self.rotation.append(user_key) # User goes to the back of the rotation
+            else:
+                del self.per_user[user_key]
+            if not waiter.future.done():
+                return waiter
+        return None
+
+    def discard(self, user_key: Any, waiter: _Waiter) -> None:
+        user_queue = self.per_user.get(user_key)
+        if not user_queue or waiter not in user_queue:
+            return
+        user_queue.remove(waiter)
+        self.depth -= 1
+        if not user_queue:
+            del self.per_user[user_key]
+            self.rotation.remove(user_key)
+
+class _ClassStats:
+    def __init__(self, sample_size: int):
+        self.submitted = 0
+        self.dispatched = 0
+        self.shed = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.recent_waits: Deque[float] = deque(maxlen=sample_size)
+
+    def record_wait(self, seconds: float) -> None:
+        self.dispatched += 1
+        self.wait_total += seconds
+        self.wait_max = max(self.wait_max, seconds)
+        self.recent_waits.append(seconds)
+
+    def wait_percentile(self, pct: float) -> float:
+        return percentile(self.recent_waits, pct)
+
+class LLMScheduler:
+    """
+    Bounds the number of concurrent LLM calls and decides who goes next when
+    the bound is reached: strict priority between classes, round-robin between
+    users inside a class. Work is shed (LLMOverloadedError) instead of queued
+    when the backlog at or above its priority exceeds the class limit, so
+    background and editor work is dropped first under load.
+
+    Must be used from the event loop thread only; it holds no locks.
+    """
+    def __init__(
+        self,
+        max_concurrency: int,
+        queue_limits: Dict[LLMPriority, int],
+        wait_sample_size: int = 1024,
+    ):
+        self.max_concurrency = max_concurrency
+        self.queue_limits = queue_limits
+        self._in_flight = 0
+        self._queues: Dict[LLMPriority, _FairQueue] = {p: _FairQueue() for p in LLMPriority}
+        self._stats: Dict[LLMPriority, _ClassStats] = {p: _ClassStats(wait_sample_size) for p in LLMPriority}
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    def queue_depth(self, priority: Optional[LLMPriority] = None) -> int:
+        if priority is not None:
+            return self._queues[priority].depth
+        return sum(q.depth for q in self._queues.values())
+
+    async def acquire(self, priority: LLMPriority = LLMPriority.INTERACTIVE, user_id: Any = None) -> float:
+        """Waits for a concurrency slot. Returns the number of seconds spent queued."""
+        stats = self._stats[priority]
+        stats.submitted += 1
+        if self._in_flight < self.max_concurrency and self.queue_depth() == 0:
+            self._in_flight += 1
+            stats.record_wait(0.0)
+            return 0.0
+
+        # Only work that would be dispatched before this request counts towards its limit
+        ahead = sum(self._queues[p].depth for p in LLMPriority if p <= priority)
+        if ahead >= self.queue_limits[priority]:
+            stats.shed += 1
+            raise LLMOverloadedError(priority, ahead)
+
+        waiter = _Waiter(asyncio.get_running_loop().create_future())
+        self._queues[priority].push(user_id, waiter)
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            if waiter.future.cancelled():
+                self._queues[priority].discard(user_id, waiter)
+            else:
+                # The slot was handed over just as we were cancelled; pass it on.
+                self.release()
+            raise
+        waited = time.monotonic() - waiter.enqueued_at
+        stats.record_wait(waited)
+        return waited
+
+    def release(self) -> None:
+        """Returns a slot, handing it directly to the next waiter if there is one."""
+        for priority in LLMPriority:
+            waiter = self._queues[priority].pop()
+            if waiter is not None:
+                waiter.future.set_result(None) # In-flight count is unchanged: the slot changes owner
+                return
+        self._in_flight -= 1
+
+    async def run(
+        self,
+        func: Callable[[], Awaitable[T]],
+        *,
+        priority: LLMPriority = LLMPriority.INTERACTIVE,
+        user_id: Any = None,
+    ) -> T:
+        await self.acquire(priority, user_id)
+        try:
+            return await func()
+        finally:
+            self.release()
+
+    def snapshot(self) -> Dict[str, Any]:
+        classes: List[Dict[str, Any]] = []
+        for priority in LLMPriority:
+            queue = self._queues[priority]
+            stats = self._stats[priority]
+            classes.append({
+                "priority": priority.name,
+                "queue_depth": queue.depth,
+                "queued_users": len(queue.per_user),
+                "queue_limit": self.queue_limits[priority],
+                "submitted": stats.submitted,
+                "dispatched": stats.dispatched,
+                "shed": stats.shed,
+                "wait_ms_avg": (stats.wait_total / stats.dispatched * 1000) if stats.dispatched else 0.0,
+                "wait_ms_p50": stats.wait_percentile(50) * 1000,
+                "wait_ms_p95": stats.wait_percentile(95) * 1000,
+                "wait_ms_max": stats.wait_max * 1000,
+            })
+        return {
+            "max_concurrency": self.max_concurrency,
+            "in_flight": self._in_flight,
+            "queue_depth": self.queue_depth(),
+            "classes": classes,
+        }
+
+llm_scheduler = LLMScheduler(
+    max_concurrency=settings.LLM_MAX_CONCURRENCY,
+    queue_limits={
+        LLMPriority.INTERACTIVE: settings.LLM_QUEUE_LIMIT_INTERACTIVE,
+        LLMPriority.EDITOR: settings.LLM_QUEUE_LIMIT_EDITOR,
+        LLMPriority.BACKGROUND: settings.LLM_QUEUE_LIMIT_BACKGROUND,
+    },
+)
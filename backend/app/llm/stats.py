@@ -0,0 +1,9 @@
+from typing import Iterable
+
+def percentile(samples: Iterable[float], pct: float) -> float:
+    """Nearest-rank percentile of a (small) sample window; 0.0 when empty."""
+    ordered = sorted(samples)
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
@@ -0,0 +1,130 @@
+"""
+Local stand-in for an OpenAI-compatible completion server, with injectable latency
+and failures. Run two of them to exercise hedging and failover:
+
+    python -m app.llm.stub_server --port 9001 --latency-ms 80 --slow-fraction 0.1 --slow-latency-ms 3000
+    python -m app.llm.stub_server --port 9002 --latency-ms 120
+
+and point the app at them with
+    LLM_BACKEND_URLS='["http://127.0.0.1:9001", "http://127.0.0.1:9002"]'
+
+Latency and failure rate can be changed at runtime through POST /stub/config.
+
+The stub also accepts a list of prompts in one request, like batch-capable
+inference servers. With --max-concurrency 1 it models a single accelerator:
+a request costs latency_ms plus batch_item_latency_ms per prompt, so batching
+amortises the fixed per-request cost (see benchmarks/llm_batching.py).
+"""
+import argparse
+import asyncio
+import random
+from typing import List, Optional, Union
+
+from fastapi import FastAPI, HTTPException, status
+from pydantic import BaseModel
+
+class StubConfig(BaseModel):
+    latency_ms: float = 50.0
+    slow_fraction: float = 0.0 # Share of requests that take slow_latency_ms instead (tail latency)
+    slow_latency_ms: float = 2000.0
+    failure_rate: float = 0.0 # Share of requests answered with HTTP 500
+    batch_item_latency_ms: float = 0.0 # Extra cost per prompt in a request
+    max_concurrency: int = 0 # Requests processed at once; 0 = unlimited
+
+class StubConfigUpdate(BaseModel):
+    latency_ms: Optional[float] = None
+    slow_fraction: Optional[float] = None
+    slow_latency_ms: Optional[float] = None
+    failure_rate: Optional[float] = None
+    batch_item_latency_ms: Optional[float] = None
+
+class CompletionRequest(BaseModel):
+    prompt: Union[str, List[str]]
+    model: str = "stub"
+    max_tokens: int = 256
+
+def _count_tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+def create_stub_app(name: str = "stub", config: Optional[StubConfig] = None) -> FastAPI:
+    app = FastAPI(title=f"LLM stub ({name})")
+    app.state.config = config or StubConfig()
+    app.state.requests = 0
+    app.state.prompts = 0
+    app.state.in_flight = 0 # Requests being processed; a cancelled client request stops its own
+    # Fixed at startup: models the capacity of the server's hardware
+    capacity = asyncio.Semaphore(app.state.config.max_concurrency) if app.state.config.max_concurrency > 0 else None
+
+    async def _process(cfg: StubConfig, prompts: List[str]) -> None:
+        latency_ms = cfg.slow_latency_ms if random.random() < cfg.slow_fraction else cfg.latency_ms
+        await asyncio.sleep((latency_ms + cfg.batch_item_latency_ms * len(prompts)) / 1000)
+
+    @app.post("/v1/completions")
+    async def completions(request: CompletionRequest):
+        cfg: StubConfig = app.state.config
+        prompts = [request.prompt] if isinstance(request.prompt, str) else request.prompt
+        app.state.requests += 1
+        app.state.prompts += len(prompts)
+        app.state.in_flight += 1
+        try:
+            if capacity is not None:
+                async with capacity:
+                    await _process(cfg, prompts)
+            else:
+                await _process(cfg, prompts)
+        finally:
+            app.state.in_flight -= 1
+        if random.random() < cfg.failure_rate:
+            raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Injected failure")
+        texts = [f"[{name}] response to: {prompt[:50]}" for prompt in prompts]
+        prompt_tokens = sum(_count_tokens(p) for p in prompts)
+        completion_tokens = sum(_count_tokens(t) for t in texts)
+        return {
+            "object": "text_completion",
+            "model": request.model,
+            "choices": [{"index": i, "text": text, "finish_reason": "stop"} for i, text in enumerate(texts)],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+            },
+        }
+
+    @app.get("/stub/config", response_model=StubConfig)
+    def read_config():
+        return app.state.config
+
+    @app.post("/stub/config", response_model=StubConfig)
+    def update_config(update: StubConfigUpdate):
+        app.state.config = app.state.config.model_copy(update=update.model_dump(exclude_none=True))
+        return app.state.config
+
+    @app.get("/stub/stats")
+    def read_stats():
+        return {"name": name, "requests": app.state.requests, "prompts": app.state.prompts, "in_flight": app.state.in_flight}
+
+    return app
+
+if __name__ == "__main__":
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Run a local LLM stub server.")
+    parser.add_argument("--port", type=int, default=9001)
+    parser.add_argument("--name", default=None)
+    parser.add_argument("--latency-ms", type=float, default=50.0)
+    parser.add_argument("--slow-fraction", type=float, default=0.0)
+    parser.add_argument("--slow-latency-ms", type=float, default=2000.0)
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    parser.add_argument("--batch-item-latency-ms", type=float, default=0.0)
+    parser.add_argument("--max-concurrency", type=int, default=0)
+    args = parser.parse_args()
+
+    stub_config = StubConfig(
+        latency_ms=args.latency_ms,
+        slow_fraction=args.slow_fraction,
+        slow_latency_ms=args.slow_latency_ms,
+        failure_rate=args.failure_rate,
+        batch_item_latency_ms=args.batch_item_latency_ms,
+        max_concurrency=args.max_concurrency,
+    )
+    uvicorn.run(create_stub_app(args.name or f"stub-{args.port}", stub_config), host="127.0.0.1", port=args.port)
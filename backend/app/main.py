@@ -1,12 +1,16 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request, status
+from fastapi.responses import JSONResponse
 from fastapi.staticfiles import StaticFiles # For serving uploaded files
 from pathlib import Path # For path operations
 from fastapi.middleware.cors import CORSMiddleware # Import CORS middleware
 
 from app.core.config import settings
-from app.db.session import engine #, SessionLocal # Not creating tables directly here
+from app.db.session import async_engine, async_replica_engines, engine #, SessionLocal # Not creating tables directly here
 from app.db.base import Base # To create tables
-from app.apis.routes import auth, stories, files, game # Added game router
+from app.apis.routes import auth, stories, files, game, llm, db # Added game router
+from app.llm import LLMError, llm_client, llm_usage_accountant
+from app.services.graph_reencoder import graph_reencoder
+from app.services.graph_validation_worker import graph_validator
 
 # Create database tables (For development only. Use Alembic for production migrations)
 # def create_db_and_tables():
@@ -40,6 +44,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"], # Allows all methods
     allow_headers=["*"], # Allows all headers
+    expose_headers=["ETag"], # Story versions for If-Match / If-None-Match
 )
 
 # --- Mount static files directory for uploads ---
@@ -59,6 +64,33 @@ def on_startup():
     Base.metadata.create_all(bind=engine)
     print("Database tables created on startup (if they didn't exist).")
 
+@app.on_event("startup")
+async def start_background_workers():
+    llm_usage_accountant.start()
+    if settings.GRAPH_REENCODE_ENABLED:
+        graph_reencoder.start()
+    if settings.GRAPH_VALIDATION_ENABLED:
+        graph_validator.start()
+
+@app.on_event("shutdown")
+async def on_shutdown():
+    await llm_usage_accountant.stop() # Final flush of LLM usage
+    await graph_reencoder.stop()
+    await graph_validator.stop()
+    await llm_client.aclose()
+    await async_engine.dispose()
+    for replica_engine in async_replica_engines:
+        await replica_engine.dispose()
+
+@app.exception_handler(LLMError)
+async def llm_error_handler(request: Request, exc: LLMError):
+    # Shed work and backend outages are retryable; tell the client to back off briefly.
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"detail": str(exc)},
+        headers={"Retry-After": "1"},
+    )
+
 # --- Routers ---
 # Note: If you use API_V1_STR as a prefix in router includes,
 # the tokenUrl in deps.py (OAuth2PasswordBearer) should also reflect this.
@@ -69,6 +101,8 @@ app.include_router(auth.router, prefix="/api/auth", tags=["Authentication"])
 app.include_router(stories.router, prefix="/api", tags=["Stories & Gameplay"])
 app.include_router(files.router, prefix="/api/files", tags=["File Uploads"])
 app.include_router(game.router, prefix="/api/stories", tags=["Game Progress"]) # Game router for progress
+app.include_router(llm.router, prefix="/api/llm", tags=["LLM"])
+app.include_router(db.router, prefix="/api/db", tags=["Database"])
 
 @app.get("/")
 async def read_root():
@@ -1,3 +1,11 @@
 from .user import User
 from .story import Story
+from .story_graph import StoryGraphRecord
+from .story_node import StoryNode
+from .story_edge import StoryEdge
+from .llm_usage import LLMUsage
+from .prerendered_content import PrerenderedContent
+from .story_snapshot import StorySnapshot
+from .story_revision import StoryRevision
+from .story_search_document import StorySearchDocument
 # Add File model if you create one for DB persistence of file metadata 
\ No newline at end of file
@@ -0,0 +1,45 @@
+import enum
+from sqlalchemy import Column, Integer, String, DateTime, Float, Enum as SQLAlchemyEnum
+
+from app.db.base import Base
+
+class PromptType(str, enum.Enum):
+    """
+    What an LLM call is for. Used to attribute tokens and latency.
+    NODE_GENERATION: generating new story nodes (editor AI generation, AI_STORY nodes)
+    ROUTING: deciding the next node from a player's free-text answer
+    STAT_ADJUSTMENT: deciding stat changes from a choice or answer
+    """
+    NODE_GENERATION = "NODE_GENERATION"
+    ROUTING = "ROUTING"
+    STAT_ADJUSTMENT = "STAT_ADJUSTMENT"
+
+class LLMUsage(Base):
+    """
+    Aggregated LLM usage for one (story, user, prompt type) over a flush window.
+    Rows are written in batches by LLMUsageAccountant; reports SUM over them.
+    """
+    __tablename__ = "llm_usage"
+
+    id = Column(Integer, primary_key=True, index=True)
+    # No FK: usage history outlives deleted stories
+    story_id = Column(String, index=True, nullable=True)
+    user_id = Column(Integer, index=True, nullable=True)
+    prompt_type = Column(SQLAlchemyEnum(PromptType), nullable=False)
+
+    window_start = Column(DateTime(timezone=True), nullable=False)
+    window_end = Column(DateTime(timezone=True), nullable=False, index=True)
+
+    calls = Column(Integer, nullable=False, default=0)
+    failures = Column(Integer, nullable=False, default=0)
+    prompt_tokens = Column(Integer, nullable=False, default=0)
+    completion_tokens = Column(Integer, nullable=False, default=0)
+    # Prompt-cache effectiveness: tokens in the deterministic story/node prefix we sent,
+    # and prompt tokens the provider reported as served from its prefix cache.
+    cacheable_prefix_tokens = Column(Integer, nullable=False, default=0)
+    cached_prompt_tokens = Column(Integer, nullable=False, default=0)
+    # Millisecond totals over `calls`; divide by calls for averages
+    queue_wait_ms = Column(Float, nullable=False, default=0.0) # Time waiting for a scheduler slot
+    ttft_ms = Column(Float, nullable=False, default=0.0) # Dispatch to first token
+    latency_ms = Column(Float, nullable=False, default=0.0) # End to end, including queue wait
+    latency_ms_max = Column(Float, nullable=False, default=0.0)
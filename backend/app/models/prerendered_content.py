@@ -0,0 +1,22 @@
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Text, UniqueConstraint
+from sqlalchemy.sql import func
+
+from app.db.base import Base
+
+class PrerenderedContent(Base):
+    """
+    LLM output rendered at publish time for a prompt that does not depend on
+    the player (e.g. an END node's ending_message_prompt without stat placeholders).
+    `prompt_hash` identifies the exact assembled prompt, so a row is only served
+    while the story/node text it was rendered from is unchanged.
+    """
+    __tablename__ = "prerendered_contents"
+    __table_args__ = (UniqueConstraint("story_id", "node_id", "field", name="uq_prerendered_story_node_field"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    story_id = Column(String, ForeignKey("stories.id", ondelete="CASCADE"), nullable=False, index=True)
+    node_id = Column(String, nullable=False)
+    field = Column(String, nullable=False) # Which node output this replaces, e.g. "ending_message"
+    prompt_hash = Column(String(64), nullable=False)
+    content = Column(Text, nullable=False)
+    rendered_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
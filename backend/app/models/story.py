@@ -1,27 +1,105 @@
 import uuid
-from sqlalchemy import Column, String, Integer, ForeignKey, DateTime, JSON, Text
+from sqlalchemy import Column, String, Integer, ForeignKey, DateTime, JSON, Text, Index
 from sqlalchemy.orm import relationship
+from sqlalchemy.ext.associationproxy import association_proxy
 from sqlalchemy.dialects.postgresql import UUID # For PostgreSQL UUID type
 from sqlalchemy.sql import func
 import datetime
 
 from app.db.base import Base # Correct import for Base
+from app.models.story_graph import StoryGraphRecord
+from app.models.story_node import StoryNode
+from app.models.story_edge import StoryEdge
 from app.schemas.story import StoryGraph # For type hinting graph_json, though it will be stored as JSON/Text
 
+GRAPH_STORAGE_JSON = "json"
+GRAPH_STORAGE_NORMALIZED = "normalized"
+GRAPH_STORAGE_MODES = (GRAPH_STORAGE_JSON, GRAPH_STORAGE_NORMALIZED)
+
+def _utcnow() -> datetime.datetime:
+    return datetime.datetime.now(datetime.timezone.utc)
+
 class Story(Base):
     __tablename__ = "stories"
+    __table_args__ = (
+        # Keyset pagination of an author's stories (newest first); also serves user_id lookups
+        Index("ix_stories_user_updated_id", "user_id", "updated_at", "id"),
+    )
 
     # Using String for ID to store UUID, or use native UUID for PG
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()), index=True)
     title = Column(String, index=True, nullable=False)
     description = Column(Text, nullable=True)
-    
-    # Store the complex graph structure as JSON.
-    # For SQLite, JSON type might map to TEXT. For PostgreSQL, it's a native JSONB/JSON.
-    graph_json = Column(JSON, nullable=False)
+    # Story-wide LLM instructions. Rendered first in every prompt for this story,
+    # so it forms the shared, provider-cacheable prompt prefix.
+    system_prompt = Column(Text, nullable=True)
+
+    # Bumped on every content write (PUT/PATCH); exposed as the ETag for optimistic concurrency
+    version = Column(Integer, nullable=False, default=1, server_default="1")
+
+    # Snapshot players are served; None until the story is first published
+    published_snapshot_id = Column(String(64), nullable=True)
+    published_at = Column(DateTime(timezone=True), nullable=True)
 
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     author = relationship("User", back_populates="stories")
+    # "json": the graph is one document in story_graphs.
+    # "normalized": one row per node/edge in story_nodes/story_edges (see app.services.graph_store).
+    # Either way it is loaded only when graph_json is accessed.
+    graph_storage = Column(String(16), nullable=False, default=GRAPH_STORAGE_JSON, server_default=GRAPH_STORAGE_JSON)
+    graph = relationship("StoryGraphRecord", uselist=False, cascade="all, delete-orphan")
+    graph_document = association_proxy("graph", "graph_json", creator=lambda graph_json: StoryGraphRecord(graph_json=graph_json))
+    node_rows = relationship("StoryNode", order_by=StoryNode.sort_index, cascade="all, delete-orphan")
+    edge_rows = relationship("StoryEdge", order_by=StoryEdge.sort_index, cascade="all, delete-orphan")
+    prerendered_contents = relationship("PrerenderedContent", cascade="all, delete-orphan")
+    snapshots = relationship("StorySnapshot", cascade="all, delete-orphan")
+    revisions = relationship("StoryRevision", cascade="all, delete-orphan")
+    search_documents = relationship("StorySearchDocument", cascade="all, delete-orphan")
 
     created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), default=func.now(), onupdate=func.now()) 
\ No newline at end of file
+    # Written from Python, not func.now(): on SQLite, CURRENT_TIMESTAMP text has no fractional
+    # seconds and would not compare with bound datetimes, such as keyset cursors (_user_page)
+    updated_at = Column(DateTime(timezone=True), default=_utcnow, onupdate=_utcnow)
+
+    @property
+    def is_normalized(self) -> bool:
+        return self.graph_storage == GRAPH_STORAGE_NORMALIZED
+
+    @property
+    def graph_json(self):
+        if self.is_normalized:
+            return {
+                "nodes": [row.as_node() for row in self.node_rows],
+                "edges": [row.as_edge() for row in self.edge_rows],
+            }
+        return self.graph_document
+
+    @graph_json.setter
+    def graph_json(self, graph_json) -> None:
+        if not self.is_normalized:
+            self.graph_document = graph_json
+            return
+        # Row-level sync: only added, changed and removed nodes/edges are written
+        nodes = {row.node_id: row for row in self.node_rows}
+        edges = {row.edge_id: row for row in self.edge_rows}
+        node_rows = [nodes.get(str(node["id"])) for node in graph_json.get("nodes", [])]
+        edge_rows = [edges.get(str(edge["id"])) for edge in graph_json.get("edges", [])]
+        self.node_rows = [
+            StoryNode.synced(row, node, sort_index)
+            for row, node, sort_index in zip(node_rows, graph_json.get("nodes", []), _sort_indexes(node_rows))
+        ]
+        self.edge_rows = [
+            StoryEdge.synced(row, edge, sort_index)
+            for row, edge, sort_index in zip(edge_rows, graph_json.get("edges", []), _sort_indexes(edge_rows))
+        ]
+
+def _sort_indexes(rows) -> list:
+    """
+    Increasing sort indexes for rows in their new order. Rows keep their index while
+    the order allows it, so an unreordered save does not renumber (rewrite) every row.
+    """
+    indexes, last = [], -1
+    for row in rows:
+        last = row.sort_index if row is not None and row.sort_index > last else last + 1
+        indexes.append(last)
+    return indexes
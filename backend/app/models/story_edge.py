@@ -0,0 +1,46 @@
+from typing import Any, Dict, Optional
+
+from sqlalchemy import Column, String, Integer, ForeignKey, JSON, Index
+
+from app.db.base import Base
+
+class StoryEdge(Base):
+    """One graph edge of a story using normalized graph storage (Story.graph_storage == "normalized")."""
+    __tablename__ = "story_edges"
+    __table_args__ = (
+        Index("ix_story_edges_story_source", "story_id", "source"), # Out-edges of a node
+        Index("ix_story_edges_story_target", "story_id", "target"), # Edges removed with their target node
+    )
+
+    story_id = Column(String, ForeignKey("stories.id", ondelete="CASCADE"), primary_key=True)
+    edge_id = Column(String, primary_key=True) # Frontend generated UUID
+    source = Column(String, nullable=False)
+    target = Column(String, nullable=False)
+    label = Column(String, nullable=True)
+    type = Column(String, nullable=True)
+    marker_end = Column(JSON, nullable=True)
+    data = Column(JSON, nullable=False) # EdgeData
+    sort_index = Column(Integer, nullable=False, default=0) # Position in the assembled edge list
+
+    def as_edge(self) -> Dict[str, Any]:
+        """The edge as stored in a graph_json document (compact: unset optional fields are omitted)."""
+        edge = {"id": self.edge_id, "source": self.source, "target": self.target}
+        for key, value in (("label", self.label), ("type", self.type), ("markerEnd", self.marker_end)):
+            if value is not None:
+                edge[key] = value
+        if self.data:
+            edge["data"] = self.data
+        return edge
+
+    @classmethod
+    def synced(cls, row: Optional["StoryEdge"], edge: Dict[str, Any], sort_index: int) -> "StoryEdge":
+        """`row` (or a new row) holding `edge`. Unchanged columns are not written on flush."""
+        row = row if row is not None else cls(edge_id=str(edge["id"]))
+        row.source = str(edge["source"])
+        row.target = str(edge["target"])
+        row.label = edge.get("label")
+        row.type = edge.get("type")
+        row.marker_end = edge.get("markerEnd")
+        row.data = edge.get("data") or {}
+        row.sort_index = sort_index
+        return row
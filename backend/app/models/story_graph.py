@@ -0,0 +1,15 @@
+from sqlalchemy import Column, String, ForeignKey
+
+from app.db.base import Base
+from app.db.graph_codec import GraphDocument
+
+class StoryGraphRecord(Base):
+    """
+    A story's editor graph, kept out of the `stories` row so that listing and
+    metadata queries never read it. Accessed through Story.graph_json.
+    """
+    __tablename__ = "story_graphs"
+
+    story_id = Column(String, ForeignKey("stories.id", ondelete="CASCADE"), primary_key=True)
+    # Compressed binary (app.db.graph_codec); legacy rows may still hold JSON text
+    graph_json = Column(GraphDocument, nullable=False)
@@ -0,0 +1,30 @@
+from typing import Any, Dict, Optional
+
+from sqlalchemy import Column, String, Integer, ForeignKey, JSON
+
+from app.db.base import Base
+
+class StoryNode(Base):
+    """One graph node of a story using normalized graph storage (Story.graph_storage == "normalized")."""
+    __tablename__ = "story_nodes"
+
+    story_id = Column(String, ForeignKey("stories.id", ondelete="CASCADE"), primary_key=True)
+    node_id = Column(String, primary_key=True) # Frontend generated UUID
+    type = Column(String, nullable=False)
+    data = Column(JSON, nullable=False) # NodeData
+    position = Column(JSON, nullable=False) # { "x": 0, "y": 0 }
+    sort_index = Column(Integer, nullable=False, default=0) # Position in the assembled node list
+
+    def as_node(self) -> Dict[str, Any]:
+        """The node as stored in a graph_json document."""
+        return {"id": self.node_id, "type": self.type, "data": self.data, "position": self.position}
+
+    @classmethod
+    def synced(cls, row: Optional["StoryNode"], node: Dict[str, Any], sort_index: int) -> "StoryNode":
+        """`row` (or a new row) holding `node`. Unchanged columns are not written on flush."""
+        row = row if row is not None else cls(node_id=str(node["id"]))
+        row.type = node["type"]
+        row.data = node["data"]
+        row.position = node["position"]
+        row.sort_index = sort_index
+        return row
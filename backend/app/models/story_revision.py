@@ -0,0 +1,28 @@
+from sqlalchemy import Column, String, Integer, ForeignKey, DateTime, UniqueConstraint
+from sqlalchemy.sql import func
+
+from app.db.base import Base
+from app.db.graph_codec import GraphDocument
+
+REVISION_KEYFRAME = "keyframe"
+REVISION_DELTA = "delta"
+
+class StoryRevision(Base):
+    """
+    One entry of a story's graph history. A keyframe holds the whole graph; a delta
+    holds only the nodes/edges changed since the previous revision (see
+    app.services.revision_service). Autosaves within a time bucket amend the
+    latest revision instead of adding one.
+    """
+    __tablename__ = "story_revisions"
+    __table_args__ = (UniqueConstraint("story_id", "revision", name="uq_story_revisions_story_revision"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    story_id = Column(String, ForeignKey("stories.id", ondelete="CASCADE"), nullable=False)
+    revision = Column(Integer, nullable=False) # 1, 2, ... per story
+    story_version = Column(Integer, nullable=False) # Story.version the revision ends at
+    kind = Column(String(16), nullable=False) # REVISION_KEYFRAME or REVISION_DELTA
+    payload = Column(GraphDocument, nullable=False) # Graph (keyframe) or graph delta
+    changes = Column(Integer, nullable=False, default=0) # Nodes and edges added, changed or removed
+    created_at = Column(DateTime(timezone=True), server_default=func.now()) # Start of its autosave bucket
+    updated_at = Column(DateTime(timezone=True), server_default=func.now())
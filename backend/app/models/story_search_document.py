@@ -0,0 +1,66 @@
+from sqlalchemy import DDL, Column, ForeignKey, Integer, String, Text, event
+
+from app.db.base import Base
+
+# PostgreSQL text search configuration: no stemming or stop words, since stories are
+# written in any language (e.g. Korean, which the language configurations do not cover)
+TEXT_SEARCH_CONFIG = "simple"
+
+# The weighted document of a row; queries must use this same expression to use its index
+POSTGRESQL_DOCUMENT = (
+    f"(setweight(to_tsvector('{TEXT_SEARCH_CONFIG}', heading), 'A') || "
+    f"setweight(to_tsvector('{TEXT_SEARCH_CONFIG}', body), 'B'))"
+)
+
+# SQLite: an FTS5 index over the rows (external content), kept in sync by triggers
+SQLITE_SEARCH_DDL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS story_search USING fts5("
+    "heading, body, content='story_search_documents', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2')",
+    "CREATE TRIGGER IF NOT EXISTS story_search_ai AFTER INSERT ON story_search_documents BEGIN "
+    "INSERT INTO story_search(rowid, heading, body) VALUES (new.id, new.heading, new.body); END",
+    "CREATE TRIGGER IF NOT EXISTS story_search_ad AFTER DELETE ON story_search_documents BEGIN "
+    "INSERT INTO story_search(story_search, rowid, heading, body) VALUES ('delete', old.id, old.heading, old.body); END",
+    "CREATE TRIGGER IF NOT EXISTS story_search_au AFTER UPDATE ON story_search_documents BEGIN "
+    "INSERT INTO story_search(story_search, rowid, heading, body) VALUES ('delete', old.id, old.heading, old.body); "
+    "INSERT INTO story_search(rowid, heading, body) VALUES (new.id, new.heading, new.body); END",
+]
+SQLITE_SEARCH_DROP = [
+    "DROP TRIGGER IF EXISTS story_search_au",
+    "DROP TRIGGER IF EXISTS story_search_ad",
+    "DROP TRIGGER IF EXISTS story_search_ai",
+    "DROP TABLE IF EXISTS story_search",
+]
+# PostgreSQL: a GIN index of the weighted tsvector
+POSTGRESQL_SEARCH_DDL = [
+    f"CREATE INDEX IF NOT EXISTS ix_story_search_documents_document ON story_search_documents USING gin ({POSTGRESQL_DOCUMENT})",
+]
+POSTGRESQL_SEARCH_DROP = ["DROP INDEX IF EXISTS ix_story_search_documents_document"]
+# What the DDL above creates (with the FTS5 shadow tables), for alembic autogenerate to leave alone
+SEARCH_INDEX_OBJECTS = {
+    "story_search", "story_search_data", "story_search_idx", "story_search_docsize", "story_search_config",
+    "ix_story_search_documents_document",
+}
+
+class StorySearchDocument(Base):
+    """
+    Searchable text of a story (see app.services.story_search): one row for its
+    title and description (node_id None), and one per node with text, holding the
+    node's label and character name (heading) and its text content (body).
+    Saves rewrite only the rows whose text changed.
+    """
+    __tablename__ = "story_search_documents"
+
+    id = Column(Integer, primary_key=True)
+    story_id = Column(String, ForeignKey("stories.id", ondelete="CASCADE"), nullable=False, index=True)
+    node_id = Column(String, nullable=True)
+    heading = Column(Text, nullable=False, default="") # Ranked above body
+    body = Column(Text, nullable=False, default="")
+
+# Full-text indexes of create_all (app startup); migration 0011 creates them for migrated databases
+for _statement in SQLITE_SEARCH_DDL:
+    event.listen(StorySearchDocument.__table__, "after_create", DDL(_statement).execute_if(dialect="sqlite"))
+for _statement in SQLITE_SEARCH_DROP:
+    event.listen(StorySearchDocument.__table__, "before_drop", DDL(_statement).execute_if(dialect="sqlite"))
+for _statement in POSTGRESQL_SEARCH_DDL:
+    event.listen(StorySearchDocument.__table__, "after_create", DDL(_statement).execute_if(dialect="postgresql"))
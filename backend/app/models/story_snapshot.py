@@ -0,0 +1,20 @@
+from sqlalchemy import Column, String, ForeignKey, DateTime, JSON, Text
+from sqlalchemy.sql import func
+
+from app.db.base import Base
+
+class StorySnapshot(Base):
+    """
+    Immutable copy of a story as it was published. The id is the SHA-256 of the
+    story id and the canonical JSON of its content, so publishing unchanged
+    content reuses the same snapshot. Rows are never updated.
+    """
+    __tablename__ = "story_snapshots"
+
+    id = Column(String(64), primary_key=True, index=True)
+    story_id = Column(String, ForeignKey("stories.id", ondelete="CASCADE"), nullable=False, index=True)
+    title = Column(String, nullable=False)
+    description = Column(Text, nullable=True)
+    system_prompt = Column(Text, nullable=True)
+    graph_json = Column(JSON, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -0,0 +1,27 @@
+from typing import List, Optional
+from pydantic import BaseModel
+
+class DBPoolMetrics(BaseModel):
+    name: str # sync or async engine
+    pool: str # Pool class, e.g. QueuePool
+    size: Optional[int] = None
+    max_overflow: Optional[int] = None
+    checked_out: int # Connections in use now
+    peak_checked_out: int
+    connects: int # New database connections opened
+    checkouts: int
+    invalidations: int # Connections discarded after an error (or a failed pre-ping)
+    hold_ms_avg: float # How long a checkout keeps its connection
+    hold_ms_p50: float # Over the most recent checkins only
+    hold_ms_p95: float
+    hold_ms_max: float
+
+class DBReadRoutingMetrics(BaseModel):
+    replicas: int
+    primary_reads: int # Read sessions on the primary: no replicas, or the client wrote recently
+    replica_reads: int
+    sticky_reads: int # Of primary_reads, those kept there by the client's recent write (its cookie)
+
+class DBMetrics(BaseModel):
+    engines: List[DBPoolMetrics]
+    read_routing: DBReadRoutingMetrics
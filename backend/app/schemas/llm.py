@@ -0,0 +1,57 @@
+from typing import List, Optional
+from pydantic import BaseModel
+
+from app.models.llm_usage import PromptType
+
+class LLMPriorityClassMetrics(BaseModel):
+    priority: str # INTERACTIVE, EDITOR, BACKGROUND
+    queue_depth: int
+    queued_users: int
+    queue_limit: int
+    submitted: int
+    dispatched: int
+    shed: int # Requests rejected because the class queue limit was reached
+    wait_ms_avg: float
+    wait_ms_p50: float # Over the most recent dispatches only
+    wait_ms_p95: float
+    wait_ms_max: float
+
+class LLMBackendMetrics(BaseModel):
+    name: str
+    circuit_state: str # closed, open, half_open
+    consecutive_failures: int
+    requests: int
+    failures: int
+    wins: int # Attempts whose answer was used
+    cancelled: int # Attempts cancelled because another backend answered first
+    latency_ms_p50: float
+    latency_ms_p95: float
+    hedge_delay_ms: float # Current deadline before a hedge is sent
+
+class LLMSchedulerMetrics(BaseModel):
+    max_concurrency: int
+    in_flight: int
+    queue_depth: int
+    classes: List[LLMPriorityClassMetrics]
+
+class LLMMetrics(BaseModel):
+    scheduler: LLMSchedulerMetrics
+    backends: List[LLMBackendMetrics]
+    hedges_launched: int
+
+class LLMUsageRollup(BaseModel):
+    story_id: Optional[str] = None # Set when grouped by story
+    user_id: Optional[int] = None # Set when grouped by user
+    prompt_type: PromptType
+    calls: int
+    failures: int
+    prompt_tokens: int
+    completion_tokens: int
+    total_tokens: int
+    cacheable_prefix_tokens: int # Sent as deterministic story/node prefix
+    cached_prompt_tokens: int # Reported by the provider as prefix-cache hits
+    estimated_cost: float # From LLM_COST_PER_1K_* settings
+    avg_queue_wait_ms: float
+    avg_ttft_ms: float
+    avg_latency_ms: float # End to end, including queue wait
+    max_latency_ms: float
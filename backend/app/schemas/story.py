@@ -1,5 +1,6 @@
-from pydantic import BaseModel, Field
-from typing import Any, Dict, List, Optional
+from pydantic import BaseModel, Field, PlainSerializer, SerializationInfo
+from datetime import datetime
+from typing import Annotated, Any, Dict, List, Literal, Optional, Union
 
 # Node and Edge data structures for StoryGraph
 class NodeData(BaseModel):
@@ -36,31 +37,114 @@ class StoryGraph(BaseModel):
     nodes: List[Node]
     edges: List[Edge]
 
+def compact_dump(model: BaseModel, mode: str = "json") -> Dict[str, Any]:
+    """
+    Dumps a graph model without fields left at their defaults (None optionals, edge
+    type/markerEnd/data). Parsing the result restores them, so it round-trips to the
+    same model; clients apply the same defaults (storyService.transformEdgeForFrontend).
+    """
+    return model.model_dump(mode=mode, exclude_defaults=True)
+
+def _compact_graph(graph: StoryGraph, info: SerializationInfo) -> Dict[str, Any]:
+    return compact_dump(graph, info.mode)
+
+# A StoryGraph field that is stored and sent in compact form
+CompactStoryGraph = Annotated[StoryGraph, PlainSerializer(_compact_graph)]
+
+class NodeWithEdges(BaseModel):
+    node: Node
+    edges: List[Edge] # Out-edges of the node
+
+# Graph delta operations (PATCH /stories/{id}/graph). Each touches one node or edge.
+class AddNodeOp(BaseModel):
+    op: Literal["add_node"]
+    node: Node
+
+class UpdateNodeOp(BaseModel):
+    op: Literal["update_node"]
+    id: str
+    type: Optional[str] = None
+    data: Dict[str, Any] = {} # Changed NodeData fields only; merged into the stored data
+
+class MoveNodeOp(BaseModel):
+    op: Literal["move_node"]
+    id: str
+    position: Dict[str, float]
+
+class RemoveNodeOp(BaseModel):
+    op: Literal["remove_node"]
+    id: str # Edges into or out of the node are removed with it
+
+class AddEdgeOp(BaseModel):
+    op: Literal["add_edge"]
+    edge: Edge
+
+class UpdateEdgeOp(BaseModel):
+    op: Literal["update_edge"]
+    id: str
+    changes: Dict[str, Any] # Changed Edge fields only (label, source, target, data, ...)
+
+class RemoveEdgeOp(BaseModel):
+    op: Literal["remove_edge"]
+    id: str
+
+GraphOperation = Annotated[
+    Union[AddNodeOp, UpdateNodeOp, MoveNodeOp, RemoveNodeOp, AddEdgeOp, UpdateEdgeOp, RemoveEdgeOp],
+    Field(discriminator="op"),
+]
+
+class StoryGraphPatch(BaseModel):
+    ops: List[GraphOperation]
+
+class StoryGraphPatchResult(BaseModel):
+    id: str
+    version: int
+    applied: int # Number of operations applied
+    node_count: int
+    edge_count: int
+
 # Story Schemas
 class StoryBase(BaseModel):
     title: str
     description: Optional[str] = None
+    system_prompt: Optional[str] = None # Story-wide LLM instructions
 
 class StoryCreate(StoryBase):
-    graph_json: Optional[StoryGraph] = None # Added graph_json field
+    graph_json: Optional[CompactStoryGraph] = None # Added graph_json field
 
 class StoryUpdate(StoryBase):
     title: Optional[str] = None # Allow partial updates
     description: Optional[str] = None
-    graph_json: Optional[StoryGraph] = None
+    graph_json: Optional[CompactStoryGraph] = None
 
 class StoryInDBBase(StoryBase):
     id: str # Backend generated UUID for the story itself
     user_id: int # Foreign key to User
-    graph_json: StoryGraph
+    graph_json: CompactStoryGraph
 
     class Config:
         from_attributes = True
 
 class Story(StoryInDBBase):
     author_username: Optional[str] = None # To be populated in service layer
+    version: int = 1 # Also sent as the ETag header
     pass
 
+class StorySummary(StoryBase):
+    """Story list entry: metadata only, no graph."""
+    id: str
+    user_id: int
+    version: int = 1
+    author_username: Optional[str] = None
+    updated_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+class StorySummaryPage(BaseModel):
+    items: List[StorySummary]
+    next_cursor: Optional[str] = None # Pass as ?cursor= for the next page; None on the last page
+
 # Game Play Schemas
 class GamePlayRequest(BaseModel):
     current_node_id: str
@@ -88,4 +172,96 @@ class AIGenerationRequest(BaseModel):
     current_graph_json: StoryGraph
     source_node_id: str
     generation_prompt: str
-    num_choices_to_generate: Optional[int] = 2 
\ No newline at end of file
+    num_choices_to_generate: Optional[int] = 2 
+# Publish Schemas
+class StorySnapshot(BaseModel):
+    id: str # Content hash; a snapshot never changes
+    story_id: str
+    title: str
+    description: Optional[str] = None
+    system_prompt: Optional[str] = None
+    graph_json: CompactStoryGraph
+    created_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+class PublishedStoryRef(BaseModel):
+    story_id: str
+    snapshot_id: str
+
+class PublishResult(BaseModel):
+    story_id: str
+    snapshot_id: str
+    prerendered: int # Prompts rendered by this publish
+    unchanged: int # Prompts whose stored content was still current
+    removed: int # Stored content dropped because its node or prompt is gone
+    failed_node_ids: List[str] = []
+
+# Revision history schemas
+class StoryRevisionSummary(BaseModel):
+    revision: int
+    story_version: int # Story version (ETag) the revision ends at
+    kind: str # "keyframe" (whole graph stored) or "delta"
+    changes: int # Deltas: nodes and edges added, changed or removed. Keyframes: all nodes and edges
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None # Later than created_at if autosaves were compacted into it
+
+    class Config:
+        from_attributes = True
+
+class StoryRevisionDiff(BaseModel):
+    from_revision: int
+    to_revision: int
+    nodes_added: List[Node]
+    nodes_changed: List[Node] # As of to_revision
+    nodes_removed: List[str]
+    edges_added: List[Edge]
+    edges_changed: List[Edge]
+    edges_removed: List[str]
+
+
+# Graph validation schemas (app/services/graph_validation.py)
+class GraphIssue(BaseModel):
+    code: str # e.g. "dangling_edge", "unreachable_node"
+    severity: Literal["error", "warning"] # Graphs with errors are not saved
+    message: str
+    node_id: Optional[str] = None
+    edge_id: Optional[str] = None
+
+class StoryValidationReport(BaseModel):
+    story_id: str
+    version: int # Story version (ETag) the report is for
+    complete: bool # False until the full-graph checks ran; only changed elements are checked before
+    issues: List[GraphIssue]
+
+# Bulk export/import (app.services.story_transfer): one record per NDJSON line
+class StoryTransferRecord(StoryBase):
+    id: str
+    graph_json: CompactStoryGraph
+    author_username: Optional[str] = None
+    author_email: Optional[str] = None # Owner on instance-wide imports; API imports belong to the caller
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
+class StoryImportError(BaseModel):
+    line: int
+    error: str
+
+class StoryImportResult(BaseModel):
+    imported: int
+    skipped: int # Stories whose id already exists
+    failed: int
+    errors: List[StoryImportError] # The first failed lines
+
+# Full-text search (app.services.story_search): one hit per matching story or node text
+class StorySearchHit(BaseModel):
+    story_id: str
+    story_title: str
+    node_id: Optional[str] = None # None: the story's title or description matched
+    snippet: str # Matching text with the matched terms in **double asterisks**
+    score: float # Higher is more relevant; comparable within one search only
+
+class StorySearchPage(BaseModel):
+    items: List[StorySearchHit]
+    next_offset: Optional[int] = None # Pass as ?offset= for the next page; None on the last page
@@ -5,7 +5,7 @@ from typing import Annotated
 import uuid
 
 from fastapi import UploadFile, HTTPException, status, Depends
-from sqlalchemy.orm import Session # If saving file metadata to DB
+from sqlalchemy.ext.asyncio import AsyncSession # If saving file metadata to DB
 
 from app.core.config import settings
 from app.schemas import file as file_schema
@@ -21,7 +21,7 @@ ABSOLUTE_IMAGE_UPLOAD_DIR = UPLOAD_DIR_RELATIVE_TO_BACKEND_ROOT / IMAGE_SUBDIR
 ABSOLUTE_IMAGE_UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
 
 async def save_uploaded_image(
-    db: Session, # Placeholder, if you save metadata to DB
+    db: AsyncSession, # Placeholder, if you save metadata to DB
     user_id: int, # Placeholder, if you associate file with user
     uploaded_file: UploadFile
 ) -> file_schema.FileResponse:
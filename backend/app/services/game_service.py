@@ -1,4 +1,4 @@
-from typing import Dict, Any, Optional, Union
+from typing import Awaitable, Callable, Dict, Any, Optional, Union
 from app.schemas.story import (
     Node as StoryNodeSchema, 
     Edge as StoryEdgeSchema, 
@@ -9,11 +9,9 @@ from app.schemas.story import (
     NodeData as StoryNodeDataSchema # For current_node_obj.data.text_content access
 )
 from app.core.config import settings # For OPENAI_API_KEY if used directly
-# Potentially: import openai # If using OpenAI directly
-
-# Placeholder for LLM client initialization if needed
-# if settings.OPENAI_API_KEY:
-#     openai.api_key = settings.OPENAI_API_KEY
+from app.llm import LLMPriority, llm_client
+from app.llm.prompts import AssembledPrompt, NodePromptContext, StoryPromptContext, assemble_prompt
+from app.models.llm_usage import PromptType
 
 # Placeholder for StoryNodeType enum, should be imported from actual definition if it exists
 # For now, using string literals directly as per the Node model's type: str field in story.py
@@ -23,36 +21,108 @@ class StoryNodeType:
     QUESTION = "QUESTION"
     QUESTION_INPUT = "QUESTION_INPUT"
     GAME_END = "GAME_END"
+    END = "END" # What the editor emits for ending nodes
+    AI_STORY = "AI_STORY" # Scene text generated by the LLM from the node's llm_processing_prompt
+
+END_NODE_TYPES = (StoryNodeType.GAME_END, StoryNodeType.END)
+
+# What the LLM is asked to write from a node's own prompt (see GameService.node_instruction)
+SCENE_TASK = "Write the scene text shown to the player."
+ENDING_TASK = "Write the ending message shown to the player."
+
+# (graph, node) -> text rendered ahead of time for that node, if any
+PrerenderedTextResolver = Callable[[StoryGraphSchema, StoryNodeSchema], Awaitable[Optional[str]]]
 
 class GameService:
     def __init__(self):
         # Initialize LLM client here if it's a class instance
         pass
 
-    async def _call_llm(self, prompt: str) -> str:
-        """Placeholder for actual LLM API call."""
-        # This is a placeholder. In a real scenario, you would use an LLM client.
-        # For example, with OpenAI:
-        # import openai
-        # if settings.OPENAI_API_KEY:
-        # openai.api_key = settings.OPENAI_API_KEY
-        # try:
-        # response = await openai.Completion.acreate(
-        # engine="text-davinci-003", 
-        # prompt=prompt,
-        # max_tokens=150
-        # )
-        # return response.choices[0].text.strip()
-        # except Exception as e:
-        # print(f"LLM API call failed: {e}")
-        # return "LLM call failed. Using fallback."
-        
-        # Corrected multi-line f-string for logging/debugging
-        log_message = f"""--- LLM PROMPT (GameService) ---
-{prompt}
---------------------------------"""
-        print(log_message)
-        return f"LLM simulated response to: {prompt[:50]}..."
+    async def _call_llm(
+        self,
+        prompt: Union[str, AssembledPrompt],
+        prompt_type: PromptType,
+        user_id: Optional[int] = None,
+        story_id: Optional[str] = None,
+    ) -> str:
+        """Runs a play-turn prompt through the shared LLM client at interactive priority."""
+        return await llm_client.complete(
+            prompt, prompt_type=prompt_type, priority=LLMPriority.INTERACTIVE, user_id=user_id, story_id=story_id
+        )
+
+    def story_prompt_context(self, story: Any, graph: StoryGraphSchema) -> StoryPromptContext:
+        """Story-level prompt inputs from a story (ORM or schema) and its graph."""
+        start_node = next((n for n in graph.nodes if n.type == StoryNodeType.STORY_START), None)
+        return StoryPromptContext(
+            title=story.title,
+            description=story.description,
+            system_prompt=getattr(story, "system_prompt", None),
+            initial_stats=start_node.data.initial_stats if start_node else None,
+        )
+
+    def node_prompt_context(
+        self, graph: StoryGraphSchema, node: StoryNodeSchema, instruction: Optional[str] = None
+    ) -> NodePromptContext:
+        # Sorted by edge id, not list position, so editor reordering does not change the prompt
+        outgoing = sorted((e for e in graph.edges if str(e.source) == str(node.id)), key=lambda e: str(e.id))
+        return NodePromptContext(
+            node_type=node.type,
+            label=node.data.label,
+            text_content=node.data.text_content,
+            character_name=node.data.characterName,
+            instruction=instruction,
+            choices=[e.label for e in outgoing if e.label],
+        )
+
+    def build_prompt(
+        self,
+        story_context: StoryPromptContext,
+        graph: StoryGraphSchema,
+        node: StoryNodeSchema,
+        *,
+        instruction: Optional[str] = None,
+        play_data: Optional[PlayTurnRequestSchema] = None,
+        task: Optional[str] = None,
+    ) -> AssembledPrompt:
+        """Assembles a prefix-stable prompt: story, then node, then this player's session."""
+        return assemble_prompt(
+            story_context,
+            self.node_prompt_context(graph, node, instruction),
+            stats=play_data.current_stats if play_data else None,
+            user_input=play_data.user_input if play_data else None,
+            task=task,
+        )
+
+    def node_instruction(self, node: StoryNodeSchema) -> Optional[str]:
+        """
+        The node's own LLM prompt, if it has one: ending_message_prompt for END nodes,
+        llm_processing_prompt for AI_STORY nodes.
+        """
+        if node.type in END_NODE_TYPES:
+            instruction = node.data.ending_message_prompt
+        elif node.type == StoryNodeType.AI_STORY:
+            instruction = node.data.llm_processing_prompt
+        else:
+            return None
+        return instruction if instruction and instruction.strip() else None
+
+    async def render_node_text(
+        self, story: Any, graph: StoryGraphSchema, node: StoryNodeSchema, play_data: PlayTurnRequestSchema, user_id: Optional[int]
+    ) -> Optional[str]:
+        """
+        Generates the node's text for this player from its own prompt, at interactive
+        priority, or None if the node has no prompt. `story` is a CompiledStory.
+        """
+        instruction = self.node_instruction(node)
+        if instruction is None:
+            return None
+        prompt = self.build_prompt(
+            self.story_prompt_context(story, graph), graph, node,
+            instruction=instruction,
+            play_data=play_data,
+            task=ENDING_TASK if node.type in END_NODE_TYPES else SCENE_TASK,
+        )
+        return await self._call_llm(prompt, PromptType.NODE_GENERATION, user_id=user_id, story_id=story.story_id)
 
     def _find_node_by_id(self, graph: StoryGraphSchema, node_id: str) -> Optional[StoryNodeSchema]:
         # Ensure node_id is a string for comparison, as model IDs might be UUIDs or ints then cast to str
@@ -70,7 +140,19 @@ class GameService:
                 return edge
         return None
 
-    async def process_turn(self, story_graph: Union[StoryGraphSchema, dict], play_data: PlayTurnRequestSchema) -> PlayTurnResponseSchema:
+    async def process_turn(
+        self,
+        story_graph: Union[StoryGraphSchema, dict],
+        play_data: PlayTurnRequestSchema,
+        prerendered_text: Optional[PrerenderedTextResolver] = None,
+        story: Any = None,
+        user_id: Optional[int] = None,
+    ) -> PlayTurnResponseSchema:
+        """
+        Moves the player along the chosen (or only) edge. The next node's text comes
+        from, in order: content pre-rendered at publish, a generation from the node's
+        own prompt for this player (if `story`, a CompiledStory, is given), the node's text.
+        """
         if isinstance(story_graph, dict):
             # If story_graph is a dict, parse it into StoryGraphSchema
             # This ensures that we are working with Pydantic models downstream
@@ -200,9 +282,21 @@ class GameService:
             )
 
         # Check if the next node is a game end node
-        is_game_over = (next_node_obj.type == StoryNodeType.GAME_END)
+        is_game_over = (next_node_obj.type in END_NODE_TYPES)
         final_msg = (next_node_obj.data.text_content if hasattr(next_node_obj.data, 'text_content') and next_node_obj.data.text_content 
                      else "") if is_game_over else ""
+
+        # Content rendered at publish time (player-independent prompts) costs no LLM call here
+        next_node_data = NodeDataResponseSchema(**next_node_obj.data.model_dump())
+        rendered = await prerendered_text(graph_model, next_node_obj) if prerendered_text else None
+        if not rendered and story is not None:
+            # Player-dependent (or not yet pre-rendered) prompt: generate it now, ahead of batch work
+            rendered = await self.render_node_text(story, graph_model, next_node_obj, play_data, user_id)
+        if rendered:
+            if is_game_over:
+                final_msg = rendered
+            else:
+                next_node_data.text_content = rendered
         
         # If GAME_END node has no further text_content, provide a generic one
         if is_game_over and not final_msg:
@@ -211,7 +305,7 @@ class GameService:
 
         return PlayTurnResponseSchema(
             next_node_id=str(next_node_obj.id),
-            next_node_data=NodeDataResponseSchema(**next_node_obj.data.model_dump()),
+            next_node_data=next_node_data,
             updated_stats=current_stats,
             is_game_over=is_game_over,
             final_message=final_msg
@@ -0,0 +1,192 @@
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from pydantic import ValidationError
+
+from app.schemas import story as story_schema
+
+class GraphPatchError(Exception):
+    def __init__(self, index: int, message: str):
+        super().__init__(f"Operation {index}: {message}")
+        self.index = index
+
+class GraphDraft:
+    """
+    What apply_operations needs from a graph store: lookups and single-element
+    writes of nodes and edges, as stored dicts. GraphDraft itself is the in-memory
+    implementation used for JSON storage; graph_store.NormalizedGraphDraft applies
+    the same operations to node/edge rows.
+    """
+    def __init__(self, graph_json: Dict[str, Any]):
+        # Copy-on-write: the lists are copied (shallowly) and only touched elements
+        # are replaced, so untouched nodes are neither re-validated nor re-encoded.
+        self.nodes: List[Dict[str, Any]] = list(graph_json.get("nodes", []))
+        self.edges: List[Dict[str, Any]] = list(graph_json.get("edges", []))
+        self._reindex()
+
+    def _reindex(self) -> None:
+        self.node_index = {str(n["id"]): i for i, n in enumerate(self.nodes)}
+        self.edge_index = {str(e["id"]): i for i, e in enumerate(self.edges)}
+
+    def find_node(self, node_id: str) -> Any:
+        index = self.node_index.get(node_id)
+        return self.nodes[index] if index is not None else None
+
+    def find_edge(self, edge_id: str) -> Any:
+        index = self.edge_index.get(edge_id)
+        return self.edges[index] if index is not None else None
+
+    def has_nodes(self, node_ids: List[str]) -> bool:
+        return all(node_id in self.node_index for node_id in node_ids)
+
+    def add_node(self, node: Dict[str, Any]) -> None:
+        self.node_index[node["id"]] = len(self.nodes)
+        self.nodes.append(node)
+
+    def replace_node(self, node: Dict[str, Any]) -> None:
+        self.nodes[self.node_index[node["id"]]] = node
+
+    def remove_node(self, node_id: str) -> List[str]:
+        """Removes the node and every edge into or out of it; returns the ids of those edges."""
+        self.nodes = [n for n in self.nodes if str(n["id"]) != node_id]
+        removed = [str(e["id"]) for e in self.edges if node_id in (str(e["source"]), str(e["target"]))]
+        self.edges = [e for e in self.edges if str(e["source"]) != node_id and str(e["target"]) != node_id]
+        self._reindex()
+        return removed
+
+    def add_edge(self, edge: Dict[str, Any]) -> None:
+        self.edge_index[edge["id"]] = len(self.edges)
+        self.edges.append(edge)
+
+    def replace_edge(self, edge: Dict[str, Any]) -> None:
+        self.edges[self.edge_index[edge["id"]]] = edge
+
+    def remove_edge(self, edge_id: str) -> None:
+        del self.edges[self.edge_index[edge_id]]
+        self._reindex()
+
+    def counts(self) -> Tuple[int, int]:
+        return len(self.nodes), len(self.edges)
+
+    def as_json(self) -> Dict[str, Any]:
+        return {"nodes": self.nodes, "edges": self.edges}
+
+class GraphChanges:
+    """
+    What apply_operations wrote and removed, per element list ("nodes", "edges"),
+    so a patch can be recorded, checked and indexed without reading the graph.
+    Elements added and removed again by the same patch are left out.
+    """
+    def __init__(self) -> None:
+        # Element as last written, by id, in order of first write since its last removal
+        self.written: Dict[str, Dict[str, Dict[str, Any]]] = {"nodes": {}, "edges": {}}
+        # Ids of elements that existed before the patch and were removed (ordered set)
+        self.removed: Dict[str, Dict[str, None]] = {"nodes": {}, "edges": {}}
+        self._added: Dict[str, Set[str]] = {"nodes": set(), "edges": set()}
+
+    def add(self, kind: str, element: Dict[str, Any]) -> None:
+        self._added[kind].add(str(element["id"]))
+        self.written[kind][str(element["id"])] = element
+
+    def replace(self, kind: str, element: Dict[str, Any]) -> None:
+        self.written[kind][str(element["id"])] = element
+
+    def remove(self, kind: str, element_id: str) -> None:
+        self.written[kind].pop(element_id, None)
+        if element_id in self._added[kind]:
+            self._added[kind].discard(element_id)
+        else:
+            self.removed[kind][element_id] = None
+
+    def node(self, node_id: str) -> Optional[Dict[str, Any]]:
+        """The node as the patch left it; None if the patch did not write it or removed it."""
+        return self.written["nodes"].get(node_id)
+
+    def revision_delta(self) -> Dict[str, Any]:
+        """The changes in revision_service's delta format: removals, then writes in draft order."""
+        delta: Dict[str, Any] = {}
+        for kind in ("nodes", "edges"):
+            element_delta: Dict[str, Any] = {}
+            if self.removed[kind]:
+                element_delta["remove"] = list(self.removed[kind])
+            if self.written[kind]:
+                element_delta["set"] = list(self.written[kind].values())
+            if element_delta:
+                delta[kind] = element_delta
+        return delta
+
+def _validated(index: int, model: Any, value: Dict[str, Any]) -> Dict[str, Any]:
+    try:
+        return story_schema.compact_dump(model.model_validate(value))
+    except ValidationError as e:
+        raise GraphPatchError(index, str(e))
+
+def _existing(index: int, kind: str, element_id: str, element: Any) -> Any:
+    if element is None:
+        raise GraphPatchError(index, f"{kind} {element_id} does not exist")
+    return element
+
+def _check_endpoints(index: int, draft: GraphDraft, edge: Dict[str, Any]) -> None:
+    for end in ("source", "target"):
+        if not draft.has_nodes([str(edge[end])]):
+            raise GraphPatchError(index, f"edge {edge['id']} {end} {edge[end]} does not exist")
+
+def apply_operations(draft: GraphDraft, ops: List[story_schema.GraphOperation]) -> GraphChanges:
+    """
+    Applies `ops` in order to `draft` and returns what they changed. Only the nodes
+    and edges an operation touches are read, validated and written, and no
+    operation can duplicate an id or leave an edge without its nodes. Raises
+    GraphPatchError on the first invalid operation; the caller discards the draft
+    (or rolls back) in that case.
+    """
+    changes = GraphChanges()
+    for index, op in enumerate(ops):
+        if isinstance(op, story_schema.AddNodeOp):
+            if draft.find_node(op.node.id) is not None:
+                raise GraphPatchError(index, f"node {op.node.id} already exists")
+            node = story_schema.compact_dump(op.node)
+            draft.add_node(node)
+            changes.add("nodes", node)
+        elif isinstance(op, story_schema.UpdateNodeOp):
+            node = _existing(index, "node", op.id, draft.find_node(op.id))
+            updated = {**node, "data": {**node["data"], **op.data}}
+            if op.type is not None:
+                updated["type"] = op.type
+            node = _validated(index, story_schema.Node, updated)
+            draft.replace_node(node)
+            changes.replace("nodes", node)
+        elif isinstance(op, story_schema.MoveNodeOp):
+            node = _existing(index, "node", op.id, draft.find_node(op.id))
+            node = {**node, "position": op.position}
+            draft.replace_node(node)
+            changes.replace("nodes", node)
+        elif isinstance(op, story_schema.RemoveNodeOp):
+            _existing(index, "node", op.id, draft.find_node(op.id))
+            for edge_id in draft.remove_node(op.id):
+                changes.remove("edges", edge_id)
+            changes.remove("nodes", op.id)
+        elif isinstance(op, story_schema.AddEdgeOp):
+            if draft.find_edge(op.edge.id) is not None:
+                raise GraphPatchError(index, f"edge {op.edge.id} already exists")
+            edge = story_schema.compact_dump(op.edge)
+            _check_endpoints(index, draft, edge)
+            draft.add_edge(edge)
+            changes.add("edges", edge)
+        elif isinstance(op, story_schema.UpdateEdgeOp):
+            edge = _existing(index, "edge", op.id, draft.find_edge(op.id))
+            edge = _validated(index, story_schema.Edge, {**edge, **op.changes, "id": op.id})
+            _check_endpoints(index, draft, edge)
+            draft.replace_edge(edge)
+            changes.replace("edges", edge)
+        elif isinstance(op, story_schema.RemoveEdgeOp):
+            _existing(index, "edge", op.id, draft.find_edge(op.id))
+            draft.remove_edge(op.id)
+            changes.remove("edges", op.id)
+    return changes
+
+def data_node_ids(ops: List[story_schema.GraphOperation]) -> Set[str]:
+    """Ids of the nodes whose data `ops` may change: added, updated or removed nodes."""
+    return {
+        op.node.id if isinstance(op, story_schema.AddNodeOp) else op.id
+        for op in ops
+        if isinstance(op, (story_schema.AddNodeOp, story_schema.UpdateNodeOp, story_schema.RemoveNodeOp))
+    }
@@ -0,0 +1,133 @@
+"""
+Rewrites story graphs still stored as legacy JSON text in the binary graph codec
+(app.db.graph_codec). Runs in the background while the app is up; can also be run
+to completion, with a per-story report (from backend/):
+    python -m app.services.graph_reencoder [--verbose]
+"""
+import argparse
+import asyncio
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import LargeBinary, bindparam, type_coerce, update
+
+from app.core.config import settings
+from app.db.graph_codec import CodecMeasurement, decode_graph, is_legacy, measure
+from app.models.story_graph import StoryGraphRecord
+
+class GraphReencoder:
+    """
+    Walks story_graphs in story_id order, GRAPH_REENCODE_BATCH rows at a time, and
+    re-encodes the legacy rows. Saves always write the binary format, so once a full
+    pass is done no legacy rows remain and the worker stops.
+    """
+    def __init__(self, batch_size: int, interval_seconds: float):
+        self.batch_size = batch_size
+        self.interval_seconds = interval_seconds
+        self.done = False
+        self._after = ""
+        self._task: Optional[asyncio.Task] = None
+        self.stories = 0
+        self.json_bytes = 0
+        self.encoded_bytes = 0
+        self.encode_ms = 0.0
+        self.decode_ms = 0.0
+
+    def _record(self, measurement: CodecMeasurement) -> None:
+        self.stories += 1
+        self.json_bytes += measurement.json_bytes
+        self.encoded_bytes += measurement.encoded_bytes
+        self.encode_ms += measurement.encode_ms
+        self.decode_ms += measurement.decode_ms
+
+    def reencode_batch_sync(self) -> List[Tuple[str, CodecMeasurement]]:
+        """Re-encodes the legacy rows of the next batch. Returns (story_id, measurement) per re-encoded story."""
+        # Imported here, as in LLMUsageAccountant: the engine is not needed at import time
+        from app.db.session import SessionLocal
+
+        table = StoryGraphRecord.__table__
+        raw = type_coerce(table.c.graph_json, LargeBinary) # The stored bytes, not decoded
+        reencoded = []
+        db = SessionLocal()
+        try:
+            rows = db.execute(
+                table.select()
+                .with_only_columns(table.c.story_id, raw)
+                .where(table.c.story_id > self._after)
+                .order_by(table.c.story_id)
+                .limit(self.batch_size)
+            ).all()
+            if not rows:
+                self.done = True
+                return reencoded
+            self._after = rows[-1][0]
+            for story_id, data in rows:
+                if not is_legacy(data):
+                    continue
+                encoded, measurement = measure(decode_graph(data))
+                measurement.json_bytes = len(data)
+                # Only if unchanged since it was read: a concurrent save already wrote the new format
+                result = db.execute(
+                    update(table)
+                    .where(table.c.story_id == story_id, raw == bytes(data))
+                    .values(graph_json=bindparam("encoded", encoded, type_=LargeBinary))
+                )
+                if result.rowcount == 1:
+                    self._record(measurement)
+                    reencoded.append((story_id, measurement))
+            db.commit()
+        finally:
+            db.close()
+        return reencoded
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "done": self.done,
+            "stories": self.stories,
+            "json_bytes": self.json_bytes,
+            "encoded_bytes": self.encoded_bytes,
+            "saved_bytes": self.json_bytes - self.encoded_bytes,
+            "avg_encode_ms": self.encode_ms / self.stories if self.stories else 0.0,
+            "avg_decode_ms": self.decode_ms / self.stories if self.stories else 0.0,
+        }
+
+    async def _run(self) -> None:
+        while not self.done:
+            try:
+                await asyncio.to_thread(self.reencode_batch_sync)
+            except Exception as e:
+                # Keep going; rows of a failed batch stay legacy and remain readable
+                print(f"GraphReencoder: failed to re-encode batch after {self._after!r}: {e}")
+            await asyncio.sleep(self.interval_seconds)
+        print(f"GraphReencoder: done, {self.stats()}")
+
+    def start(self) -> None:
+        if self._task is None and not self.done:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+graph_reencoder = GraphReencoder(
+    batch_size=settings.GRAPH_REENCODE_BATCH,
+    interval_seconds=settings.GRAPH_REENCODE_INTERVAL_SECONDS,
+)
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Re-encode legacy JSON story graphs in the binary graph codec.")
+    parser.add_argument("--verbose", action="store_true", help="Print bytes and encode/decode time per story")
+    args = parser.parse_args()
+
+    while not graph_reencoder.done:
+        for story_id, m in graph_reencoder.reencode_batch_sync():
+            if args.verbose:
+                print(
+                    f"{story_id}  {m.json_bytes:8d} -> {m.encoded_bytes:8d} bytes  "
+                    f"(saved {m.saved_bytes})  encode {m.encode_ms:.2f} ms  decode {m.decode_ms:.2f} ms"
+                )
+    print(graph_reencoder.stats())
+
+if __name__ == "__main__":
+    main()
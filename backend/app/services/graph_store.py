@@ -0,0 +1,242 @@
+"""
+Story graph storage. A story's graph is stored either as one JSON document in
+story_graphs ("json") or as one row per node and edge in story_nodes/story_edges
+("normalized", keyed by (story_id, node_id) / (story_id, edge_id)). Story.graph_json
+reads and writes both; this module adds what only rows make cheap: loading a single
+node or a subgraph, and applying editor operations without rewriting the graph.
+
+Convert existing stories (from backend/):
+    python -m app.services.graph_store --to normalized [--story-id ID ...]
+"""
+import argparse
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import func, or_
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import set_committed_value
+
+from app.core.config import settings
+from app.models.story import GRAPH_STORAGE_MODES, GRAPH_STORAGE_NORMALIZED, Story
+from app.models.story_edge import StoryEdge
+from app.models.story_graph import StoryGraphRecord
+from app.models.story_node import StoryNode
+from app.schemas import story as story_schema
+from app.services.graph_patch import GraphChanges, GraphDraft, apply_operations
+
+def new_story_graph_storage() -> str:
+    """Storage mode for newly created stories (STORY_GRAPH_STORAGE)."""
+    if settings.STORY_GRAPH_STORAGE not in GRAPH_STORAGE_MODES:
+        raise ValueError(f"STORY_GRAPH_STORAGE must be one of {GRAPH_STORAGE_MODES}")
+    return settings.STORY_GRAPH_STORAGE
+
+# Assembler: graph dicts (as stored in graph_json) from node/edge rows
+
+def load_graph(db: Session, story_id: str) -> Dict[str, Any]:
+    nodes = db.query(StoryNode).filter(StoryNode.story_id == story_id).order_by(StoryNode.sort_index).all()
+    edges = db.query(StoryEdge).filter(StoryEdge.story_id == story_id).order_by(StoryEdge.sort_index).all()
+    return {"nodes": [row.as_node() for row in nodes], "edges": [row.as_edge() for row in edges]}
+
+def load_node(db: Session, story_id: str, node_id: str) -> Optional[Dict[str, Any]]:
+    """The node and its out-edges (ix_story_edges_story_source), or None if it does not exist."""
+    node = db.get(StoryNode, (story_id, node_id))
+    if node is None:
+        return None
+    edges = (
+        db.query(StoryEdge)
+        .filter(StoryEdge.story_id == story_id, StoryEdge.source == node_id)
+        .order_by(StoryEdge.sort_index)
+        .all()
+    )
+    return {"node": node.as_node(), "edges": [row.as_edge() for row in edges]}
+
+def load_subgraph(db: Session, story_id: str, node_ids: Iterable[str]) -> Dict[str, Any]:
+    """The given nodes (unknown ids are skipped) and the edges between them."""
+    node_ids = list(node_ids)
+    nodes = (
+        db.query(StoryNode)
+        .filter(StoryNode.story_id == story_id, StoryNode.node_id.in_(node_ids))
+        .order_by(StoryNode.sort_index)
+        .all()
+    )
+    edges = (
+        db.query(StoryEdge)
+        .filter(StoryEdge.story_id == story_id, StoryEdge.source.in_(node_ids), StoryEdge.target.in_(node_ids))
+        .order_by(StoryEdge.sort_index)
+        .all()
+    )
+    return {"nodes": [row.as_node() for row in nodes], "edges": [row.as_edge() for row in edges]}
+
+def current_graph(db: Session, story: Story) -> Dict[str, Any]:
+    """The story's graph including writes flushed but not yet committed (e.g. by apply_graph_ops)."""
+    if story.is_normalized:
+        return load_graph(db, story.id)
+    return story.graph_json or {"nodes": [], "edges": []}
+
+def _document(db: Session, story_id: str) -> Dict[str, Any]:
+    record = db.get(StoryGraphRecord, story_id)
+    return record.graph_json if record is not None and record.graph_json else {"nodes": [], "edges": []}
+
+def read_node(db: Session, story_id: str, graph_storage: str, node_id: str) -> Optional[Dict[str, Any]]:
+    """load_node for a story in either storage mode."""
+    if graph_storage == GRAPH_STORAGE_NORMALIZED:
+        return load_node(db, story_id, node_id)
+    graph = _document(db, story_id)
+    node = next((n for n in graph.get("nodes", []) if str(n["id"]) == node_id), None)
+    if node is None:
+        return None
+    return {"node": node, "edges": [e for e in graph.get("edges", []) if str(e["source"]) == node_id]}
+
+def read_subgraph(db: Session, story_id: str, graph_storage: str, node_ids: Iterable[str]) -> Dict[str, Any]:
+    """load_subgraph for a story in either storage mode."""
+    if graph_storage == GRAPH_STORAGE_NORMALIZED:
+        return load_subgraph(db, story_id, node_ids)
+    wanted = set(node_ids)
+    graph = _document(db, story_id)
+    return {
+        "nodes": [n for n in graph.get("nodes", []) if str(n["id"]) in wanted],
+        "edges": [
+            e for e in graph.get("edges", []) if str(e["source"]) in wanted and str(e["target"]) in wanted
+        ],
+    }
+
+class NormalizedGraphDraft(GraphDraft):
+    """
+    GraphDraft over a story's node/edge rows: each operation reads and writes only
+    the rows it touches. Writes are flushed as they are made (so later operations of
+    the same patch see them) but not committed; roll back to discard them.
+    """
+    def __init__(self, db: Session, story_id: str):
+        self.db = db
+        self.story_id = story_id
+        self._next_sort_index: Dict[Any, int] = {}
+
+    def _node_row(self, node_id: str) -> Optional[StoryNode]:
+        return self.db.get(StoryNode, (self.story_id, node_id))
+
+    def _edge_row(self, edge_id: str) -> Optional[StoryEdge]:
+        return self.db.get(StoryEdge, (self.story_id, edge_id))
+
+    def _append_index(self, model: Any) -> int:
+        """Sort index after the current last row, so appended elements assemble last."""
+        if model not in self._next_sort_index:
+            last = self.db.query(func.max(model.sort_index)).filter(model.story_id == self.story_id).scalar()
+            self._next_sort_index[model] = -1 if last is None else last
+        self._next_sort_index[model] += 1
+        return self._next_sort_index[model]
+
+    def _write(self, row: Any) -> None:
+        row.story_id = self.story_id
+        self.db.add(row)
+        self.db.flush()
+
+    def find_node(self, node_id: str) -> Any:
+        row = self._node_row(node_id)
+        return row.as_node() if row is not None else None
+
+    def find_edge(self, edge_id: str) -> Any:
+        row = self._edge_row(edge_id)
+        return row.as_edge() if row is not None else None
+
+    def has_nodes(self, node_ids: List[str]) -> bool:
+        return all(self._node_row(node_id) is not None for node_id in node_ids)
+
+    def add_node(self, node: Dict[str, Any]) -> None:
+        self._write(StoryNode.synced(None, node, self._append_index(StoryNode)))
+
+    def replace_node(self, node: Dict[str, Any]) -> None:
+        row = self._node_row(node["id"])
+        self._write(StoryNode.synced(row, node, row.sort_index))
+
+    def remove_node(self, node_id: str) -> List[str]:
+        self.db.delete(self._node_row(node_id))
+        edges = self.db.query(StoryEdge).filter(
+            StoryEdge.story_id == self.story_id,
+            or_(StoryEdge.source == node_id, StoryEdge.target == node_id),
+        )
+        removed = [edge_id for (edge_id,) in edges.with_entities(StoryEdge.edge_id)]
+        if removed:
+            edges.delete(synchronize_session="evaluate")
+        self.db.flush()
+        return removed
+
+    def add_edge(self, edge: Dict[str, Any]) -> None:
+        self._write(StoryEdge.synced(None, edge, self._append_index(StoryEdge)))
+
+    def replace_edge(self, edge: Dict[str, Any]) -> None:
+        row = self._edge_row(edge["id"])
+        self._write(StoryEdge.synced(row, edge, row.sort_index))
+
+    def remove_edge(self, edge_id: str) -> None:
+        self.db.delete(self._edge_row(edge_id))
+        self.db.flush()
+
+    def counts(self) -> Tuple[int, int]:
+        nodes = self.db.query(func.count()).select_from(StoryNode).filter(StoryNode.story_id == self.story_id).scalar()
+        edges = self.db.query(func.count()).select_from(StoryEdge).filter(StoryEdge.story_id == self.story_id).scalar()
+        return nodes, edges
+
+    def as_json(self) -> Dict[str, Any]:
+        return load_graph(self.db, self.story_id)
+
+def apply_graph_ops(
+    db: Session, story: Story, ops: List[story_schema.GraphOperation]
+) -> Tuple[GraphChanges, int, int]:
+    """
+    Applies editor operations to the story's graph without committing, and returns
+    what they changed with the resulting node and edge counts. Normalized stories
+    are changed row by row; JSON stories get a new document. Raises
+    GraphPatchError; roll back then.
+    """
+    draft = NormalizedGraphDraft(db, story.id) if story.is_normalized else GraphDraft(story.graph_json or {})
+    changes = apply_operations(draft, ops)
+    if not story.is_normalized:
+        story.graph_json = draft.as_json()
+    return (changes, *draft.counts())
+
+def convert_story_graph_storage(db: Session, story: Story, graph_storage: str) -> bool:
+    """Moves the story's graph to `graph_storage` (not committed). False if it is already stored that way."""
+    if graph_storage not in GRAPH_STORAGE_MODES:
+        raise ValueError(f"graph storage must be one of {GRAPH_STORAGE_MODES}")
+    if story.graph_storage == graph_storage:
+        return False
+    graph_json = story.graph_json or {"nodes": [], "edges": []}
+    # A storage change is not an edit: keep updated_at (and with it the story's list position) and version
+    db.query(Story).filter(Story.id == story.id).update(
+        {Story.graph_storage: graph_storage, Story.updated_at: Story.updated_at}, synchronize_session=False
+    )
+    set_committed_value(story, "graph_storage", graph_storage)
+    if graph_storage == GRAPH_STORAGE_NORMALIZED:
+        story.graph = None
+    else:
+        story.node_rows = []
+        story.edge_rows = []
+    story.graph_json = graph_json
+    return True
+
+def main() -> None:
+    from app.db.session import SessionLocal
+
+    parser = argparse.ArgumentParser(description="Convert stories between graph storage modes.")
+    parser.add_argument("--to", choices=GRAPH_STORAGE_MODES, required=True)
+    parser.add_argument("--story-id", action="append", default=None, help="Story to convert (repeatable); default: all")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        query = db.query(Story.id)
+        if args.story_id:
+            query = query.filter(Story.id.in_(args.story_id))
+        story_ids = [story_id for (story_id,) in query.all()]
+        converted = 0
+        for story_id in story_ids:
+            # One story per transaction: memory stays bounded and a failure loses one conversion
+            if convert_story_graph_storage(db, db.get(Story, story_id), args.to):
+                converted += 1
+            db.commit()
+            db.expunge_all()
+        print(f"Converted {converted} of {len(story_ids)} stories to {args.to} graph storage.")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()
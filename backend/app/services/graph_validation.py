@@ -0,0 +1,172 @@
+"""
+Structural checks of stored story graphs (dicts as in graph_json).
+
+Errors break the graph itself (duplicate ids, edges to nodes that do not exist)
+and are rejected on save. Warnings are authoring problems the editor shows while
+a story is being written (no or several STORY_START nodes, nodes the start cannot
+reach, type-specific fields left empty); the graph is still saved.
+
+Element checks look at given nodes and edges only, so a save checks just what it
+changed (check_changes). The graph-wide checks run in check_graph, which
+graph_validation_worker runs in the background after each save.
+"""
+from typing import Any, Dict, Iterable, List, Set
+
+from app.schemas import story as story_schema
+from app.services.game_service import StoryNodeType
+
+SEVERITY_ERROR = "error"
+SEVERITY_WARNING = "warning"
+
+# Element checks: they depend only on the element and the ids around it
+ISSUE_DUPLICATE_NODE_ID = "duplicate_node_id"
+ISSUE_DUPLICATE_EDGE_ID = "duplicate_edge_id"
+ISSUE_DANGLING_EDGE = "dangling_edge"
+ISSUE_MISSING_FIELD = "missing_field"
+ELEMENT_ISSUES = (ISSUE_DUPLICATE_NODE_ID, ISSUE_DUPLICATE_EDGE_ID, ISSUE_DANGLING_EDGE, ISSUE_MISSING_FIELD)
+# Graph-wide checks
+ISSUE_MISSING_START = "missing_start"
+ISSUE_MULTIPLE_STARTS = "multiple_starts"
+ISSUE_UNREACHABLE_NODE = "unreachable_node"
+
+# Node data fields a node type cannot be played (or pre-rendered) without
+REQUIRED_FIELDS: Dict[str, tuple] = {
+    StoryNodeType.QUESTION_INPUT: ("inputPrompt",),
+    StoryNodeType.AI_STORY: ("llm_processing_prompt",),
+}
+
+def _issue(code: str, severity: str, message: str, **element_ids: str) -> story_schema.GraphIssue:
+    return story_schema.GraphIssue(code=code, severity=severity, message=message, **element_ids)
+
+def _id_counts(elements: List[Dict[str, Any]]) -> Dict[str, int]:
+    counts: Dict[str, int] = {}
+    for element in elements:
+        counts[str(element["id"])] = counts.get(str(element["id"]), 0) + 1
+    return counts
+
+def _missing_fields(node: Dict[str, Any]) -> List[story_schema.GraphIssue]:
+    issues = []
+    for field in REQUIRED_FIELDS.get(node.get("type"), ()):
+        value = node.get("data", {}).get(field)
+        if not isinstance(value, str) or not value.strip():
+            issues.append(_issue(
+                ISSUE_MISSING_FIELD, SEVERITY_WARNING,
+                f"{node['type']} node {node['id']} needs {field}", node_id=str(node["id"]),
+            ))
+    return issues
+
+def check_nodes(nodes: Iterable[Dict[str, Any]]) -> List[story_schema.GraphIssue]:
+    """
+    Element checks of nodes written through graph_patch.apply_operations, which
+    already rejects duplicate ids and dangling edges: only their own fields remain.
+    """
+    return [issue for node in nodes for issue in _missing_fields(node)]
+
+def check_elements(
+    graph: Dict[str, Any], node_ids: Iterable[str], edge_ids: Iterable[str]
+) -> List[story_schema.GraphIssue]:
+    """Element checks of the given nodes and edges of `graph` (ids not in it are skipped)."""
+    nodes, edges = graph.get("nodes", []), graph.get("edges", [])
+    node_counts, edge_counts = _id_counts(nodes), _id_counts(edges)
+    node_ids, edge_ids = set(node_ids), set(edge_ids)
+    issues = []
+    reported: Set[str] = set()
+    for node in nodes:
+        node_id = str(node["id"])
+        if node_id not in node_ids:
+            continue
+        if node_counts[node_id] > 1 and node_id not in reported:
+            reported.add(node_id)
+            issues.append(_issue(
+                ISSUE_DUPLICATE_NODE_ID, SEVERITY_ERROR,
+                f"{node_counts[node_id]} nodes have id {node_id}", node_id=node_id,
+            ))
+        issues.extend(_missing_fields(node))
+    reported.clear()
+    for edge in edges:
+        edge_id = str(edge["id"])
+        if edge_id not in edge_ids:
+            continue
+        if edge_counts[edge_id] > 1 and edge_id not in reported:
+            reported.add(edge_id)
+            issues.append(_issue(
+                ISSUE_DUPLICATE_EDGE_ID, SEVERITY_ERROR,
+                f"{edge_counts[edge_id]} edges have id {edge_id}", edge_id=edge_id,
+            ))
+        for end in ("source", "target"):
+            if str(edge[end]) not in node_counts:
+                issues.append(_issue(
+                    ISSUE_DANGLING_EDGE, SEVERITY_ERROR,
+                    f"edge {edge_id} {end} {edge[end]} does not exist", edge_id=edge_id,
+                ))
+    return issues
+
+def changed_element_ids(old: Dict[str, Any], new: Dict[str, Any]) -> Dict[str, Set[str]]:
+    """
+    Ids of the elements a save from `old` to `new` can have broken: nodes and
+    edges added or changed, and edges into or out of removed nodes.
+    """
+    def changed(key: str) -> Set[str]:
+        before = {str(e["id"]): e for e in old.get(key, [])}
+        ids = {str(e["id"]) for e in new.get(key, []) if before.get(str(e["id"])) != e}
+        # An exact copy of an element is a change too: its id is now duplicated
+        before_counts = _id_counts(old.get(key, []))
+        return ids | {i for i, count in _id_counts(new.get(key, [])).items() if count > before_counts.get(i, 0)}
+
+    node_ids, edge_ids = changed("nodes"), changed("edges")
+    new_node_ids = {str(n["id"]) for n in new.get("nodes", [])}
+    removed = {str(n["id"]) for n in old.get("nodes", [])} - new_node_ids
+    if removed:
+        edge_ids |= {
+            str(e["id"]) for e in new.get("edges", []) if str(e["source"]) in removed or str(e["target"]) in removed
+        }
+    return {"nodes": node_ids, "edges": edge_ids}
+
+def check_changes(old: Dict[str, Any], new: Dict[str, Any]) -> List[story_schema.GraphIssue]:
+    """Element checks of what changed from `old` to `new` (see changed_element_ids)."""
+    changed = changed_element_ids(old, new)
+    return check_elements(new, changed["nodes"], changed["edges"])
+
+def _graph_issues(graph: Dict[str, Any]) -> List[story_schema.GraphIssue]:
+    nodes, edges = graph.get("nodes", []), graph.get("edges", [])
+    starts = [str(n["id"]) for n in nodes if n.get("type") == StoryNodeType.STORY_START]
+    if not starts:
+        return [_issue(ISSUE_MISSING_START, SEVERITY_WARNING, "The story has no STORY_START node")]
+    issues = []
+    if len(starts) > 1:
+        issues.append(_issue(
+            ISSUE_MULTIPLE_STARTS, SEVERITY_WARNING,
+            f"The story has {len(starts)} STORY_START nodes; play begins at {starts[0]}",
+        ))
+        issues.extend(
+            _issue(ISSUE_MULTIPLE_STARTS, SEVERITY_WARNING, f"Extra STORY_START node {node_id}", node_id=node_id)
+            for node_id in starts[1:]
+        )
+    # Play starts at the first STORY_START node (GameService.story_prompt_context)
+    out_edges: Dict[str, List[str]] = {}
+    for edge in edges:
+        out_edges.setdefault(str(edge["source"]), []).append(str(edge["target"]))
+    reached = {starts[0]}
+    frontier = [starts[0]]
+    while frontier:
+        for target in out_edges.get(frontier.pop(), []):
+            if target not in reached:
+                reached.add(target)
+                frontier.append(target)
+    issues.extend(
+        _issue(
+            ISSUE_UNREACHABLE_NODE, SEVERITY_WARNING,
+            f"Node {n['id']} cannot be reached from the start", node_id=str(n["id"]),
+        )
+        for n in nodes
+        if str(n["id"]) not in reached and str(n["id"]) not in starts[1:]
+    )
+    return issues
+
+def check_graph(graph: Dict[str, Any]) -> List[story_schema.GraphIssue]:
+    """Every check, over the whole graph."""
+    nodes, edges = graph.get("nodes", []), graph.get("edges", [])
+    return check_elements(graph, (str(n["id"]) for n in nodes), (str(e["id"]) for e in edges)) + _graph_issues(graph)
+
+def errors(issues: List[story_schema.GraphIssue]) -> List[story_schema.GraphIssue]:
+    return [issue for issue in issues if issue.severity == SEVERITY_ERROR]
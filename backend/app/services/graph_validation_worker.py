@@ -0,0 +1,151 @@
+"""
+Validation reports of story graphs (app.services.graph_validation), kept in memory
+per story version. A save records a provisional report of the elements it changed
+and queues the story; a background worker replaces it with the full-graph report.
+Can also be run over stored stories, e.g. to find graphs saved before validation
+existed (from backend/; exits with status 1 if any graph has errors):
+    python -m app.services.graph_validation_worker [--story-id ID ...] [--warnings]
+"""
+import argparse
+import asyncio
+import sys
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+from app.core.config import settings
+from app.models.story import Story
+from app.schemas import story as story_schema
+from app.services import graph_validation
+
+class GraphValidator:
+    """
+    Holds the latest report of up to max_stories stories (least recently used are
+    dropped) and runs the full checks of queued stories every interval_seconds.
+    Reports are only served for the version they are of.
+    """
+    def __init__(self, interval_seconds: float, max_stories: int):
+        self.interval_seconds = interval_seconds
+        self.max_stories = max_stories
+        self._lock = threading.Lock()
+        self._reports: "OrderedDict[str, story_schema.StoryValidationReport]" = OrderedDict()
+        self._pending: Dict[str, int] = {} # story_id -> version saved
+        self._task: Optional[asyncio.Task] = None
+
+    def get(self, story_id: str, version: int) -> Optional[story_schema.StoryValidationReport]:
+        with self._lock:
+            report = self._reports.get(story_id)
+            if report is None or report.version != version:
+                return None
+            self._reports.move_to_end(story_id)
+            return report
+
+    def _put(self, report: story_schema.StoryValidationReport) -> None:
+        with self._lock:
+            current = self._reports.get(report.story_id)
+            if current is not None and (current.version, current.complete) > (report.version, report.complete):
+                return # A newer save (or its full check) got here first
+            self._reports[report.story_id] = report
+            self._reports.move_to_end(report.story_id)
+            while len(self._reports) > self.max_stories:
+                self._reports.popitem(last=False)
+
+    def record_save(self, story_id: str, version: int, issues: List[story_schema.GraphIssue]) -> None:
+        """Records the element checks of a save as the provisional report of `version` and queues the full checks."""
+        self._put(story_schema.StoryValidationReport(story_id=story_id, version=version, complete=False, issues=issues))
+        with self._lock:
+            self._pending[story_id] = version
+
+    def carry_over(self, story_id: str, from_version: int, to_version: int) -> None:
+        """For saves that leave the graph unchanged: the report of `from_version` holds for `to_version`."""
+        report = self.get(story_id, from_version)
+        if report is not None:
+            self._put(report.model_copy(update={"version": to_version}))
+
+    def validate(self, story: Story) -> story_schema.StoryValidationReport:
+        """Full checks of the story's current graph; the report is kept."""
+        report = story_schema.StoryValidationReport(
+            story_id=story.id,
+            version=story.version,
+            complete=True,
+            issues=graph_validation.check_graph(story.graph_json or {}),
+        )
+        self._put(report)
+        return report
+
+    def evict(self, story_id: str) -> None:
+        with self._lock:
+            self._reports.pop(story_id, None)
+            self._pending.pop(story_id, None)
+
+    def validate_pending_sync(self) -> int:
+        """Runs the full checks of the queued stories. Returns how many were checked."""
+        from app.db.session import SessionLocal # Not at import time, like the other background workers
+
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        db = SessionLocal()
+        try:
+            for story_id, version in pending.items():
+                story = db.get(Story, story_id)
+                # Deleted, or saved again since: that save queued the story again
+                if story is not None and story.version == version:
+                    self.validate(story)
+                db.expunge_all()
+        finally:
+            db.close()
+        return len(pending)
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval_seconds)
+            try:
+                await asyncio.to_thread(self.validate_pending_sync)
+            except Exception as e:
+                # Stories of a failed round keep their provisional report; the report endpoint checks them on demand
+                print(f"GraphValidator: failed to validate queued stories: {e}")
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+graph_validator = GraphValidator(
+    interval_seconds=settings.GRAPH_VALIDATION_INTERVAL_SECONDS,
+    max_stories=settings.GRAPH_VALIDATION_CACHE_STORIES,
+)
+
+def main() -> None:
+    from app.db.session import SessionLocal
+
+    parser = argparse.ArgumentParser(description="Validate stored story graphs.")
+    parser.add_argument("--story-id", action="append", default=None, help="Story to validate (repeatable); default: all")
+    parser.add_argument("--warnings", action="store_true", help="Print warnings as well as errors")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    invalid = 0
+    try:
+        query = db.query(Story.id)
+        if args.story_id:
+            query = query.filter(Story.id.in_(args.story_id))
+        story_ids = [story_id for (story_id,) in query.all()]
+        for story_id in story_ids:
+            issues = graph_validation.check_graph(db.get(Story, story_id).graph_json or {})
+            invalid += bool(graph_validation.errors(issues))
+            for issue in issues:
+                if args.warnings or issue.severity == graph_validation.SEVERITY_ERROR:
+                    print(f"{story_id}  {issue.severity:7s} {issue.code}: {issue.message}")
+            db.expunge_all()
+        print(f"{invalid} of {len(story_ids)} story graphs have errors.")
+    finally:
+        db.close()
+    sys.exit(1 if invalid else 0)
+
+if __name__ == "__main__":
+    main()
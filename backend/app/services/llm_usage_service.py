@@ -0,0 +1,64 @@
+from typing import Any, Dict, List, Tuple
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.crud import async_crud_llm_usage, async_crud_story
+from app.llm import llm_usage_accountant
+from app.schemas import llm as llm_schema
+
+_SUMMED_FIELDS = (
+    "calls", "failures", "prompt_tokens", "completion_tokens", "cacheable_prefix_tokens", "cached_prompt_tokens",
+    "queue_wait_ms", "ttft_ms", "latency_ms",
+)
+_GROUP_KEY_FIELD = {"story": "story_id", "user": "user_id", "prompt_type": "prompt_type"}
+
+def _to_rollup(group_by: str, key: Any, prompt_type: Any, totals: Dict[str, Any]) -> llm_schema.LLMUsageRollup:
+    calls = totals["calls"] or 0
+    cost = (
+        totals["prompt_tokens"] / 1000 * settings.LLM_COST_PER_1K_PROMPT_TOKENS
+        + totals["completion_tokens"] / 1000 * settings.LLM_COST_PER_1K_COMPLETION_TOKENS
+    )
+    return llm_schema.LLMUsageRollup(
+        story_id=key if group_by == "story" else None,
+        user_id=key if group_by == "user" else None,
+        prompt_type=prompt_type,
+        calls=calls,
+        failures=totals["failures"],
+        prompt_tokens=totals["prompt_tokens"],
+        completion_tokens=totals["completion_tokens"],
+        total_tokens=totals["prompt_tokens"] + totals["completion_tokens"],
+        cacheable_prefix_tokens=totals["cacheable_prefix_tokens"],
+        cached_prompt_tokens=totals["cached_prompt_tokens"],
+        estimated_cost=cost,
+        avg_queue_wait_ms=totals["queue_wait_ms"] / calls if calls else 0.0,
+        avg_ttft_ms=totals["ttft_ms"] / calls if calls else 0.0,
+        avg_latency_ms=totals["latency_ms"] / calls if calls else 0.0,
+        max_latency_ms=totals["latency_ms_max"],
+    )
+
+async def get_usage_rollups(db: AsyncSession, owner_id: int, group_by: str, limit: int = 100) -> List[llm_schema.LLMUsageRollup]:
+    """
+    LLM usage on the stories owned by `owner_id`, grouped per story, per user or per
+    prompt type (always broken down by prompt type), most token-hungry first.
+    Includes usage that has not been flushed to the database yet.
+    """
+    totals: Dict[Tuple[Any, Any], Dict[str, Any]] = {}
+    for row in await async_crud_llm_usage.get_rollups_for_owner(db, owner_id=owner_id, group_by=group_by):
+        totals[(row["key"], row["prompt_type"])] = {
+            **{field: row[field] or 0 for field in _SUMMED_FIELDS},
+            "latency_ms_max": row["latency_ms_max"] or 0.0,
+        }
+
+    owned_story_ids = set(await async_crud_story.get_story_ids_by_user(db, user_id=owner_id))
+    for row in llm_usage_accountant.pending():
+        if row["story_id"] not in owned_story_ids:
+            continue
+        key = (row[_GROUP_KEY_FIELD[group_by]], row["prompt_type"])
+        entry = totals.setdefault(key, {**{field: 0 for field in _SUMMED_FIELDS}, "latency_ms_max": 0.0})
+        for field in _SUMMED_FIELDS:
+            entry[field] += row[field]
+        entry["latency_ms_max"] = max(entry["latency_ms_max"], row["latency_ms_max"])
+
+    rollups = [_to_rollup(group_by, key, prompt_type, entry) for (key, prompt_type), entry in totals.items()]
+    rollups.sort(key=lambda r: r.total_tokens, reverse=True)
+    return rollups[:limit]
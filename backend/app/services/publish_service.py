@@ -0,0 +1,149 @@
+import asyncio
+import re
+from dataclasses import dataclass
+from typing import Any, List, Optional
+
+from fastapi import HTTPException, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.crud import async_crud_prerendered_content, async_crud_story
+from app.llm import LLMPriority, llm_client
+from app.llm.prompts import AssembledPrompt, StoryPromptContext
+from app.models.llm_usage import PromptType
+from app.schemas import story as story_schema
+from app.services.game_service import END_NODE_TYPES, ENDING_TASK, SCENE_TASK, GameService
+from app.services import snapshot_service
+
+# Output fields a pre-rendered row can replace
+FIELD_ENDING_MESSAGE = "ending_message"
+FIELD_TEXT_CONTENT = "text_content"
+
+# `{hp}`-style placeholders mean the prompt is filled in per player and cannot be rendered ahead of time
+_PLACEHOLDER = re.compile(r"\{[^{}]*\}")
+
+_RENDER_TASKS = {
+    FIELD_ENDING_MESSAGE: ENDING_TASK,
+    FIELD_TEXT_CONTENT: SCENE_TASK,
+}
+
+_game_service = GameService()
+
+@dataclass
+class PrerenderTarget:
+    node_id: str
+    field: str
+    prompt: AssembledPrompt
+
+    @property
+    def prompt_hash(self) -> str:
+        return self.prompt.text_hash
+
+def prerender_target(
+    story_context: StoryPromptContext, graph: story_schema.StoryGraph, node: story_schema.Node
+) -> Optional[PrerenderTarget]:
+    """
+    The player-independent prompt of a node, or None if the node has none.
+    END nodes use ending_message_prompt; AI_STORY nodes use llm_processing_prompt.
+    """
+    instruction = _game_service.node_instruction(node)
+    if instruction is None or _PLACEHOLDER.search(instruction):
+        return None
+    field = FIELD_ENDING_MESSAGE if node.type in END_NODE_TYPES else FIELD_TEXT_CONTENT
+    # No play data: the prompt must not contain anything per player
+    prompt = _game_service.build_prompt(story_context, graph, node, instruction=instruction)
+    prompt = AssembledPrompt(
+        text=f"{prompt.text}\n\n{_RENDER_TASKS[field]}",
+        cacheable_prefix=prompt.cacheable_prefix,
+    )
+    return PrerenderTarget(node_id=str(node.id), field=field, prompt=prompt)
+
+def find_prerender_targets(story: Any, graph: story_schema.StoryGraph) -> List[PrerenderTarget]:
+    story_context = _game_service.story_prompt_context(story, graph)
+    targets = (prerender_target(story_context, graph, node) for node in graph.nodes)
+    return [target for target in targets if target is not None]
+
+async def publish_story(db: AsyncSession, story_id: str, user_id: int) -> story_schema.PublishResult:
+    """
+    Freezes the draft into an immutable snapshot that players are served, then
+    renders every player-independent prompt in it, in parallel, and stores the
+    results. No transaction is open while the renders run. Prompts whose assembled text is unchanged since the last publish are
+    skipped; rows for prompts that no longer exist are removed.
+    A failed render leaves the node to its normal play-time behaviour.
+    """
+    story_orm = await async_crud_story.get_story_by_id_and_owner(db=db, story_id=story_id, owner_id=user_id)
+    if not story_orm:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Story not found or you don't have permission to publish it.")
+    graph = story_schema.StoryGraph.model_validate(story_orm.graph_json)
+    snapshot = await snapshot_service.freeze_story(db, story_orm, graph)
+
+    targets = find_prerender_targets(snapshot, graph)
+    existing = await async_crud_prerendered_content.get_by_story(db, story_id=story_id)
+    changed = [
+        t for t in targets
+        if (t.node_id, t.field) not in existing or existing[(t.node_id, t.field)].prompt_hash != t.prompt_hash
+    ]
+    wanted = {(t.node_id, t.field) for t in targets}
+    stale = [key for key in existing if key not in wanted]
+    # End the read transaction: the renders take seconds and must not hold a connection's snapshot open
+    await db.commit()
+
+    # Bounded so a large story does not overflow the scheduler's editor queue
+    limit = asyncio.Semaphore(settings.PUBLISH_PRERENDER_CONCURRENCY)
+
+    async def render(target: PrerenderTarget) -> str:
+        async with limit:
+            return await llm_client.complete(
+                target.prompt,
+                prompt_type=PromptType.NODE_GENERATION,
+                priority=LLMPriority.EDITOR,
+                user_id=user_id,
+                story_id=story_id,
+            )
+
+    results = await asyncio.gather(*(render(t) for t in changed), return_exceptions=True)
+    upserts, failed = [], []
+    for target, result in zip(changed, results):
+        if isinstance(result, BaseException):
+            print(f"publish_story: failed to pre-render node {target.node_id} ({target.field}): {result}")
+            failed.append(target.node_id)
+            continue
+        upserts.append({
+            "node_id": target.node_id,
+            "field": target.field,
+            "prompt_hash": target.prompt_hash,
+            "content": result,
+        })
+    # A new, short write transaction
+    await async_crud_prerendered_content.apply_changes(db, story_id=story_id, upserts=upserts, stale=stale)
+
+    return story_schema.PublishResult(
+        story_id=story_id,
+        snapshot_id=snapshot.id,
+        prerendered=len(upserts),
+        unchanged=len(targets) - len(changed),
+        removed=len(stale),
+        failed_node_ids=failed,
+    )
+
+def prerendered_text_resolver(db: AsyncSession, story: Any):
+    """
+    Play-time lookup for GameService.process_turn. `story` is a CompiledStory
+    (the owner's draft or a published snapshot).
+    Content is only served if it was rendered from exactly the prompt the node
+    would produce now, so a draft edited after the last publish falls back to
+    the node's own text.
+    """
+    async def resolve(graph: story_schema.StoryGraph, node: story_schema.Node) -> Optional[str]:
+        target = prerender_target(_game_service.story_prompt_context(story, graph), graph, node)
+        if target is None:
+            return None
+        row = await async_crud_prerendered_content.get_for_node(
+            db, story_id=story.story_id, node_id=target.node_id, field=target.field
+        )
+        # End the read transaction: a miss is generated next, and the connection should not wait on it
+        await db.commit()
+        if row is None or row.prompt_hash != target.prompt_hash:
+            return None
+        return row.content
+    return resolve
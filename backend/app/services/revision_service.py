@@ -0,0 +1,217 @@
+"""
+Story graph revision history.
+
+Every graph write records a revision. Revision 1, and every
+STORY_REVISION_KEYFRAME_INTERVAL-th after it, is a keyframe holding the whole
+graph; the others are deltas holding only what changed since the previous
+revision, so their size follows the size of the change. A graph is rebuilt by
+replaying the deltas after the nearest keyframe. Saves within
+STORY_REVISION_BUCKET_SECONDS of the latest revision's start amend it instead
+of adding a revision, so an editing session's autosaves collapse into one.
+Keyframes are never amended: a save after one starts a new revision.
+
+Writers pass the delta of their write (what a PUT changed, what a patch's
+operations touched), so recording costs the size of the change, not of the
+graph. Only a new keyframe needs the whole graph.
+
+Delta format, per element list ("nodes", "edges"; omitted if unchanged):
+    {"remove": [ids], "set": [added or changed elements], "order": [ids]}
+Removals apply first, so an element removed and added again moves to the end.
+"order" is only present when applying "remove"/"set" would not give the new order.
+"""
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+from fastapi import HTTPException, status
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.crud import crud_story, crud_story_revision
+from app.models.story_revision import REVISION_DELTA, REVISION_KEYFRAME, StoryRevision
+from app.schemas import story as story_schema
+
+_ELEMENT_LISTS = ("nodes", "edges")
+
+def _apply_elements(elements: List[Dict[str, Any]], delta: Dict[str, Any]) -> List[Dict[str, Any]]:
+    by_id = {str(e["id"]): e for e in elements}
+    # Amended deltas may remove elements their own earlier writes added
+    for element_id in delta.get("remove", []):
+        by_id.pop(element_id, None)
+    order = list(by_id)
+    for element in delta.get("set", []):
+        if str(element["id"]) not in by_id:
+            order.append(str(element["id"]))
+        by_id[str(element["id"])] = element
+    order = delta.get("order", order)
+    return [by_id[element_id] for element_id in order if element_id in by_id]
+
+def _diff_elements(old: List[Dict[str, Any]], new: List[Dict[str, Any]]) -> Dict[str, Any]:
+    old_by_id = {str(e["id"]): e for e in old}
+    new_ids = [str(e["id"]) for e in new]
+    delta: Dict[str, Any] = {}
+    changed = [e for e in new if old_by_id.get(str(e["id"])) != e]
+    removed = [element_id for element_id in old_by_id if element_id not in set(new_ids)]
+    if changed:
+        delta["set"] = changed
+    if removed:
+        delta["remove"] = removed
+    if [str(e["id"]) for e in _apply_elements(old, delta)] != new_ids:
+        delta["order"] = new_ids
+    return delta
+
+def diff_graphs(old: Dict[str, Any], new: Dict[str, Any]) -> Dict[str, Any]:
+    """The delta taking graph `old` to graph `new`; empty if they are equal."""
+    delta = {}
+    for key in _ELEMENT_LISTS:
+        element_delta = _diff_elements(old.get(key, []), new.get(key, []))
+        if element_delta:
+            delta[key] = element_delta
+    return delta
+
+def apply_delta(graph: Dict[str, Any], delta: Dict[str, Any]) -> Dict[str, Any]:
+    return {key: _apply_elements(graph.get(key, []), delta.get(key, {})) for key in _ELEMENT_LISTS}
+
+def _compose_elements(first: Dict[str, Any], second: Dict[str, Any]) -> Dict[str, Any]:
+    removed = second.get("remove", [])
+    gone = set(removed)
+    written = {str(e["id"]): e for e in first.get("set", []) if str(e["id"]) not in gone}
+    for element in second.get("set", []):
+        written[str(element["id"])] = element # In place if `first` wrote it, else after its writes
+    delta: Dict[str, Any] = {}
+    remove = list(dict.fromkeys([*first.get("remove", []), *removed]))
+    if remove:
+        delta["remove"] = remove
+    if written:
+        delta["set"] = list(written.values())
+    if "order" in second:
+        delta["order"] = second["order"]
+    elif "order" in first:
+        # The order `second` leaves, applied to the order `first` ends at
+        stubs = _apply_elements([{"id": element_id} for element_id in first["order"]], {
+            "remove": removed, "set": [{"id": str(e["id"])} for e in second.get("set", [])],
+        })
+        delta["order"] = [stub["id"] for stub in stubs]
+    return delta
+
+def compose_deltas(first: Dict[str, Any], second: Dict[str, Any]) -> Dict[str, Any]:
+    """One delta with the effect of `first`, then `second` (for amending a revision)."""
+    delta = {}
+    for key in _ELEMENT_LISTS:
+        if key in first or key in second:
+            element_delta = _compose_elements(first.get(key, {}), second.get(key, {}))
+            if element_delta:
+                delta[key] = element_delta
+    return delta
+
+def _change_count(delta: Dict[str, Any]) -> int:
+    return sum(len(d.get("set", [])) + len(d.get("remove", [])) for d in delta.values())
+
+def _replay(chain: List[StoryRevision]) -> Dict[str, Any]:
+    graph = chain[0].payload
+    for revision in chain[1:]:
+        graph = apply_delta(graph, revision.payload)
+    return graph
+
+def _as_utc(moment: datetime) -> datetime:
+    # SQLite returns naive datetimes; they are stored in UTC
+    return moment if moment.tzinfo is not None else moment.replace(tzinfo=timezone.utc)
+
+def _element_count(graph: Dict[str, Any]) -> int:
+    return len(graph.get("nodes", [])) + len(graph.get("edges", []))
+
+def first_revision(graph: Dict[str, Any]) -> StoryRevision:
+    """Revision 1 (a keyframe) of a new story; add it with the story, it has no history to look up."""
+    now = datetime.now(timezone.utc)
+    return StoryRevision(
+        revision=1, story_version=1, kind=REVISION_KEYFRAME, payload=graph,
+        changes=_element_count(graph), created_at=now, updated_at=now,
+    )
+
+def record_revision(
+    db: Session,
+    *,
+    story_id: str,
+    story_version: int,
+    delta: Dict[str, Any],
+    graph: Callable[[], Dict[str, Any]],
+    force_new: bool = False,
+) -> Optional[StoryRevision]:
+    """
+    Records a write as the story's latest revision, in the caller's transaction (not
+    committed). `delta` is what the write changed (revision delta format) and
+    `graph` returns the graph after it (as stored, compact); it is only called when
+    the revision is a keyframe. Returns None if the write changed nothing.
+    `force_new` skips autosave compaction (e.g. restores).
+    """
+    if not delta:
+        return None
+    latest = crud_story_revision.get_latest(db, story_id=story_id)
+    now = datetime.now(timezone.utc)
+
+    if (
+        latest is not None
+        and latest.kind == REVISION_DELTA
+        and not force_new
+        and now - _as_utc(latest.created_at) < timedelta(seconds=settings.STORY_REVISION_BUCKET_SECONDS)
+    ):
+        # Same autosave bucket: the latest revision now ends after this write too
+        latest.payload = compose_deltas(latest.payload, delta)
+        latest.changes = _change_count(latest.payload)
+        latest.story_version = story_version
+        latest.updated_at = now
+        db.add(latest)
+        return latest
+
+    number = latest.revision + 1 if latest is not None else 1
+    if latest is None or (number - 1) % settings.STORY_REVISION_KEYFRAME_INTERVAL == 0:
+        payload = graph()
+        kind, changes = REVISION_KEYFRAME, _element_count(payload)
+    else:
+        kind, payload, changes = REVISION_DELTA, delta, _change_count(delta)
+    revision = StoryRevision(
+        story_id=story_id,
+        revision=number,
+        story_version=story_version,
+        kind=kind,
+        payload=payload,
+        changes=changes,
+        created_at=now,
+        updated_at=now,
+    )
+    db.add(revision)
+    return revision
+
+def graph_at(db: Session, story_id: str, revision: int) -> Dict[str, Any]:
+    """The story graph as of `revision`. 404 if there is no such revision."""
+    chain = crud_story_revision.get_chain(db, story_id=story_id, revision=revision)
+    if not chain or chain[-1].revision != revision:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Revision not found.")
+    return _replay(chain)
+
+def _check_owner(db: Session, story_id: str, user_id: int) -> None:
+    if crud_story.get_version_by_id_and_owner(db=db, story_id=story_id, owner_id=user_id) is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Story not found or you don't have permission to view it.")
+
+def list_revisions(
+    db: Session, story_id: str, user_id: int, limit: int = 50, before: Optional[int] = None
+) -> List[story_schema.StoryRevisionSummary]:
+    _check_owner(db, story_id, user_id)
+    return [
+        story_schema.StoryRevisionSummary.model_validate(revision)
+        for revision in crud_story_revision.get_page(db, story_id=story_id, limit=limit, before=before)
+    ]
+
+def diff_revisions(
+    db: Session, story_id: str, user_id: int, from_revision: int, to_revision: int
+) -> story_schema.StoryRevisionDiff:
+    _check_owner(db, story_id, user_id)
+    old = graph_at(db, story_id, from_revision)
+    delta = diff_graphs(old, graph_at(db, story_id, to_revision))
+    result: Dict[str, Any] = {"from_revision": from_revision, "to_revision": to_revision}
+    for key in _ELEMENT_LISTS:
+        old_ids = {str(e["id"]) for e in old.get(key, [])}
+        changed = delta.get(key, {}).get("set", [])
+        result[f"{key}_added"] = [e for e in changed if str(e["id"]) not in old_ids]
+        result[f"{key}_changed"] = [e for e in changed if str(e["id"]) in old_ids]
+        result[f"{key}_removed"] = delta.get(key, {}).get("remove", [])
+    return story_schema.StoryRevisionDiff.model_validate(result)
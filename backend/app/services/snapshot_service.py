@@ -0,0 +1,153 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+from fastapi import HTTPException, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.crud import async_crud_story, async_crud_story_snapshot, crud_story
+from app.llm.prompts import canonical_json
+from app.models.story_snapshot import StorySnapshot
+from app.schemas import story as story_schema
+
+# Snapshots never change, so clients and proxies may keep them for good
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+@dataclass(frozen=True)
+class CompiledStory:
+    """
+    A story ready to play: graph parsed once, plus the serialized snapshot
+    response. `snapshot_id` is None for an owner's unpublished draft.
+    """
+    story_id: str
+    snapshot_id: Optional[str]
+    title: str
+    description: Optional[str]
+    system_prompt: Optional[str]
+    graph: story_schema.StoryGraph
+    payload: bytes = b""
+
+class CompiledSnapshotCache:
+    """
+    snapshot_id -> CompiledStory. Snapshots are immutable, so entries never go
+    stale; they are dropped when their story is deleted, and least recently used
+    ones beyond max_bytes (counted by payload size; the parsed graph kept with it
+    grows alike).
+    """
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, CompiledStory]" = OrderedDict()
+        self._bytes = 0
+
+    def get(self, snapshot_id: str) -> Optional[CompiledStory]:
+        with self._lock:
+            compiled = self._entries.get(snapshot_id)
+            if compiled is not None:
+                self._entries.move_to_end(snapshot_id)
+            return compiled
+
+    def put(self, compiled: CompiledStory) -> CompiledStory:
+        """Caches `compiled` unless a concurrent reader cached the snapshot first; returns the cached one."""
+        if len(compiled.payload) > self.max_bytes:
+            return compiled
+        with self._lock:
+            current = self._entries.get(compiled.snapshot_id)
+            if current is not None:
+                return current
+            self._entries[compiled.snapshot_id] = compiled
+            self._bytes += len(compiled.payload)
+            while self._bytes > self.max_bytes:
+                self._pop(next(iter(self._entries)))
+            return compiled
+
+    def evict_story(self, story_id: str) -> None:
+        with self._lock:
+            for snapshot_id in [k for k, v in self._entries.items() if v.story_id == story_id]:
+                self._pop(snapshot_id)
+
+    def _pop(self, snapshot_id: str) -> None:
+        compiled = self._entries.pop(snapshot_id, None)
+        if compiled is not None:
+            self._bytes -= len(compiled.payload)
+
+_compiled_snapshots = CompiledSnapshotCache(max_bytes=settings.SNAPSHOT_CACHE_MAX_BYTES)
+
+def snapshot_content(story: Any, graph: story_schema.StoryGraph) -> Dict[str, Any]:
+    return {
+        "title": story.title,
+        "description": story.description,
+        "system_prompt": story.system_prompt,
+        "graph_json": story_schema.compact_dump(graph),
+    }
+
+def snapshot_id_for(story_id: str, content: Dict[str, Any]) -> str:
+    """Content hash: identical content of the same story always maps to the same snapshot."""
+    return hashlib.sha256(canonical_json({"story_id": story_id, **content}).encode("utf-8")).hexdigest()
+
+async def freeze_story(db: AsyncSession, story: Any, graph: story_schema.StoryGraph) -> StorySnapshot:
+    """Freezes the story's current draft into a snapshot and makes it the published one."""
+    content = snapshot_content(story, graph)
+    return await async_crud_story_snapshot.publish(
+        db, story=story, snapshot_id=snapshot_id_for(story.id, content), content=content
+    )
+
+def _compile(snapshot: StorySnapshot) -> CompiledStory:
+    response = story_schema.StorySnapshot.model_validate(snapshot)
+    return CompiledStory(
+        story_id=snapshot.story_id,
+        snapshot_id=snapshot.id,
+        title=snapshot.title,
+        description=snapshot.description,
+        system_prompt=snapshot.system_prompt,
+        graph=response.graph_json,
+        payload=response.model_dump_json().encode("utf-8"),
+    )
+
+async def get_compiled_snapshot(db: AsyncSession, snapshot_id: str) -> CompiledStory:
+    compiled = _compiled_snapshots.get(snapshot_id)
+    if compiled is None:
+        snapshot = await async_crud_story_snapshot.get_snapshot(db, snapshot_id)
+        if snapshot is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Story snapshot not found.")
+        compiled = _compiled_snapshots.put(_compile(snapshot))
+    return compiled
+
+async def snapshot_exists(db: AsyncSession, snapshot_id: str) -> bool:
+    """Primary-key lookup of the id alone: nothing is loaded or compiled."""
+    return await async_crud_story_snapshot.exists(db, snapshot_id)
+
+def get_published_snapshot_id(db: Session, story_id: str) -> str:
+    story_orm = crud_story.get_story(db, story_id)
+    if not story_orm or not story_orm.published_snapshot_id:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Story not found or not published.")
+    return story_orm.published_snapshot_id
+
+async def get_playable_story(db: AsyncSession, story_id: str, user_id: int) -> CompiledStory:
+    """
+    The owner plays their current draft (so edits can be tried before publishing);
+    everyone else plays the published snapshot.
+    """
+    story_orm = await async_crud_story.get_story(db, story_id)
+    if not story_orm or (story_orm.user_id != user_id and not story_orm.published_snapshot_id):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Story not found")
+    if story_orm.user_id != user_id:
+        return await get_compiled_snapshot(db, story_orm.published_snapshot_id)
+    await async_crud_story.load_graph(db, story_orm)
+    if not story_orm.graph_json:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Story graph is not available.")
+    return CompiledStory(
+        story_id=story_orm.id,
+        snapshot_id=None,
+        title=story_orm.title,
+        description=story_orm.description,
+        system_prompt=story_orm.system_prompt,
+        graph=story_schema.StoryGraph.model_validate(story_orm.graph_json),
+    )
+
+def evict_story(story_id: str) -> None:
+    _compiled_snapshots.evict_story(story_id)
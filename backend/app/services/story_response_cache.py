@@ -0,0 +1,58 @@
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from app.core.config import settings
+
+class StoryResponseCache:
+    """
+    Encoded GET /stories/{id} response bodies, one version per story. A body is
+    only served for the version it was encoded at, so a write made by another
+    process never serves stale bytes; writes made here evict the story to free
+    its memory early. Least recently used bodies are dropped beyond max_bytes.
+    """
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Tuple[int, bytes]]" = OrderedDict()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, story_id: str, version: int) -> Optional[bytes]:
+        with self._lock:
+            entry = self._entries.get(story_id)
+            if entry is None or entry[0] != version:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(story_id)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, story_id: str, version: int, body: bytes) -> None:
+        if len(body) > self.max_bytes:
+            return
+        with self._lock:
+            current = self._entries.get(story_id)
+            if current is not None and current[0] > version:
+                return # A concurrent reader already cached a newer version
+            self._pop(story_id)
+            self._entries[story_id] = (version, body)
+            self._bytes += len(body)
+            while self._bytes > self.max_bytes:
+                self._pop(next(iter(self._entries)))
+
+    def evict(self, story_id: str) -> None:
+        with self._lock:
+            self._pop(story_id)
+
+    def _pop(self, story_id: str) -> None:
+        entry = self._entries.pop(story_id, None)
+        if entry is not None:
+            self._bytes -= len(entry[1])
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"stories": len(self._entries), "bytes": self._bytes, "hits": self.hits, "misses": self.misses}
+
+story_response_cache = StoryResponseCache(max_bytes=settings.STORY_RESPONSE_CACHE_MAX_BYTES)
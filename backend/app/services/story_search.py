@@ -0,0 +1,192 @@
+"""
+Full-text search of a user's stories: titles, descriptions and node texts
+(label, characterName, text_content). The text is kept in story_search_documents,
+one row per story and per node, and indexed by the database: an FTS5 table on
+SQLite, a GIN tsvector index on PostgreSQL (app.models.story_search_document).
+Saves rewrite only the rows whose text changed, in the save's transaction.
+
+Each hit is a story or one of its nodes, ranked by relevance (BM25 on SQLite,
+ts_rank_cd on PostgreSQL) with titles, labels and character names weighted above
+descriptions and text. Every query term matches as a word prefix, so "모험"
+finds "모험이" and "drag" finds "dragon".
+
+Index stories stored before search existed (from backend/):
+    python -m app.services.story_search --rebuild [--story-id ID ...]
+"""
+import argparse
+import re
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from fastapi import HTTPException, status
+from sqlalchemy import bindparam, delete, insert, or_, text, update
+from sqlalchemy.orm import Session
+
+from app.models.story import Story
+from app.models.story_search_document import POSTGRESQL_DOCUMENT, TEXT_SEARCH_CONFIG, StorySearchDocument
+from app.schemas import story as story_schema
+
+# Terms after the first MAX_QUERY_TERMS are ignored
+MAX_QUERY_TERMS = 16
+# Words of context in a hit's snippet
+SNIPPET_WORDS = 16
+HIGHLIGHT = "**"
+
+# Rows are written through the table (Core), one executemany per statement: ORM inserts go one row at a time
+_documents = StorySearchDocument.__table__
+
+# Search texts of a story: node_id (None for the story itself) -> (heading, body)
+SearchTexts = Dict[Optional[str], Tuple[str, str]]
+
+_SEARCH_SQL = {
+    "sqlite": text(
+        "SELECT d.story_id, d.node_id, s.title AS story_title, "
+        f"snippet(story_search, -1, '{HIGHLIGHT}', '{HIGHLIGHT}', '…', {SNIPPET_WORDS}) AS snippet, "
+        # bm25() is lower for better matches; column weights: heading, body
+        "-bm25(story_search, 4.0, 1.0) AS score "
+        "FROM story_search "
+        "JOIN story_search_documents d ON d.id = story_search.rowid "
+        "JOIN stories s ON s.id = d.story_id "
+        "WHERE story_search MATCH :query AND s.user_id = :user_id "
+        "ORDER BY score DESC, d.id LIMIT :limit OFFSET :offset"
+    ),
+    "postgresql": text(
+        "SELECT d.story_id, d.node_id, s.title AS story_title, "
+        f"ts_headline('{TEXT_SEARCH_CONFIG}', concat_ws(' … ', NULLIF(d.heading, ''), NULLIF(d.body, '')), q, "
+        f"'StartSel=\"{HIGHLIGHT}\", StopSel=\"{HIGHLIGHT}\", MaxWords={SNIPPET_WORDS}, MinWords={SNIPPET_WORDS // 2}') AS snippet, "
+        f"ts_rank_cd({POSTGRESQL_DOCUMENT}, q) AS score "
+        "FROM story_search_documents d "
+        "JOIN stories s ON s.id = d.story_id "
+        f"CROSS JOIN to_tsquery('{TEXT_SEARCH_CONFIG}', :query) q "
+        f"WHERE {POSTGRESQL_DOCUMENT} @@ q AND s.user_id = :user_id "
+        "ORDER BY score DESC, d.id LIMIT :limit OFFSET :offset"
+    ),
+}
+
+def _node_texts(node: Dict[str, Any]) -> Tuple[str, str]:
+    data = node.get("data") or {}
+    heading = " ".join(part for part in (data.get("label"), data.get("characterName")) if part)
+    return heading, data.get("text_content") or ""
+
+def story_texts(title: str, description: Optional[str], graph: Dict[str, Any]) -> SearchTexts:
+    """What is indexed of a story with this title, description and (stored) graph. Nodes without text are left out."""
+    texts: SearchTexts = {None: (title or "", description or "")}
+    for node in graph.get("nodes", []):
+        heading, body = _node_texts(node)
+        if heading or body:
+            texts[str(node["id"])] = (heading, body)
+    return texts
+
+def document_rows(story_id: str, texts: SearchTexts, keys: Optional[Set[Optional[str]]] = None) -> List[Dict[str, Any]]:
+    """story_search_documents rows of the texts (of `keys` only, if given), for a bulk insert."""
+    return [
+        {"story_id": story_id, "node_id": key, "heading": heading, "body": body}
+        for key, (heading, body) in texts.items()
+        if keys is None or key in keys
+    ]
+
+def _key_condition(keys: Set[Optional[str]]) -> Any:
+    node_ids = [key for key in keys if key is not None]
+    conditions = [_documents.c.node_id.in_(node_ids)] if node_ids else []
+    if None in keys:
+        conditions.append(_documents.c.node_id.is_(None))
+    return or_(*conditions)
+
+def reindex(db: Session, story_id: str, texts: SearchTexts, keys: Optional[Iterable[Optional[str]]] = None) -> None:
+    """
+    Rewrites the story's rows of `keys` (node ids; None is the story itself) from
+    `texts`, without committing: keys missing from `texts` lose their row. With
+    keys=None, all of the story's rows are rewritten.
+    """
+    query = delete(_documents).where(_documents.c.story_id == story_id)
+    if keys is not None:
+        keys = set(keys)
+        if not keys:
+            return
+        query = query.where(_key_condition(keys))
+    db.execute(query)
+    rows = document_rows(story_id, texts, keys)
+    if rows:
+        db.execute(insert(_documents), rows)
+
+def sync_story(db: Session, story_id: str, old: SearchTexts, new: SearchTexts) -> None:
+    """
+    Writes the differences between the story's indexed texts (`old`) and its new
+    ones, without committing: one statement each for the removed, added and
+    changed rows there are. Unchanged rows are not written.
+    """
+    removed = {key for key in old if key not in new}
+    added = {key for key in new if key not in old}
+    changed = [key for key in new if key in old and new[key] != old[key]]
+    if removed:
+        db.execute(delete(_documents).where(_documents.c.story_id == story_id, _key_condition(removed)))
+    if added:
+        db.execute(insert(_documents), document_rows(story_id, new, added))
+    if changed:
+        db.execute(
+            update(_documents)
+            .where(_documents.c.story_id == story_id, _documents.c.node_id.is_not_distinct_from(bindparam("key")))
+            .values(heading=bindparam("new_heading"), body=bindparam("new_body")),
+            [{"key": key, "new_heading": new[key][0], "new_body": new[key][1]} for key in changed],
+        )
+
+def index_story(db: Session, story: Story) -> None:
+    """Rewrites all of the story's rows from its stored title, description and graph (not committed)."""
+    reindex(db, story.id, story_texts(story.title, story.description, story.graph_json or {}))
+
+def query_terms(query: str) -> List[str]:
+    """The words of a search query; operators and punctuation are dropped."""
+    return re.findall(r"\w+", query.lower())[:MAX_QUERY_TERMS]
+
+def _match_expression(dialect: str, terms: List[str]) -> str:
+    # All terms must match, each as a word prefix. Terms are \w+ only, so they need no escaping.
+    if dialect == "postgresql":
+        return " & ".join(f"{term}:*" for term in terms)
+    return " ".join(f'"{term}"*' for term in terms)
+
+def search(db: Session, user_id: int, query: str, limit: int = 20, offset: int = 0) -> story_schema.StorySearchPage:
+    """The user's best matching stories and nodes, best first."""
+    terms = query_terms(query)
+    if not terms:
+        return story_schema.StorySearchPage(items=[])
+    dialect = db.get_bind().dialect.name
+    if dialect not in _SEARCH_SQL:
+        raise HTTPException(
+            status_code=status.HTTP_501_NOT_IMPLEMENTED,
+            detail=f"Story search needs SQLite or PostgreSQL, not {dialect}.",
+        )
+    rows = db.execute(_SEARCH_SQL[dialect], {
+        "query": _match_expression(dialect, terms),
+        "user_id": user_id,
+        "limit": limit + 1,
+        "offset": offset,
+    }).mappings().all()
+    return story_schema.StorySearchPage(
+        items=[story_schema.StorySearchHit(**row) for row in rows[:limit]],
+        next_offset=offset + limit if len(rows) > limit else None,
+    )
+
+def main() -> None:
+    from app.db.session import SessionLocal # Not at import time, like the other CLIs
+
+    parser = argparse.ArgumentParser(description="Rebuild the full-text search index of stories.")
+    parser.add_argument("--rebuild", action="store_true", required=True)
+    parser.add_argument("--story-id", action="append", default=None, help="Story to index (repeatable); default: all")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        query = db.query(Story.id)
+        if args.story_id:
+            query = query.filter(Story.id.in_(args.story_id))
+        story_ids = [story_id for (story_id,) in query.all()]
+        for story_id in story_ids:
+            # One story per transaction: memory stays bounded and searches see each story as soon as it is done
+            index_story(db, db.get(Story, story_id))
+            db.commit()
+            db.expunge_all()
+        print(f"Indexed {len(story_ids)} stories.")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,26 @@
+import base64
+import json
 import uuid
-from typing import List, Optional, Any, Dict
+from datetime import datetime
+from typing import List, Optional, Any, Dict, Tuple
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
+import orjson
 from fastapi import HTTPException, status
+from pydantic import ValidationError
 
-from app.crud import crud_story, crud_user # crud_user for author info
+from app.crud import async_crud_story, crud_story, crud_user # crud_user for author info
 from app.schemas import story as story_schema
 from app.models import story as story_model
+from app.core.etags import story_etag, story_list_etag
+from app.services import snapshot_service
+from app.services import graph_patch as graph_patch_ops
+from app.services import graph_store
+from app.services import revision_service
+from app.services import graph_validation
+from app.services import story_search
+from app.services.graph_validation_worker import graph_validator
+from app.services.story_response_cache import story_response_cache
 
 # Placeholder for the initial graph function - this needs to be properly defined or imported
 def _create_initial_story_graph() -> story_schema.StoryGraph:
@@ -26,53 +41,66 @@ def _create_initial_story_graph() -> story_schema.StoryGraph:
         edges=[]
     )
 
-def transform_graph_for_db(graph_json: Optional[story_schema.StoryGraph]) -> Optional[story_schema.StoryGraph]:
-    """Validates or transforms graph_json before DB storage."""
-    # For now, assume input Pydantic model is already validated and correct for DB JSON.
-    return graph_json
+def _check_graph_save(old: Dict[str, Any], new: Dict[str, Any]) -> List[story_schema.GraphIssue]:
+    """
+    Element checks of what a save changes (stored graph dicts). Errors answer 422
+    and nothing is saved; the issues (warnings only) are returned for the story's
+    provisional validation report.
+    """
+    issues = graph_validation.check_changes(old, new)
+    errors = graph_validation.errors(issues)
+    if errors:
+        raise _invalid_graph(errors)
+    return issues
+
+def _invalid_graph(errors: List[story_schema.GraphIssue]) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+        detail={
+            "message": "The story graph is invalid.",
+            "issues": [issue.model_dump(exclude_none=True) for issue in errors],
+        },
+    )
+
+# Story response fields read from the story row; graph_json and author_username are set by _story_response
+_STORY_ROW_FIELDS = tuple(
+    name for name in story_schema.Story.model_fields if name not in ("graph_json", "author_username")
+)
 
-def transform_graph_for_response(graph_data_from_db: Optional[Dict[str, Any]]) -> Optional[story_schema.StoryGraph]:
+def _story_fields(story_orm: story_model.Story) -> Dict[str, Any]:
+    fields = {name: getattr(story_orm, name) for name in _STORY_ROW_FIELDS}
+    fields["author_username"] = story_orm.author.username if story_orm.author else None
+    return fields
+
+def _story_response(
+    story_orm: story_model.Story, graph: Optional[story_schema.StoryGraph] = None
+) -> story_schema.Story:
     """
-    Transforms graph_json data (usually a dict from DB JSON field) 
-    into a StoryGraph Pydantic model, ensuring correct node types.
+    The Story response for a stored story, parsing its graph at most once. Graphs are
+    validated when written, so `graph`, when the caller already holds it as a model
+    (e.g. from the request body), is used as is; otherwise the stored graph is parsed
+    here. FastAPI does not revalidate the returned Story against response_model.
     """
-    if not graph_data_from_db:
-        print("transform_graph_for_response: No graph_data_from_db provided, returning None.")
-        return None
-    
+    fields = _story_fields(story_orm)
     try:
-        # Pydantic will parse the list of node dicts into List[story_schema.Node]
-        # and each node dict's 'type' key will map to Node.type field.
-        parsed_graph = story_schema.StoryGraph.model_validate(graph_data_from_db)
-        print(f"transform_graph_for_response: Successfully parsed graph with {len(parsed_graph.nodes)} nodes.")
-        # Optional: Add a loop here to print types if further debugging is needed
-        # for i, node in enumerate(parsed_graph.nodes):
-        #     print(f"  Node {i} (ID: {node.id}): Parsed Type = {node.type}")
-        return parsed_graph
-    except Exception as e:
-        print(f"Error validating/parsing graph_data_from_db into StoryGraph: {e}")
-        # Fallback to an initial graph or return None, depending on desired behavior
-        # For now, returning a default initial graph might be safer than None if client expects a graph.
-        # However, if the story *should* have a graph and it's corrupt, this hides the issue.
-        # Consider raising an error or logging more severely.
-        print("transform_graph_for_response: Falling back to initial story graph due to parsing error.")
-        return _create_initial_story_graph() 
+        return story_schema.Story.model_validate(
+            {**fields, "graph_json": graph if graph is not None else story_orm.graph_json}
+        )
+    except ValidationError as e:
+        # Only graphs stored before saves were validated can get here (python -m app.services.graph_validation_worker)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"The stored graph of story {story_orm.id} is invalid ({e.error_count()} errors).",
+        )
 
 def create_story(db: Session, story_create: story_schema.StoryCreate, user_id: int) -> story_schema.Story:
     author = crud_user.get(db, id=user_id)
     if not author:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Author (user) not found.")
 
-    final_graph_json_pydantic: story_schema.StoryGraph
-    if story_create.graph_json is not None:
-        # Assuming story_create.graph_json is already a StoryGraph Pydantic model from request
-        transformed_graph = transform_graph_for_db(story_create.graph_json) # Currently a pass-through
-        if transformed_graph is None: 
-            final_graph_json_pydantic = _create_initial_story_graph()
-        else:
-            final_graph_json_pydantic = transformed_graph
-    else:
-        final_graph_json_pydantic = _create_initial_story_graph()
+    final_graph_json_pydantic = story_create.graph_json or _create_initial_story_graph()
+    stored_graph = story_schema.compact_dump(final_graph_json_pydantic)
+    issues = _check_graph_save({}, stored_graph)
 
     story_data_for_db_model_fields = story_create.model_dump(exclude_none=True, exclude={'graph_json'}) 
 
@@ -87,35 +115,18 @@ def create_story(db: Session, story_create: story_schema.StoryCreate, user_id: i
     # CRUDStory.create_story expects a Pydantic model (StoryInDBBase)
     # and its internal Story(**story_create.model_dump()) will convert the Pydantic graph_json
     # to dict for SQLAlchemy's JSON field.
-    created_story_db_model = crud_story.create_story(db=db, story_create=story_db_create_pydantic) 
-    
-    # Story.from_orm will handle graph_json by trying to parse it if it's a dict/str from DB,
-    # or assign if it's already a compatible Pydantic model (less likely here for .from_orm(SQLAlchemy_model))
-    response_story = story_schema.Story.from_orm(created_story_db_model)
-    
-    # Explicitly ensure the graph_json in the response is the correctly parsed Pydantic model
-    # by using our refined transform_graph_for_response with the dict from the DB model.
-    if isinstance(created_story_db_model.graph_json, dict): # graph_json from SQLAlchemy model is likely dict
-         response_story.graph_json = transform_graph_for_response(created_story_db_model.graph_json)
-    elif isinstance(created_story_db_model.graph_json, story_schema.StoryGraph): # Should not happen with .from_orm on SQLAlchemy
-         response_story.graph_json = created_story_db_model.graph_json # Already a Pydantic model
-    else: # Fallback if it's some other unexpected type (e.g. stringified JSON)
-        try:
-            # This case might occur if DB returns JSON string not auto-parsed by SQLAlchemy to dict
-            import json
-            parsed_dict = json.loads(str(created_story_db_model.graph_json))
-            response_story.graph_json = transform_graph_for_response(parsed_dict)
-        except:
-            response_story.graph_json = _create_initial_story_graph()
-
-
-    if created_story_db_model.author: # author is on the SQLAlchemy model
-        response_story.author_username = created_story_db_model.author.username 
-    else: # Fallback if author relationship isn't loaded or available
-        response_story.author_username = author.username
-
-
-    return response_story
+    created_story_db_model = crud_story.create_story(
+        db=db,
+        story_create=story_db_create_pydantic,
+        graph_storage=graph_store.new_story_graph_storage(),
+        first_revision=revision_service.first_revision(stored_graph),
+        search_documents=story_search.document_rows(
+            story_db_create_pydantic.id,
+            story_search.story_texts(story_db_create_pydantic.title, story_db_create_pydantic.description, stored_graph),
+        ),
+    )
+    graph_validator.record_save(created_story_db_model.id, created_story_db_model.version, issues)
+    return _story_response(created_story_db_model, final_graph_json_pydantic)
 
 def get_story(db: Session, story_id: str, user_id: int) -> Optional[story_schema.Story]:
     story_orm = crud_story.get_story_by_id_and_owner(
@@ -123,82 +134,258 @@ def get_story(db: Session, story_id: str, user_id: int) -> Optional[story_schema
     )
     if not story_orm:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Story not found or you don't have permission to view it.")
-    
-    # .from_orm will attempt to convert story_orm fields to story_schema.Story fields.
-    # For graph_json (defined as StoryGraph in Pydantic schema), Pydantic will try to parse
-    # story_orm.graph_json (which is a dict/list from DB via SQLAlchemy JSON type) into StoryGraph.
-    response_story = story_schema.Story.from_orm(story_orm)
-    
-    # Ensure the graph_json is correctly parsed. story_orm.graph_json is the raw dict from DB.
-    # The .from_orm above might have already parsed it into response_story.graph_json.
-    # If from_orm's parsing was problematic (as seen in logs), explicitly re-parsing is safer.
-    if isinstance(story_orm.graph_json, dict):
-        parsed_graph = transform_graph_for_response(story_orm.graph_json)
-        response_story.graph_json = parsed_graph
-    elif isinstance(response_story.graph_json, story_schema.StoryGraph):
-        # If from_orm already correctly parsed it into a StoryGraph, we can trust it.
-        # (However, logs showed it didn't get types right, so the above explicit parse is better)
-        pass # Already a Pydantic model, hopefully correct.
-    else: # Fallback for unexpected types
-        print(f"get_story: story_orm.graph_json is of unexpected type: {type(story_orm.graph_json)}. Attempting default.")
-        response_story.graph_json = _create_initial_story_graph()
-
-
-    if story_orm.author:
-        response_story.author_username = story_orm.author.username
-    return response_story
-
-def get_my_stories(db: Session, user_id: int, skip: int = 0, limit: int = 100) -> List[story_schema.Story]:
+    return _story_response(story_orm)
+
+def get_story_version(db: Session, story_id: str, user_id: int) -> int:
+    """The story's current version (its ETag), from a metadata-only query."""
+    version = crud_story.get_version_by_id_and_owner(db=db, story_id=story_id, owner_id=user_id)
+    if version is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Story not found or you don't have permission to view it.")
+    return version
+
+def get_story_body(db: Session, story_id: str, user_id: int, version: int) -> Tuple[int, bytes]:
+    """
+    get_story as encoded JSON, with the version it is of. Served from
+    story_response_cache if it holds `version`. Otherwise the stored graph, which
+    was validated (and compacted) when written, is encoded as is, without parsing.
+    """
+    body = story_response_cache.get(story_id, version)
+    if body is not None:
+        return version, body
+    story_orm = crud_story.get_story_by_id_and_owner(db=db, story_id=story_id, owner_id=user_id)
+    if not story_orm:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Story not found or you don't have permission to view it.")
+    body = orjson.dumps({**_story_fields(story_orm), "graph_json": story_orm.graph_json})
+    # The story may have been written since `version` was read: cache what was encoded
+    story_response_cache.put(story_orm.id, story_orm.version, body)
+    return story_orm.version, body
+
+def get_story_validation(db: Session, story_id: str, user_id: int) -> story_schema.StoryValidationReport:
+    """
+    The validation report of the story's current version. Until the background
+    worker has run the full checks of the latest save, that is the save's
+    provisional report (complete=False). With no report kept, the full checks run now.
+    """
+    report = graph_validator.get(story_id, get_story_version(db, story_id, user_id))
+    if report is not None:
+        return report
+    story_orm = crud_story.get_story_by_id_and_owner(db=db, story_id=story_id, owner_id=user_id)
+    if not story_orm:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Story not found or you don't have permission to view it.")
+    return graph_validator.validate(story_orm)
+
+def encode_story_cursor(updated_at: datetime, story_id: str) -> str:
+    """Opaque keyset cursor: the (updated_at, id) of the last story on a page."""
+    raw = json.dumps([updated_at.isoformat(), story_id]).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+def decode_story_cursor(cursor: Optional[str]) -> Optional[Tuple[datetime, str]]:
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        updated_at, story_id = json.loads(raw)
+        return datetime.fromisoformat(updated_at), str(story_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor.")
+
+def _page_cursor(rows: List[Any], limit: int) -> Optional[str]:
+    """Pages are fetched with limit + 1 rows; the extra row only signals that a next page exists."""
+    if len(rows) <= limit:
+        return None
+    last = rows[limit - 1]
+    return encode_story_cursor(last.updated_at, last.id)
+
+def get_my_stories_etag(db: Session, user_id: int, limit: int = 100, cursor: Optional[str] = None) -> str:
+    """ETag of the page get_my_stories would return, from a metadata-only query."""
+    rows = crud_story.get_story_versions_by_user(
+        db=db, user_id=user_id, limit=limit + 1, after=decode_story_cursor(cursor)
+    )
+    return story_list_etag([(row.id, row.version) for row in rows[:limit]], _page_cursor(rows, limit))
+
+def get_my_stories(db: Session, user_id: int, limit: int = 100, cursor: Optional[str] = None) -> story_schema.StorySummaryPage:
     stories_orm = crud_story.get_stories_by_user(
-        db=db, user_id=user_id, skip=skip, limit=limit
+        db=db, user_id=user_id, limit=limit + 1, after=decode_story_cursor(cursor)
     )
     response_stories = []
-    for story_orm_item in stories_orm:
-        story_resp = story_schema.Story.from_orm(story_orm_item)
-        
-        # Explicitly parse graph_json for each story in the list
-        if isinstance(story_orm_item.graph_json, dict):
-            parsed_graph = transform_graph_for_response(story_orm_item.graph_json)
-            story_resp.graph_json = parsed_graph
-        elif isinstance(story_resp.graph_json, story_schema.StoryGraph):
-            pass # Already a Pydantic model
-        else:
-            story_resp.graph_json = _create_initial_story_graph()
-            
+    for story_orm_item in stories_orm[:limit]:
+        # Metadata only: the graph (story_graphs) is never loaded for the list
+        story_resp = story_schema.StorySummary.from_orm(story_orm_item)
         if story_orm_item.author:
             story_resp.author_username = story_orm_item.author.username
         response_stories.append(story_resp)
-    return response_stories
+    return story_schema.StorySummaryPage(items=response_stories, next_cursor=_page_cursor(stories_orm, limit))
+
+def _version_conflict(current_version: Optional[int]) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_412_PRECONDITION_FAILED,
+        detail={
+            "message": "The story was changed by another editor. Reload it and apply your changes again.",
+            "current_version": current_version,
+        },
+        headers={"ETag": story_etag(current_version)} if current_version is not None else None,
+    )
+
+def _claim_version(db: Session, db_story_orm: story_model.Story, expected_version: int) -> None:
+    """
+    Optimistic concurrency check for a write based on `expected_version`. The
+    conditional version bump joins the write's transaction, so of two racing
+    writers based on the same version exactly one commits; the other gets 412.
+    """
+    if db_story_orm.version != expected_version or not crud_story.claim_version(
+        db, story_id=db_story_orm.id, expected_version=expected_version
+    ):
+        db.rollback()
+        raise _version_conflict(crud_story.get_version(db, story_id=db_story_orm.id))
+
+def _sync_search(
+    db: Session, story_orm: story_model.Story, story_update: story_schema.StoryUpdate, stored_graph: Optional[Dict[str, Any]]
+) -> None:
+    """Rewrites the search rows whose text the update changes, in its transaction (story_search)."""
+    fields = story_update.model_dump(exclude_unset=True, include={"title", "description"})
+    if not fields and stored_graph is None:
+        return
+    # Without a new graph only the story's own row can change: leave the graph out of both sides
+    old_graph = (story_orm.graph_json or {}) if stored_graph is not None else {}
+    story_search.sync_story(
+        db,
+        story_orm.id,
+        story_search.story_texts(story_orm.title, story_orm.description, old_graph),
+        story_search.story_texts(
+            fields.get("title", story_orm.title),
+            fields.get("description", story_orm.description),
+            stored_graph if stored_graph is not None else {},
+        ),
+    )
 
 def update_story(
-    db: Session, story_id: str, story_update: story_schema.StoryUpdate, user_id: int
+    db: Session,
+    story_id: str,
+    story_update: story_schema.StoryUpdate,
+    user_id: int,
+    expected_version: int,
+    force_new_revision: bool = False,
 ) -> Optional[story_schema.Story]:
     db_story_orm = crud_story.get_story_by_id_and_owner(
         db=db, story_id=story_id, owner_id=user_id
     )
     if not db_story_orm:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Story not found or you don't have permission to update it.")
+    stored_graph = issues = None
+    if story_update.graph_json is not None:
+        stored_graph = story_schema.compact_dump(story_update.graph_json)
+        issues = _check_graph_save(db_story_orm.graph_json or {}, stored_graph)
+    _claim_version(db, db_story_orm, expected_version)
+    if stored_graph is not None:
+        # Committed together with the update below
+        revision_service.record_revision(
+            db,
+            story_id=story_id,
+            story_version=expected_version + 1,
+            delta=revision_service.diff_graphs(db_story_orm.graph_json or {}, stored_graph),
+            graph=lambda: stored_graph,
+            force_new=force_new_revision,
+        )
+    _sync_search(db, db_story_orm, story_update, stored_graph)
     
     # crud_story.update_story takes StoryUpdate Pydantic model.
     # If story_update.graph_json is present (it's a StoryGraph Pydantic model),
     # CRUDBase.update will use model_dump() which converts it to dict for SQLAlchemy.
     updated_story_orm = crud_story.update_story(db=db, db_obj=db_story_orm, obj_in=story_update)
-    
-    response_story = story_schema.Story.from_orm(updated_story_orm)
-    
-    # Ensure response graph_json is also correctly parsed Pydantic model
-    if isinstance(updated_story_orm.graph_json, dict):
-        parsed_graph = transform_graph_for_response(updated_story_orm.graph_json)
-        response_story.graph_json = parsed_graph
-    elif isinstance(response_story.graph_json, story_schema.StoryGraph):
-        pass
+    story_response_cache.evict(story_id)
+    if issues is not None:
+        graph_validator.record_save(story_id, updated_story_orm.version, issues)
     else:
-        response_story.graph_json = _create_initial_story_graph()
+        graph_validator.carry_over(story_id, expected_version, updated_story_orm.version)
+    
+    return _story_response(updated_story_orm, story_update.graph_json)
 
-    if updated_story_orm.author:
-        response_story.author_username = updated_story_orm.author.username
+def patch_story_graph(
+    db: Session, story_id: str, graph_patch: story_schema.StoryGraphPatch, user_id: int, expected_version: int
+) -> story_schema.StoryGraphPatchResult:
+    """
+    Applies editor delta operations to the stored graph. All operations are applied
+    or none: the first invalid one answers 422 and nothing is written. The
+    revision, the checks and the search rows are built from what the operations
+    changed, so the rest of the graph is not read.
+    """
+    db_story_orm = crud_story.get_story_by_id_and_owner(
+        db=db, story_id=story_id, owner_id=user_id
+    )
+    if not db_story_orm:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Story not found or you don't have permission to update it.")
 
-    return response_story
+    try:
+        changes, node_count, edge_count = graph_store.apply_graph_ops(db, db_story_orm, graph_patch.ops)
+    except graph_patch_ops.GraphPatchError as e:
+        db.rollback() # Normalized stories may have rows of earlier operations flushed
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e))
+    issues = graph_validation.check_nodes(changes.written["nodes"].values())
+
+    _claim_version(db, db_story_orm, expected_version)
+    revision_service.record_revision(
+        db,
+        story_id=story_id,
+        story_version=expected_version + 1,
+        delta=changes.revision_delta(),
+        graph=lambda: graph_store.current_graph(db, db_story_orm),
+    )
+    # Search rows of the nodes whose text the operations may have changed (none for moves and edge edits)
+    keys = graph_patch_ops.data_node_ids(graph_patch.ops)
+    written = [node for node in map(changes.node, keys) if node is not None]
+    story_search.reindex(
+        db,
+        story_id,
+        story_search.story_texts(db_story_orm.title, db_story_orm.description, {"nodes": written}),
+        keys=keys,
+    )
+    updated_story_orm = crud_story.save(db=db, db_obj=db_story_orm)
+    story_response_cache.evict(story_id)
+    graph_validator.record_save(story_id, updated_story_orm.version, issues)
+    return story_schema.StoryGraphPatchResult(
+        id=updated_story_orm.id,
+        version=updated_story_orm.version,
+        applied=len(graph_patch.ops),
+        node_count=node_count,
+        edge_count=edge_count,
+    )
+
+def restore_story_revision(
+    db: Session, story_id: str, revision: int, user_id: int, expected_version: int
+) -> story_schema.Story:
+    """
+    Makes the graph of `revision` the current graph. This is a normal write (new
+    version, new revision), so the state it replaces stays in the history.
+    """
+    if crud_story.get_version_by_id_and_owner(db=db, story_id=story_id, owner_id=user_id) is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Story not found or you don't have permission to update it.")
+    graph = story_schema.StoryGraph.model_validate(revision_service.graph_at(db, story_id, revision))
+    return update_story(
+        db,
+        story_id=story_id,
+        story_update=story_schema.StoryUpdate(graph_json=graph),
+        user_id=user_id,
+        expected_version=expected_version,
+        force_new_revision=True,
+    )
+
+def _graph_storage(db: Session, story_id: str, user_id: int) -> str:
+    graph_storage = crud_story.get_graph_storage_by_id_and_owner(db=db, story_id=story_id, owner_id=user_id)
+    if graph_storage is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Story not found or you don't have permission to view it.")
+    return graph_storage
+
+def get_story_node(db: Session, story_id: str, node_id: str, user_id: int) -> story_schema.NodeWithEdges:
+    """One node and its out-edges; normalized stories load just those rows."""
+    node = graph_store.read_node(db, story_id, _graph_storage(db, story_id, user_id), node_id)
+    if node is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Node not found.")
+    return story_schema.NodeWithEdges.model_validate(node)
+
+def get_story_subgraph(db: Session, story_id: str, node_ids: List[str], user_id: int) -> story_schema.StoryGraph:
+    """The given nodes and the edges between them."""
+    subgraph = graph_store.read_subgraph(db, story_id, _graph_storage(db, story_id, user_id), node_ids)
+    return story_schema.StoryGraph.model_validate(subgraph)
 
 def delete_story(db: Session, story_id: str, user_id: int) -> Optional[story_schema.Story]:
     story_to_delete_orm = crud_story.get_story_by_id_and_owner(
@@ -207,23 +394,19 @@ def delete_story(db: Session, story_id: str, user_id: int) -> Optional[story_sch
     if not story_to_delete_orm:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Story not found or you don't have permission to delete it.")
     
-    response_data = story_schema.Story.from_orm(story_to_delete_orm)
-    
-    # Ensure graph_json is properly formed for the response
-    if isinstance(story_to_delete_orm.graph_json, dict):
-        parsed_graph = transform_graph_for_response(story_to_delete_orm.graph_json)
-        response_data.graph_json = parsed_graph
-    elif isinstance(response_data.graph_json, story_schema.StoryGraph):
-        pass
-    else:
-        response_data.graph_json = _create_initial_story_graph()
-
-    if story_to_delete_orm.author:
-        response_data.author_username = story_to_delete_orm.author.username
+    response_data = _story_response(story_to_delete_orm)
 
     crud_story.remove_story(db=db, story_id=story_id) # Perform deletion
+    snapshot_service.evict_story(story_id)
+    story_response_cache.evict(story_id)
+    graph_validator.evict(story_id)
     return response_data
 
-def generate_ai_elements(current_graph_json: story_schema.StoryGraph, ai_params: story_schema.AIGenerationRequest) -> story_schema.StoryGraph:
+async def generate_ai_elements(
+    db: AsyncSession, story_id: str, user_id: int, ai_params: story_schema.AIGenerationRequest
+) -> story_schema.StoryGraph:
+    # Only ownership is checked: the graph to extend comes with the request
+    if await async_crud_story.get_version_by_id_and_owner(db, story_id=story_id, owner_id=user_id) is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Story not found")
     print(f"AI Generation called with source node: {ai_params.source_node_id}, prompt: {ai_params.generation_prompt}")
-    return current_graph_json 
\ No newline at end of file
+    return ai_params.current_graph_json
@@ -0,0 +1,259 @@
+"""
+Bulk export and import of stories as NDJSON: one StoryTransferRecord per line
+(id, title, description, system_prompt, author, timestamps and the graph as
+stored). Both directions work in batches of STORY_TRANSFER_BATCH_SIZE stories,
+so memory stays flat whatever the number of stories: the export reads the
+database in id order, one batch per query; the import parses line by line and
+commits each batch in its own transaction.
+
+An import keeps story ids, so it can be re-run after a failure: stories that
+already exist are skipped. Imported stories start at version 1 with a single
+revision; revision history, snapshots and pre-rendered content are not moved.
+
+From backend/:
+    python -m app.services.story_transfer export [--user-email EMAIL] [-o stories.ndjson]
+    python -m app.services.story_transfer import stories.ndjson [--user-email EMAIL]
+Without --user-email the export covers every story and the import gives each
+story to the user with its author_email.
+"""
+import argparse
+import asyncio
+import sys
+from typing import Any, AsyncIterator, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import orjson
+from pydantic import ValidationError
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.crud import crud_story, crud_user
+from app.models.story import Story
+from app.schemas import story as story_schema
+from app.services import graph_store, graph_validation, revision_service, story_search
+
+# Failed lines listed in an import result (all are counted)
+MAX_REPORTED_ERRORS = 100
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+class LineTooLongError(ValueError):
+    pass
+
+def _export_record(story: Story) -> Dict[str, Any]:
+    return {
+        "id": story.id,
+        "title": story.title,
+        "description": story.description,
+        "system_prompt": story.system_prompt,
+        "author_username": story.author.username if story.author else None,
+        "author_email": story.author.email if story.author else None,
+        "created_at": story.created_at,
+        "updated_at": story.updated_at,
+        "graph_json": story.graph_json or {"nodes": [], "edges": []},
+    }
+
+def export_chunks(db: Session, user_id: Optional[int] = None, batch_size: Optional[int] = None) -> Iterator[bytes]:
+    """
+    NDJSON of the user's stories (or all stories), one chunk of lines per batch.
+    The session is closed after each batch: its stories are released and no
+    transaction stays open for the length of the export.
+    """
+    batch_size = batch_size or settings.STORY_TRANSFER_BATCH_SIZE
+    after_id = None
+    while True:
+        stories = crud_story.get_export_batch(db, user_id=user_id, after_id=after_id, limit=batch_size)
+        if not stories:
+            return
+        after_id = stories[-1].id
+        chunk = b"".join(orjson.dumps(_export_record(story)) + b"\n" for story in stories)
+        db.close()
+        yield chunk
+
+async def ndjson_lines(chunks: AsyncIterator[bytes], max_line_bytes: Optional[int] = None) -> AsyncIterator[bytes]:
+    """Splits a byte stream into lines without holding more than one (partial) line."""
+    max_line_bytes = max_line_bytes or settings.STORY_IMPORT_MAX_LINE_BYTES
+    def checked(line: bytes) -> bytes:
+        if len(line) > max_line_bytes:
+            raise LineTooLongError(f"A line is longer than {max_line_bytes} bytes")
+        return line
+
+    partial = bytearray()
+    async for chunk in chunks:
+        *lines, rest = chunk.split(b"\n")
+        if lines:
+            lines[0] = bytes(partial) + lines[0]
+            partial = bytearray(rest)
+            for line in lines:
+                yield checked(line)
+        else:
+            partial += rest
+        checked(partial)
+    if partial:
+        yield bytes(partial)
+
+class StoryImporter:
+    """
+    Imports NDJSON lines in batched transactions. Stories belong to `owner_id`,
+    or, if it is None, to the user with the record's author_email.
+    """
+    def __init__(self, db: Session, owner_id: Optional[int] = None, batch_size: Optional[int] = None):
+        self.db = db
+        self.owner_id = owner_id
+        self.batch_size = batch_size or settings.STORY_TRANSFER_BATCH_SIZE
+        self.graph_storage = graph_store.new_story_graph_storage()
+        self._owner_ids: Dict[str, Optional[int]] = {} # author_email -> user id
+        self._line = 0
+        self.imported = 0
+        self.skipped = 0
+        self.failed = 0
+        self.errors: List[story_schema.StoryImportError] = []
+
+    def _fail(self, line: int, error: str) -> None:
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append(story_schema.StoryImportError(line=line, error=error))
+
+    def _owner(self, record: story_schema.StoryTransferRecord) -> Optional[int]:
+        if self.owner_id is not None:
+            return self.owner_id
+        if record.author_email is None:
+            return None
+        if record.author_email not in self._owner_ids:
+            user = crud_user.get_user_by_email(self.db, email=record.author_email)
+            self._owner_ids[record.author_email] = user.id if user else None
+        return self._owner_ids[record.author_email]
+
+    def _parse(self, line: bytes) -> Optional[Tuple[str, Dict[str, Any]]]:
+        """The story's id and insert_stories values, or None (and the failure recorded)."""
+        try:
+            record = story_schema.StoryTransferRecord.model_validate_json(line)
+        except ValidationError as e:
+            self._fail(self._line, f"Invalid story record ({e.error_count()} errors): {e.errors()[0]['msg']}")
+            return None
+        stored_graph = story_schema.compact_dump(record.graph_json)
+        errors = graph_validation.errors(graph_validation.check_changes({}, stored_graph))
+        if errors:
+            self._fail(self._line, f"Invalid story graph: {errors[0].message}")
+            return None
+        owner_id = self._owner(record)
+        if owner_id is None:
+            self._fail(self._line, f"No user with email {record.author_email}" if record.author_email else "No author_email")
+            return None
+        values = {
+            "id": record.id,
+            "title": record.title,
+            "description": record.description,
+            "system_prompt": record.system_prompt,
+            "user_id": owner_id,
+            "graph_json": stored_graph,
+            "first_revision": revision_service.first_revision(stored_graph),
+            "search_documents": story_search.document_rows(
+                record.id, story_search.story_texts(record.title, record.description, stored_graph)
+            ),
+        }
+        # Keep the original timestamps; unset ones get the column defaults
+        values.update({k: v for k, v in (("created_at", record.created_at), ("updated_at", record.updated_at)) if v})
+        return record.id, values
+
+    def import_lines(self, lines: Iterable[bytes]) -> None:
+        """Imports consecutive lines of the stream (blank lines are skipped), one transaction per batch."""
+        batch: Dict[str, Dict[str, Any]] = {}
+        for line in lines:
+            self._line += 1
+            if not line.strip():
+                continue
+            parsed = self._parse(line)
+            if parsed is None:
+                continue
+            story_id, values = parsed
+            if story_id in batch:
+                self.skipped += 1 # Repeated within the batch: the first one wins
+                continue
+            batch[story_id] = values
+            if len(batch) >= self.batch_size:
+                self._insert(batch)
+                batch = {}
+        if batch:
+            self._insert(batch)
+
+    def _insert(self, batch: Dict[str, Dict[str, Any]]) -> None:
+        existing = set(crud_story.get_existing_ids(self.db, story_ids=list(batch)))
+        new = [values for story_id, values in batch.items() if story_id not in existing]
+        if new:
+            crud_story.insert_stories(self.db, stories=new, graph_storage=self.graph_storage)
+        self.imported += len(new)
+        self.skipped += len(existing)
+        self.db.expunge_all()
+
+    def result(self) -> story_schema.StoryImportResult:
+        return story_schema.StoryImportResult(
+            imported=self.imported, skipped=self.skipped, failed=self.failed, errors=self.errors
+        )
+
+async def import_stream(
+    chunks: AsyncIterator[bytes], db: Session, owner_id: int
+) -> story_schema.StoryImportResult:
+    """
+    Imports an NDJSON request body as it arrives. Each batch of lines is
+    imported in a worker thread, so the event loop keeps serving while the
+    batch is parsed and written.
+    """
+    importer = StoryImporter(db, owner_id=owner_id)
+    lines: List[bytes] = []
+    async for line in ndjson_lines(chunks):
+        lines.append(line)
+        if len(lines) >= importer.batch_size:
+            await asyncio.to_thread(importer.import_lines, lines)
+            lines = []
+    if lines:
+        await asyncio.to_thread(importer.import_lines, lines)
+    return importer.result()
+
+def main() -> None:
+    from app.db.session import SessionLocal # Not at import time, like the other CLIs
+
+    parser = argparse.ArgumentParser(description="Export or import stories as NDJSON.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    export_parser = commands.add_parser("export", help="Write stories as NDJSON")
+    export_parser.add_argument("--user-email", help="Export only this user's stories; default: all")
+    export_parser.add_argument("-o", "--output", help="Output file; default: stdout")
+    import_parser = commands.add_parser("import", help="Read stories from NDJSON")
+    import_parser.add_argument("input", help="NDJSON file, or - for stdin")
+    import_parser.add_argument("--user-email", help="Give every story to this user; default: each record's author_email")
+    for command in (export_parser, import_parser):
+        command.add_argument("--batch-size", type=int, default=settings.STORY_TRANSFER_BATCH_SIZE)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        user_id = None
+        if args.user_email:
+            user = crud_user.get_user_by_email(db, email=args.user_email)
+            if user is None:
+                sys.exit(f"No user with email {args.user_email}")
+            user_id = user.id
+        if args.command == "export":
+            output = open(args.output, "wb") if args.output else sys.stdout.buffer
+            try:
+                for chunk in export_chunks(db, user_id=user_id, batch_size=args.batch_size):
+                    output.write(chunk)
+            finally:
+                if args.output:
+                    output.close()
+            return
+        importer = StoryImporter(db, owner_id=user_id, batch_size=args.batch_size)
+        source = sys.stdin.buffer if args.input == "-" else open(args.input, "rb")
+        try:
+            importer.import_lines(line.rstrip(b"\n") for line in source)
+        finally:
+            if args.input != "-":
+                source.close()
+        result = importer.result()
+        for error in result.errors:
+            print(f"line {error.line}: {error.error}", file=sys.stderr)
+        print(f"Imported {result.imported} stories, skipped {result.skipped} existing, {result.failed} failed.")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Compares stored graph size and encode/decode time of the binary graph codec
+(app/db/graph_codec.py) with the JSON text it replaces, for synthetic stories
+shaped like editor output (every node/edge dumped with all schema fields).
+
+Run from backend/:
+    python -m benchmarks.graph_codec --nodes 10 100 500
+"""
+import argparse
+import json
+import time
+
+from app.db.graph_codec import decode_graph, measure
+from app.schemas import story as story_schema
+
+def synthetic_graph(nodes: int) -> dict:
+    graph = story_schema.StoryGraph(
+        nodes=[
+            story_schema.Node(
+                id=f"node-{i:05d}-0000-0000-0000-000000000000",
+                type="STORY_START" if i == 0 else ("QUESTION_INPUT" if i % 5 == 0 else "STORY"),
+                data=story_schema.NodeData(
+                    label=f"장면 {i}",
+                    text_content=f"Scene {i}: the court gathers and the advisor speaks of the harvest. " * 2,
+                    characterName="Advisor",
+                    inputPrompt="What do you decree?" if i % 5 == 0 else None,
+                    llm_processing_prompt="Judge the decree against the treasury." if i % 5 == 0 else None,
+                ),
+                position={"x": 250.0 * (i % 10), "y": 150.0 * (i // 10)},
+            )
+            for i in range(nodes)
+        ],
+        edges=[
+            story_schema.Edge(
+                id=f"edge-{i:05d}-{k}",
+                source=f"node-{i:05d}-0000-0000-0000-000000000000",
+                target=f"node-{(i + k + 1) % nodes:05d}-0000-0000-0000-000000000000",
+                label="Agree" if k == 0 else "Refuse",
+            )
+            for i in range(nodes)
+            for k in range(2)
+        ],
+    )
+    return graph.model_dump(mode="json")
+
+def main(args: argparse.Namespace) -> None:
+    print(f"{'nodes':>6} {'json B':>9} {'codec B':>9} {'saved':>6} {'enc ms':>8} {'dec ms':>8} {'json dec ms':>12}")
+    for nodes in args.nodes:
+        graph = synthetic_graph(nodes)
+        text = json.dumps(graph, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+        encoded, m = measure(graph)
+        assert decode_graph(encoded) == graph
+        started = time.perf_counter()
+        json.loads(text)
+        json_decode_ms = (time.perf_counter() - started) * 1000
+        print(
+            f"{nodes:>6} {m.json_bytes:>9} {m.encoded_bytes:>9} {m.saved_bytes / m.json_bytes:>6.0%} "
+            f"{m.encode_ms:>8.2f} {m.decode_ms:>8.2f} {json_decode_ms:>12.2f}"
+        )
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--nodes", type=int, nargs="+", default=[10, 100, 500])
+    main(parser.parse_args())
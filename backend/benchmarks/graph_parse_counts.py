@@ -0,0 +1,104 @@
+"""
+Counts how often each story endpoint parses (validates) a story graph into
+StoryGraph models, and fails if a response is built with more than one parse.
+Graphs are validated when written, so a read needs at most one parse of the
+stored graph, and writes can reuse the graph parsed from the request.
+
+Parses are counted with a model_post_init hook installed on StoryGraph before
+the app (and with it FastAPI's response validators) is imported; it runs for
+every StoryGraph built by validation, including nested ones.
+
+Runs against a throwaway SQLite database. From backend/:
+    python -m benchmarks.graph_parse_counts
+Exits with status 1 if a budget is exceeded.
+"""
+import os
+import sys
+import tempfile
+from contextlib import contextmanager
+from typing import Any, Dict, List
+
+os.environ["SQLALCHEMY_DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/parse_counts.db"
+
+from app.schemas import story as story_schema
+
+_parses: List[int] = [0]
+
+def _count_parse(self: story_schema.StoryGraph, context: Any) -> None:
+    _parses[0] += 1
+
+story_schema.StoryGraph.model_post_init = _count_parse
+story_schema.StoryGraph.__pydantic_post_init__ = "model_post_init"
+for _model in (
+    story_schema.StoryGraph,
+    story_schema.StoryCreate,
+    story_schema.StoryUpdate,
+    story_schema.StoryInDBBase,
+    story_schema.Story,
+    story_schema.StorySnapshot,
+    story_schema.AIGenerationRequest,
+):
+    _model.model_rebuild(force=True)
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from benchmarks.graph_codec import synthetic_graph
+
+# Graph parses per request. Writes that send a graph also parse the request body.
+BUDGETS: Dict[str, int] = {
+    "POST /stories": 1, # the request body
+    "GET /stories/{id}": 0, # encoded from the stored graph as is
+    "PUT /stories/{id} (graph)": 1, # the request body
+    "PUT /stories/{id} (title)": 1,
+    "POST /stories/{id}/revisions/{revision}/restore": 1, # the revision's graph
+    "DELETE /stories/{id}": 1,
+}
+
+def _login(client: TestClient) -> Dict[str, str]:
+    client.post("/api/auth/signup", json={"email": "bench@example.com", "username": "bench", "password": "pw"})
+    token = client.post("/api/auth/login", data={"username": "bench@example.com", "password": "pw"}).json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+@contextmanager
+def counting(results: Dict[str, int], name: str):
+    _parses[0] = 0
+    yield
+    results[name] = _parses[0]
+
+def main() -> int:
+    results: Dict[str, int] = {}
+    graph = synthetic_graph(50)
+    with TestClient(app) as client:
+        headers = _login(client)
+        with counting(results, "POST /stories"):
+            response = client.post("/api/stories", json={"title": "bench", "graph_json": graph}, headers=headers)
+        story_id, etag = response.json()["id"], response.headers["etag"]
+        with counting(results, "GET /stories/{id}"):
+            client.get(f"/api/stories/{story_id}", headers=headers)
+        graph["nodes"][1]["data"]["label"] = "renamed"
+        with counting(results, "PUT /stories/{id} (graph)"):
+            etag = client.put(
+                f"/api/stories/{story_id}", json={"graph_json": graph}, headers={**headers, "If-Match": etag}
+            ).headers["etag"]
+        with counting(results, "PUT /stories/{id} (title)"):
+            etag = client.put(
+                f"/api/stories/{story_id}", json={"title": "renamed"}, headers={**headers, "If-Match": etag}
+            ).headers["etag"]
+        with counting(results, "POST /stories/{id}/revisions/{revision}/restore"):
+            client.post(f"/api/stories/{story_id}/revisions/1/restore", headers={**headers, "If-Match": etag})
+        with counting(results, "DELETE /stories/{id}"):
+            client.delete(f"/api/stories/{story_id}", headers=headers)
+
+    failures = []
+    for name, count in results.items():
+        budget = BUDGETS[name]
+        print(f"{name:50s} {count:3d} graph parses  (budget {budget})")
+        if count > budget:
+            failures.append(f"{name}: {count} graph parses, budget {budget}")
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,40 @@
+"""
+Compares the full graph payload (every schema field) with the compact one
+(story_schema.compact_dump: defaults and None omitted), in bytes and in the time
+to parse it into a StoryGraph. Both parse to the same graph. Parse times are
+the best of --repeat runs of --rounds parses each, after a warm-up run.
+
+Run from backend/:
+    python -m benchmarks.graph_payload --nodes 10 100 500
+"""
+import argparse
+import json
+import timeit
+
+from app.schemas import story as story_schema
+from benchmarks.graph_codec import synthetic_graph
+
+def _parse_ms(payload: bytes, rounds: int, repeat: int) -> float:
+    parse = lambda: story_schema.StoryGraph.model_validate_json(payload)
+    timeit.timeit(parse, number=rounds) # Warm-up
+    # The minimum is the run least disturbed by the rest of the machine
+    return min(timeit.repeat(parse, number=rounds, repeat=repeat)) * 1000 / rounds
+
+def main(args: argparse.Namespace) -> None:
+    print(f"{'nodes':>6} {'full B':>9} {'compact B':>10} {'saved':>6} {'full parse ms':>14} {'compact parse ms':>17}")
+    for nodes in args.nodes:
+        graph = story_schema.StoryGraph.model_validate(synthetic_graph(nodes))
+        full = graph.model_dump_json().encode("utf-8")
+        compact = json.dumps(story_schema.compact_dump(graph), separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+        assert story_schema.StoryGraph.model_validate_json(compact) == graph
+        print(
+            f"{nodes:>6} {len(full):>9} {len(compact):>10} {1 - len(compact) / len(full):>6.0%} "
+            f"{_parse_ms(full, args.rounds, args.repeat):>14.3f} {_parse_ms(compact, args.rounds, args.repeat):>17.3f}"
+        )
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--nodes", type=int, nargs="+", default=[10, 100, 500])
+    parser.add_argument("--rounds", type=int, default=20, help="Parses per timed run")
+    parser.add_argument("--repeat", type=int, default=7, help="Timed runs; the fastest is reported")
+    main(parser.parse_args())
@@ -0,0 +1,58 @@
+"""
+Measures the throughput gain of LLM micro-batching against the local stub server.
+
+The stub runs in-process (httpx.ASGITransport) with capacity for one request at a
+time, a fixed per-request cost and a small per-prompt cost, like a batch-capable
+GPU inference server. The same burst of concurrent prompts is sent once with one
+HTTP request per prompt and once through the MicroBatcher.
+
+Run from backend/:
+    python -m benchmarks.llm_batching --prompts 64 --batch-size 8
+"""
+import argparse
+import asyncio
+import time
+
+import httpx
+
+from app.llm.backends import HTTPBackend
+from app.llm.batching import BatchingBackend
+from app.llm.stub_server import StubConfig, create_stub_app
+
+def _stub_backend(args: argparse.Namespace) -> HTTPBackend:
+    stub = create_stub_app("bench", StubConfig(
+        latency_ms=args.request_latency_ms,
+        batch_item_latency_ms=args.item_latency_ms,
+        max_concurrency=1,
+    ))
+    return HTTPBackend("bench", "http://stub", transport=httpx.ASGITransport(app=stub))
+
+async def _burst(backend, prompts: int) -> float:
+    started = time.perf_counter()
+    await asyncio.gather(*(backend.complete(f"prompt {i}") for i in range(prompts)))
+    return time.perf_counter() - started
+
+async def main(args: argparse.Namespace) -> None:
+    unbatched = _stub_backend(args)
+    batched = BatchingBackend(_stub_backend(args), args.batch_size, args.max_wait_ms)
+    try:
+        unbatched_seconds = await _burst(unbatched, args.prompts)
+        batched_seconds = await _burst(batched, args.prompts)
+    finally:
+        await unbatched.aclose()
+        await batched.aclose()
+
+    print(f"{args.prompts} prompts, stub cost {args.request_latency_ms}ms/request + {args.item_latency_ms}ms/prompt")
+    print(f"  one request per prompt: {unbatched_seconds:.3f}s  ({args.prompts / unbatched_seconds:.1f} prompts/s)")
+    print(f"  micro-batched (B={args.batch_size}, wait={args.max_wait_ms}ms): {batched_seconds:.3f}s  "
+          f"({args.prompts / batched_seconds:.1f} prompts/s, {batched.batcher.batches_sent} requests)")
+    print(f"  throughput gain: {unbatched_seconds / batched_seconds:.1f}x")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--prompts", type=int, default=64)
+    parser.add_argument("--batch-size", type=int, default=8)
+    parser.add_argument("--max-wait-ms", type=float, default=5.0)
+    parser.add_argument("--request-latency-ms", type=float, default=40.0)
+    parser.add_argument("--item-latency-ms", type=float, default=2.0)
+    asyncio.run(main(parser.parse_args()))
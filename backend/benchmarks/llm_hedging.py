@@ -0,0 +1,121 @@
+"""
+Checks hedging and the circuit breaker of HedgedBackendPool against two stub
+servers run in-process (httpx.ASGITransport), and exits non-zero on a failure:
+
+- hedge: the first stub answers slowly. The same prompt must go to the second
+  stub when the hedge deadline passes, not before and not much after, and its
+  answer must win.
+- cancel: the slow stub's attempt, the loser, must be cancelled, so the stub
+  has no request left in flight.
+- breaker: the first stub fails every request. Each failure must fail over to
+  the second stub, and once the breaker has opened, requests must skip the
+  failing stub entirely.
+
+Run from backend/:
+    python -m benchmarks.llm_hedging
+"""
+import os
+
+# Before the app settings are read: hedge at the fixed default delay, open the breaker quickly
+DEADLINE_MS = 200
+FAILURE_THRESHOLD = 3
+os.environ["LLM_HEDGE_DEFAULT_DELAY_MS"] = str(DEADLINE_MS)
+os.environ["LLM_HEDGE_MIN_SAMPLES"] = "1000"
+os.environ["LLM_HEDGE_MAX_ATTEMPTS"] = "2"
+os.environ["LLM_CIRCUIT_FAILURE_THRESHOLD"] = str(FAILURE_THRESHOLD)
+os.environ["LLM_CIRCUIT_RESET_SECONDS"] = "60"
+
+import argparse
+import asyncio
+import sys
+import time
+from typing import List, Tuple
+
+import httpx
+from fastapi import FastAPI
+
+from app.llm.backends import HTTPBackend
+from app.llm.hedging import CircuitBreaker, HedgedBackendPool
+from app.llm.stub_server import StubConfig, create_stub_app
+
+FAST_LATENCY_MS = 20
+# How late the hedge may fire (scheduling, the fast stub's answer and the in-process HTTP round trip)
+TOLERANCE_MS = 100
+
+def _pool(*stubs: Tuple[str, StubConfig]) -> Tuple[HedgedBackendPool, List[FastAPI]]:
+    apps = [create_stub_app(name, config) for name, config in stubs]
+    backends = [
+        HTTPBackend(name, "http://stub", transport=httpx.ASGITransport(app=app))
+        for (name, _), app in zip(stubs, apps)
+    ]
+    return HedgedBackendPool(backends), apps
+
+async def check_hedge() -> List[str]:
+    failures = []
+    pool, (slow, fast) = _pool(
+        ("slow", StubConfig(latency_ms=5000)),
+        ("fast", StubConfig(latency_ms=FAST_LATENCY_MS)),
+    )
+    try:
+        started = time.perf_counter()
+        completion = await pool.complete("hedge me")
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        # Let the cancelled request unwind inside the stub
+        await asyncio.sleep(0)
+        slow_state, fast_state = pool.snapshot()
+        print(f"hedge: answered in {elapsed_ms:.0f}ms by {completion.text.split()[0]} (deadline {DEADLINE_MS}ms), "
+              f"hedges {pool.hedges_launched}, slow cancelled {slow_state['cancelled']}, "
+              f"slow stub in flight {slow.state.in_flight}")
+        if pool.hedges_launched != 1 or fast.state.requests != 1:
+            failures.append(f"hedge: expected one hedged request, got {pool.hedges_launched} ({fast.state.requests} at the fast stub)")
+        if elapsed_ms < DEADLINE_MS + FAST_LATENCY_MS:
+            failures.append(f"hedge: answered after {elapsed_ms:.0f}ms, before the deadline plus the fast stub's latency")
+        elif elapsed_ms > DEADLINE_MS + FAST_LATENCY_MS + TOLERANCE_MS:
+            failures.append(f"hedge: answered after {elapsed_ms:.0f}ms, the hedge fired late")
+        if not completion.text.startswith("[fast]") or fast_state["wins"] != 1:
+            failures.append(f"hedge: the fast stub's answer did not win: {completion.text!r}")
+        if slow_state["cancelled"] != 1 or slow.state.in_flight != 0:
+            failures.append(f"cancel: the slow attempt was not cancelled ({slow_state['cancelled']} cancelled, "
+                            f"{slow.state.in_flight} still in flight at the stub)")
+    finally:
+        await pool.aclose()
+    return failures
+
+async def check_breaker(requests: int) -> List[str]:
+    failures = []
+    pool, (failing, healthy) = _pool(
+        ("failing", StubConfig(latency_ms=5, failure_rate=1.0)),
+        ("healthy", StubConfig(latency_ms=5)),
+    )
+    try:
+        answered_by = []
+        for i in range(requests):
+            completion = await pool.complete(f"prompt {i}")
+            answered_by.append(completion.text.split()[0])
+        failing_state, healthy_state = pool.snapshot()
+        print(f"breaker: {requests} requests, failing stub got {failing.state.requests}, healthy stub got "
+              f"{healthy.state.requests}, circuit {failing_state['circuit_state']}")
+        if any(name != "[healthy]" for name in answered_by):
+            failures.append(f"breaker: not every request failed over to the healthy stub: {answered_by}")
+        if failing_state["circuit_state"] != CircuitBreaker.OPEN:
+            failures.append(f"breaker: circuit is {failing_state['circuit_state']} after {failing.state.requests} failures")
+        if failing.state.requests != FAILURE_THRESHOLD:
+            failures.append(f"breaker: the failing stub got {failing.state.requests} requests, "
+                            f"expected {FAILURE_THRESHOLD} before the circuit opened")
+        if healthy.state.requests != requests:
+            failures.append(f"breaker: the healthy stub got {healthy.state.requests} of {requests} requests")
+    finally:
+        await pool.aclose()
+    return failures
+
+async def main(args: argparse.Namespace) -> int:
+    failures = await check_hedge() + await check_breaker(args.requests)
+    for failure in failures:
+        print(f"FAIL {failure}")
+    print("OK" if not failures else f"{len(failures)} check(s) failed")
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=10, help="Requests sent while the first stub fails")
+    sys.exit(asyncio.run(main(parser.parse_args())))
@@ -0,0 +1,78 @@
+"""
+Pages through a user's stories (GET /api/stories/my, keyset cursors) while
+saving stories between page fetches, as the editor's autosave does, and checks
+that every story is listed exactly once. The story saved is the last one of
+the page just fetched: it moves to the top, behind the cursor, and the next
+pages must continue where that page ended.
+
+Runs against a throwaway SQLite database. From backend/:
+    python -m benchmarks.story_pagination
+Exits with status 1 if a page repeats or skips a story.
+"""
+import os
+import sys
+import tempfile
+import time
+from typing import Dict, List
+
+os.environ["SQLALCHEMY_DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/pagination.db"
+os.environ["GRAPH_REENCODE_ENABLED"] = "false"
+os.environ["GRAPH_VALIDATION_ENABLED"] = "false"
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+
+STORIES = 6
+LIMIT = 2
+
+def _login(client: TestClient) -> Dict[str, str]:
+    client.post("/api/auth/signup", json={"email": "bench@example.com", "username": "bench", "password": "pw"})
+    token = client.post("/api/auth/login", data={"username": "bench@example.com", "password": "pw"}).json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+def _save(client: TestClient, headers: Dict[str, str], story_id: str) -> None:
+    time.sleep(1.1) # The save's updated_at must differ from the cursor's, even at one-second resolution
+    etag = client.get(f"/api/stories/{story_id}", headers=headers).headers["etag"]
+    response = client.put(
+        f"/api/stories/{story_id}", json={"description": "autosaved"}, headers={**headers, "If-Match": etag}
+    )
+    response.raise_for_status()
+
+def _listing(client: TestClient, headers: Dict[str, str], save_after_page: int) -> List[str]:
+    """Story ids of every page, saving the last story of page `save_after_page` right after fetching it."""
+    seen: List[str] = []
+    cursor, page = None, 0
+    while True:
+        params = {"limit": LIMIT, **({"cursor": cursor} if cursor else {})}
+        body = client.get("/api/stories/my", params=params, headers=headers).json()
+        seen.extend(story["id"] for story in body["items"])
+        if page == save_after_page and body["items"]:
+            _save(client, headers, body["items"][-1]["id"])
+        cursor, page = body["next_cursor"], page + 1
+        if cursor is None:
+            return seen
+
+def main() -> int:
+    failures = []
+    with TestClient(app) as client:
+        headers = _login(client)
+        story_ids = {
+            client.post("/api/stories", json={"title": f"story {i}"}, headers=headers).json()["id"]
+            for i in range(STORIES)
+        }
+        for save_after_page in range(STORIES // LIMIT):
+            seen = _listing(client, headers, save_after_page)
+            repeated = {story_id for story_id in seen if seen.count(story_id) > 1}
+            missing = story_ids - set(seen)
+            print(f"save after page {save_after_page + 1}: {len(seen)} listed, {len(repeated)} repeated, {len(missing)} missing")
+            if repeated:
+                failures.append(f"save after page {save_after_page + 1}: repeated {sorted(repeated)}")
+            if missing:
+                failures.append(f"save after page {save_after_page + 1}: skipped {sorted(missing)}")
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
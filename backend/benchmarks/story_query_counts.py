@@ -0,0 +1,111 @@
+"""
+Counts the SQL statements each story endpoint issues and fails if any exceeds
+its budget, so N+1 lookups (e.g. lazy-loading each story's author in a list)
+cannot come back unnoticed. The story list is measured at two sizes: its count
+must not grow with the number of stories.
+
+Runs against a throwaway SQLite database. From backend/:
+    python -m benchmarks.story_query_counts
+Exits with status 1 if a budget is exceeded.
+"""
+import os
+import sys
+import tempfile
+from contextlib import contextmanager
+from typing import Dict, List
+
+os.environ["SQLALCHEMY_DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/query_counts.db"
+# Background workers query the same engines and would be counted against whichever request is running
+os.environ["GRAPH_REENCODE_ENABLED"] = "false"
+os.environ["GRAPH_VALIDATION_ENABLED"] = "false"
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from app.crud import crud_story
+from app.db.session import SessionLocal, async_engine, engine
+from app.main import app
+
+# Statements per request, including the current-user lookup done for authentication
+BUDGETS: Dict[str, int] = {
+    "POST /stories": 8, # includes inserting revision 1 and the search rows (one executemany)
+    "GET /stories/my": 3, # user, ETag metadata page, stories joined with authors
+    "GET /stories/{id}": 3, # user, version, story joined with author and graph
+    "GET /stories/{id} (cached)": 2, # user, version; the body comes from story_response_cache
+    "GET /stories/{id} (If-None-Match)": 2, # user, version only
+    "PUT /stories/{id}": 6, # includes updating the story's search row (title changed)
+    "PATCH /stories/{id}/graph": 7, # includes the latest revision read and the revision write
+    # In a fresh session, so authors cannot come from the identity map
+    "get_stories_by_user + author_username": 1,
+}
+
+_statements: List[str] = []
+
+# The current-user lookup runs on the async engine
+@event.listens_for(engine, "before_cursor_execute")
+@event.listens_for(async_engine.sync_engine, "before_cursor_execute")
+def _count(conn, cursor, statement, parameters, context, executemany):
+    _statements.append(statement)
+
+@contextmanager
+def counting(results: Dict[str, int], name: str):
+    _statements.clear()
+    yield
+    results[name] = len(_statements)
+
+def _login(client: TestClient) -> Dict[str, str]:
+    client.post("/api/auth/signup", json={"email": "bench@example.com", "username": "bench", "password": "pw"})
+    token = client.post("/api/auth/login", data={"username": "bench@example.com", "password": "pw"}).json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+def main() -> int:
+    results: Dict[str, int] = {}
+    with TestClient(app) as client:
+        headers = _login(client)
+        with counting(results, "POST /stories"):
+            story = client.post("/api/stories", json={"title": "bench"}, headers=headers).json()
+        with counting(results, "GET /stories/my (1 story)"):
+            client.get("/api/stories/my", headers=headers)
+        for i in range(19):
+            client.post("/api/stories", json={"title": f"bench {i}"}, headers=headers)
+        with counting(results, "GET /stories/my"):
+            client.get("/api/stories/my", headers=headers)
+        with counting(results, "GET /stories/{id}"):
+            etag = client.get(f"/api/stories/{story['id']}", headers=headers).headers["etag"]
+        with counting(results, "GET /stories/{id} (cached)"):
+            client.get(f"/api/stories/{story['id']}", headers=headers)
+        with counting(results, "GET /stories/{id} (If-None-Match)"):
+            client.get(f"/api/stories/{story['id']}", headers={**headers, "If-None-Match": etag})
+        with counting(results, "PUT /stories/{id}"):
+            etag = client.put(
+                f"/api/stories/{story['id']}", json={"title": "renamed"}, headers={**headers, "If-Match": etag}
+            ).headers["etag"]
+        with counting(results, "PATCH /stories/{id}/graph"):
+            client.patch(
+                f"/api/stories/{story['id']}/graph",
+                json={"ops": [{"op": "move_node", "id": story["graph_json"]["nodes"][0]["id"], "position": {"x": 1, "y": 2}}]},
+                headers={**headers, "If-Match": etag},
+            )
+        user_id = story["user_id"]
+
+    db = SessionLocal()
+    try:
+        with counting(results, "get_stories_by_user + author_username"):
+            [s.author.username for s in crud_story.get_stories_by_user(db, user_id=user_id, limit=20)]
+    finally:
+        db.close()
+
+    failures = []
+    if results["GET /stories/my"] != results["GET /stories/my (1 story)"]:
+        failures.append("GET /stories/my issues more statements for 20 stories than for 1 (N+1)")
+    for name, count in results.items():
+        budget = BUDGETS.get(name)
+        print(f"{name:40s} {count:3d} statements" + (f"  (budget {budget})" if budget is not None else ""))
+        if budget is not None and count > budget:
+            failures.append(f"{name}: {count} statements, budget {budget}")
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
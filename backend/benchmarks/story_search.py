@@ -0,0 +1,83 @@
+"""
+Times story searches (app.services.story_search) against N synthetic stories of
+one user, next to a LIKE scan of the same text, which is what finding text
+without the index costs. Each story has a word of its own in one node
+(a rare term, one hit) besides the text every story shares (a common term,
+a hit in every node, of which one page is returned).
+
+Runs against a throwaway SQLite database. From backend/:
+    python -m benchmarks.story_search --stories 1000 10000
+"""
+import argparse
+import os
+import tempfile
+import time
+
+_tmp = tempfile.mkdtemp()
+os.environ["SQLALCHEMY_DATABASE_URL"] = f"sqlite:///{_tmp}/search.db"
+
+from sqlalchemy import text
+
+from app.db.base import Base
+from app.db.session import SessionLocal, engine
+from app.models.user import User
+from app.services import story_search, story_transfer
+from benchmarks.graph_codec import synthetic_graph
+
+LIKE_SQL = text(
+    "SELECT d.story_id, d.node_id FROM story_search_documents d JOIN stories s ON s.id = d.story_id "
+    "WHERE s.user_id = :user_id AND (d.heading LIKE :pattern OR d.body LIKE :pattern) LIMIT 20"
+)
+
+def _records(first: int, count: int, graph: dict, email: str):
+    for i in range(first, first + count):
+        nodes = [dict(node) for node in graph["nodes"]]
+        nodes[1] = {**nodes[1], "data": {**nodes[1]["data"], "text_content": f"The envoy of marker{i:07d} arrives."}}
+        yield story_transfer.orjson.dumps({
+            "id": f"story-{i:07d}",
+            "title": f"Kingdom {i}",
+            "description": "A kingdom of choices.",
+            "author_email": email,
+            "graph_json": {**graph, "nodes": nodes},
+        })
+
+def _ms(run, rounds: int) -> float:
+    started = time.perf_counter()
+    for _ in range(rounds):
+        run()
+    return (time.perf_counter() - started) * 1000 / rounds
+
+def main(args: argparse.Namespace) -> None:
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    user = User(email="bench@example.com", username="bench", hashed_password="-")
+    db.add(user)
+    db.commit()
+    user_id = user.id
+    graph = synthetic_graph(args.nodes)
+
+    print(f"{'stories':>8} {'query':>18} {'hits':>6} {'search ms':>10} {'LIKE ms':>9}")
+    indexed = 0
+    for stories in args.stories:
+        importer = story_transfer.StoryImporter(db)
+        importer.import_lines(_records(indexed, stories - indexed, graph, "bench@example.com"))
+        indexed = stories
+        for name, query, pattern in (
+            ("rare", f"marker{stories // 2:07d}", f"%marker{stories // 2:07d}%"),
+            ("rare prefix", f"marker{stories // 2:07d}"[:-1], f"%marker{stories // 2:07d}"[:-1] + "%"),
+            ("common", "harvest", "%harvest%"),
+            ("two terms", "advisor harvest", "%advisor%harvest%"),
+            ("no match", "dragon", "%dragon%"),
+        ):
+            hits = len(story_search.search(db, user_id, query).items)
+            search_ms = _ms(lambda: story_search.search(db, user_id, query), args.rounds)
+            like_ms = _ms(lambda: db.execute(LIKE_SQL, {"user_id": user_id, "pattern": pattern}).all(), args.rounds)
+            print(f"{stories:>8} {name:>18} {hits:>6} {search_ms:>10.2f} {like_ms:>9.2f}")
+    db.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--stories", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--nodes", type=int, default=10, help="Nodes per story graph")
+    parser.add_argument("--rounds", type=int, default=20)
+    main(parser.parse_args())
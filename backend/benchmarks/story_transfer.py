@@ -0,0 +1,99 @@
+"""
+Imports and exports N synthetic stories through app.services.story_transfer
+and reports throughput and peak Python memory (tracemalloc) of each direction.
+Memory must stay flat: the peak at the largest N may not exceed twice the
+peak at the smallest.
+
+Runs against a throwaway SQLite database. From backend/:
+    python -m benchmarks.story_transfer --stories 1000 10000 100000
+Exits with status 1 if memory grows with the number of stories.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+_tmp = tempfile.mkdtemp()
+os.environ["SQLALCHEMY_DATABASE_URL"] = f"sqlite:///{_tmp}/transfer.db"
+
+import orjson
+
+from app.db.base import Base
+from app.db.session import SessionLocal, engine
+from app.models.user import User
+from app.services import story_transfer
+from benchmarks.graph_codec import synthetic_graph
+
+def _write_ndjson(path: str, stories: int, graph: dict, email: str) -> None:
+    with open(path, "wb") as output:
+        for i in range(stories):
+            output.write(orjson.dumps({
+                "id": f"story-{email}-{i:07d}",
+                "title": f"Story {i}",
+                "description": "A kingdom of choices.",
+                "author_email": email,
+                "graph_json": graph,
+            }) + b"\n")
+
+def _measure(run) -> tuple:
+    tracemalloc.start()
+    started = time.perf_counter()
+    run()
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak
+
+def main(args: argparse.Namespace) -> int:
+    Base.metadata.create_all(bind=engine)
+    graph = synthetic_graph(args.nodes)
+    print(f"{'stories':>8} {'import/s':>9} {'import peak MiB':>16} {'export/s':>9} {'export peak MiB':>16}")
+    peaks = []
+    for stories in args.stories:
+        # A user per run, so each export covers exactly that run's stories
+        email = f"bench{stories}@example.com"
+        db = SessionLocal()
+        user = User(email=email, username=f"bench{stories}", hashed_password="-")
+        db.add(user)
+        db.commit()
+        user_id = user.id
+        db.close()
+        path = os.path.join(_tmp, f"{stories}.ndjson")
+        _write_ndjson(path, stories, graph, email)
+
+        db = SessionLocal()
+        importer = story_transfer.StoryImporter(db)
+        with open(path, "rb") as source:
+            import_s, import_peak = _measure(lambda: importer.import_lines(line.rstrip(b"\n") for line in source))
+        db.close()
+        assert importer.imported == stories, importer.result()
+
+        db = SessionLocal()
+        with open(os.devnull, "wb") as sink:
+            def export() -> None:
+                for chunk in story_transfer.export_chunks(db, user_id=user_id):
+                    sink.write(chunk)
+            export_s, export_peak = _measure(export)
+        db.close()
+        peaks.append((import_peak, export_peak))
+        print(
+            f"{stories:>8} {stories / import_s:>9.0f} {import_peak / 2**20:>16.1f} "
+            f"{stories / export_s:>9.0f} {export_peak / 2**20:>16.1f}"
+        )
+
+    failures = [
+        f"{direction} peak grew from {small / 2**20:.1f} MiB to {large / 2**20:.1f} MiB"
+        for direction, small, large in zip(("import", "export"), peaks[0], peaks[-1])
+        if large > 2 * small
+    ]
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--stories", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--nodes", type=int, default=10, help="Nodes per story graph")
+    sys.exit(main(parser.parse_args()))
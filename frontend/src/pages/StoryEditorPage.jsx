@@ -112,6 +112,7 @@ const StoryEditorPage = forwardRef(({ setCurrentStoryTitle }, ref) => {
   const [autoSaveStatus, setAutoSaveStatus] = useState(AUTO_SAVE_STATUS.IDLE);
   const [lastSaved, setLastSaved] = useState(new Date());
   const isInitialLoadDone = useRef(false);
+  const storyVersion = useRef(null); // 서버의 스토리 버전 (저장 시 If-Match)
   const editorRef = useRef(null); // To get editor's height for sidebar calculation
   const reactFlowWrapper = useRef(null); // Ref for ReactFlow viewport calculations
   const [reactFlowInstance, setReactFlowInstance] = useState(null); // Store instance
@@ -170,7 +171,8 @@ const StoryEditorPage = forwardRef(({ setCurrentStoryTitle }, ref) => {
     setAutoSaveStatus(AUTO_SAVE_STATUS.SAVING);
 
     try {
-      await storyService.saveStoryGraph(storyId, storyTitle, storyDescription, nodes, edges);
+      const savedStory = await storyService.saveStoryGraph(storyId, storyTitle, storyDescription, nodes, edges, storyVersion.current);
+      storyVersion.current = savedStory.version;
       setLastSaved(new Date());
       setAutoSaveStatus(AUTO_SAVE_STATUS.SUCCESS);
       if (!isAutoSave) {
@@ -206,6 +208,7 @@ const StoryEditorPage = forwardRef(({ setCurrentStoryTitle }, ref) => {
             if (setCurrentStoryTitle) setCurrentStoryTitle(title);
             setStoryTitle(title);
             setStoryDescription(description);
+            storyVersion.current = storyDetail.version;
             setNodes(storyDetail.nodes || []);
             setEdges(storyDetail.edges || []);
             setLastSaved(new Date()); // Set initial "last saved" time
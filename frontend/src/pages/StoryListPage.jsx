@@ -9,6 +9,8 @@ function StoryListPage() {
   const [stories, setStories] = useState([]);
   const [isLoading, setIsLoading] = useState(true);
   const [error, setError] = useState('');
+  const [nextCursor, setNextCursor] = useState(null); // 다음 페이지 커서 (null이면 더 없음)
+  const [isLoadingMore, setIsLoadingMore] = useState(false);
   // const { token } = useAuth(); // 실제 API 호출 시 사용
 
   useEffect(() => {
@@ -17,8 +19,9 @@ function StoryListPage() {
       setError('');
       try {
         // Mock storyService는 현재 token 인자를 사용하지 않음
-        const fetchedStories = await storyService.getMyStories(/* token */); 
-        setStories(fetchedStories);
+        const page = await storyService.getMyStories(/* token */);
+        setStories(page.items);
+        setNextCursor(page.next_cursor);
       } catch (err) {
         setError(err.message || '스토리 목록 로드 실패');
       } finally {
@@ -28,6 +31,19 @@ function StoryListPage() {
     fetchStories();
   }, [/* token */]); // token이 변경될 때마다 목록을 다시 불러올 수 있음
 
+  const handleLoadMore = async () => {
+    setIsLoadingMore(true);
+    try {
+      const page = await storyService.getMyStories(nextCursor);
+      setStories(prevStories => [...prevStories, ...page.items]);
+      setNextCursor(page.next_cursor);
+    } catch (err) {
+      alert(`스토리 목록 로드 실패: ${err.message}`);
+    } finally {
+      setIsLoadingMore(false);
+    }
+  };
+
   const handleCreateNewStory = async () => {
     const newTitle = prompt("새 스토리의 제목을 입력하세요:");
     if (newTitle && newTitle.trim() !== "") {
@@ -81,6 +97,13 @@ function StoryListPage() {
           ))}
         </div>
       )}
+      {nextCursor && (
+        <div className="mt-8 text-center">
+          <button onClick={handleLoadMore} disabled={isLoadingMore} className="bg-white hover:bg-gray-50 text-teal-700 font-medium py-2 px-6 rounded-lg shadow border border-gray-200 transition-colors disabled:opacity-50">
+            {isLoadingMore ? '불러오는 중...' : '더 보기'}
+          </button>
+        </div>
+      )}
     </div>
   );
 }
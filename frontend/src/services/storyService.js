@@ -2,6 +2,7 @@
 // import {AuthContext} from "../contexts/AuthContext"; // Not used directly here
 
 const API_BASE_URL = 'http://localhost:8000/api';
+// 모든 요청에 쿠키를 보냄: 저장 직후의 읽기가 방금 쓴 내용을 보도록 백엔드가 쿠키로 주 DB를 지정함 (read-your-writes)
 
 // Helper function to get the auth token
 const getAuthToken = () => {
@@ -107,11 +108,25 @@ const transformEdgeForBackend = (frontendEdge) => {
 };
 
 
+// 저장 실패 응답을 Error로 변환. 412(버전 충돌)이면 error.conflict = true, error.currentVersion 설정
+const storyWriteError = async (response) => {
+  const errorData = await response.json().catch(() => ({}));
+  if (response.status === 412) {
+    const error = new Error(errorData.detail?.message || '다른 곳에서 스토리가 변경되었습니다. 새로고침 후 다시 시도하세요.');
+    error.conflict = true;
+    error.currentVersion = errorData.detail?.current_version;
+    return error;
+  }
+  return new Error(errorData.detail || '스토리 저장에 실패했습니다.');
+};
+
 export const storyService = {
-  // 스토리 목록 가져오기
-  getMyStories: async () => {
+  // 스토리 목록 가져오기 (한 페이지씩: { items, next_cursor }, next_cursor가 null이면 마지막 페이지)
+  getMyStories: async (cursor = null) => {
     const token = getAuthToken();
-    const response = await fetch(`${API_BASE_URL}/stories/my`, {
+    const query = cursor ? `?cursor=${encodeURIComponent(cursor)}` : '';
+    const response = await fetch(`${API_BASE_URL}/stories/my${query}`, {
+      credentials: 'include',
       headers: {
         'Authorization': `Bearer ${token}`,
       },
@@ -120,16 +135,18 @@ export const storyService = {
       const errorData = await response.json().catch(() => ({}));
       throw new Error(errorData.detail || '내 스토리 목록을 불러오는 데 실패했습니다.');
     }
-    // 백엔드 응답: [ { id, title, description, last_updated, author_username } ]
+    // 백엔드 응답: { items: [ { id, title, description, version, updated_at, author_username } ], next_cursor }
+    // (graph_json 제외). next_cursor가 있으면 ?cursor=next_cursor 로 다음 페이지 요청.
     // 프론트 StoryListPage는 initial_stats 등도 기대할 수 있으나, 목록에서는 불필요할 수 있음.
-    // 필요시 StoryBase 스키마에 graph_json의 일부(initial_stats)를 포함하도록 백엔드 수정 고려.
-    return response.json(); 
+    const page = await response.json();
+    return { items: page.items, next_cursor: page.next_cursor };
   },
 
   // 새 스토리 생성 (초기 STORY_START 노드 포함된 graph_json 반환)
   createStory: async (newStoryData) => { // { title, description }
     const token = getAuthToken();
     const response = await fetch(`${API_BASE_URL}/stories`, {
+      credentials: 'include',
       method: 'POST',
       headers: {
         'Content-Type': 'application/json',
@@ -151,6 +168,7 @@ export const storyService = {
   getStoryDetail: async (storyId) => {
     const token = getAuthToken();
     const response = await fetch(`${API_BASE_URL}/stories/${storyId}`, {
+      credentials: 'include',
       headers: {
         'Authorization': `Bearer ${token}`,
       },
@@ -174,7 +192,8 @@ export const storyService = {
   },
 
   // 스토리 업데이트 (메타데이터 및 전체 그래프 저장)
-  saveStoryGraph: async (storyId, title, description, nodesToSave, edgesToSave) => {
+  // version: 마지막으로 불러오거나 저장한 스토리 버전 (If-Match로 전송, 다른 곳에서 변경되었으면 412)
+  saveStoryGraph: async (storyId, title, description, nodesToSave, edgesToSave, version) => {
     const token = getAuthToken();
     
     // 프론트엔드 노드/엣지를 백엔드 형식으로 변환 (현재는 거의 동일하나, type:'custom' 등 정리)
@@ -191,21 +210,43 @@ export const storyService = {
     };
 
     const response = await fetch(`${API_BASE_URL}/stories/${storyId}`, {
+      credentials: 'include',
       method: 'PUT',
       headers: {
         'Content-Type': 'application/json',
         'Authorization': `Bearer ${token}`,
+        'If-Match': `"v${version}"`,
       },
       body: JSON.stringify(payload),
     });
 
     if (!response.ok) {
-      const errorData = await response.json().catch(() => ({}));
-      throw new Error(errorData.detail || '스토리 저장에 실패했습니다.');
+      throw await storyWriteError(response);
     }
     return response.json(); // 업데이트된 스토리 전체 반환
   },
 
+  // 그래프 변경분만 저장 (add_node, update_node, move_node, remove_node, add_edge, update_edge, remove_edge)
+  // 예: [{ op: 'move_node', id: nodeId, position: { x, y } }]
+  patchStoryGraph: async (storyId, ops, version) => {
+    const token = getAuthToken();
+    const response = await fetch(`${API_BASE_URL}/stories/${storyId}/graph`, {
+      credentials: 'include',
+      method: 'PATCH',
+      headers: {
+        'Content-Type': 'application/json',
+        'Authorization': `Bearer ${token}`,
+        'If-Match': `"v${version}"`,
+      },
+      body: JSON.stringify({ ops }),
+    });
+
+    if (!response.ok) {
+      throw await storyWriteError(response);
+    }
+    return response.json(); // { id, version, applied, node_count, edge_count }
+  },
+
   // AI 기반 노드/엣지 생성 요청
   generateAiElements: async (storyId, currentGraph, generationParams) => {
     const token = getAuthToken();
@@ -223,6 +264,7 @@ export const storyService = {
     };
 
     const response = await fetch(`${API_BASE_URL}/stories/${storyId}/ai/generate-elements`, {
+        credentials: 'include',
         method: 'POST',
         headers: {
             'Content-Type': 'application/json',
@@ -255,6 +297,7 @@ export const storyService = {
     };
 
     const response = await fetch(`${API_BASE_URL}/play/${storyId}/proceed`, {
+      credentials: 'include',
       method: 'POST',
       headers: {
         'Content-Type': 'application/json',
@@ -284,6 +327,7 @@ export const storyService = {
     formData.append('image', imageFile);
 
     const response = await fetch(`${API_BASE_URL}/files/upload/image`, {
+      credentials: 'include',
       method: 'POST',
       headers: {
         'Authorization': `Bearer ${token}`,